@@ -0,0 +1,291 @@
+"""Offline intrusion analysis of a recorded video file
+
+Usage:
+    python analyze.py VIDEO [--workers N] [--segment-seconds 60] [--overlap-seconds 2]
+                      [--camera-id cam-1] [--start-time 2025-12-22T17:00:00Z]
+                      [--output events.ndjson] [--db data/events.db]
+
+The file is split into fixed-length segments that are analyzed in
+parallel by a pool of worker processes, each running its own
+DetectionPipeline with no display and no network. A worker first replays
+the overlap before its segment (without reporting anything) so motion
+detection and tracking are warmed up when the segment starts.
+
+Track IDs are per worker, so they are stitched at each boundary: the
+tracks a worker holds after its warm-up are matched by position to the
+tracks the previous worker held on the same frame, and matched tracks keep
+their ID. The event cooldown is applied afterwards in video time.
+
+Events carry the time they happened in the recording: --start-time plus
+the frame's offset in the video. Without --start-time the recording is
+assumed to have ended when the file was last modified.
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+import cv2
+import numpy as np
+from processing.association import hungarian_match
+from processing.pipeline import DetectionPipeline
+from storage.database import parse_timestamp
+from config.settings import (CAMERAS, EVENT_COOLDOWN, ANALYZE_SEGMENT_SECONDS,
+                             ANALYZE_OVERLAP_SECONDS, ANALYZE_STITCH_DISTANCE)
+
+def probe_video(path):
+    """Return (frame count, frames per second) of a video file"""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Cannot open video source: {path}")
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    cap.release()
+    return frame_count, fps
+
+def plan_segments(frame_count, fps, segment_seconds, overlap_seconds):
+    """Split the video into (warmup_start, start, end) frame ranges"""
+    length = max(1, int(round(segment_seconds * fps)))
+    overlap = int(round(overlap_seconds * fps))
+    return [(max(0, start - overlap), start, min(start + length, frame_count))
+            for start in range(0, frame_count, length)]
+
+def track_positions(objects):
+    """Tracked objects as {object ID: (x, y)}"""
+    return {int(object_id): (float(c[0]), float(c[1])) for object_id, c in objects.items()}
+
+def init_worker():
+    """Keep each worker on one OpenCV thread; parallelism comes from the pool"""
+    cv2.setNumThreads(1)
+
+def analyze_segment(path, camera, warmup_start, start, end):
+    """Run the pipeline over one segment (executes in a worker process)
+    
+    Returns the segment's crossings as (frame, object ID, zone, direction)
+    with the worker's own object IDs, the IDs seen in the segment, and the
+    track positions on the frame before the segment (after the warm-up)
+    and on its last frame, for stitching.
+    """
+    cap = cv2.VideoCapture(path)
+    if warmup_start > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, warmup_start)
+    # Every crossing is reported; the cooldown is applied after stitching
+    pipeline = DetectionPipeline(dict(camera, event_cooldown=0))
+    
+    crossings = []
+    seen = set()
+    boundary = {}
+    final = {}
+    frames = 0
+    # Alerts are reported by the parent once segments are stitched
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for index in range(warmup_start, end):
+            ret, frame = cap.read()
+            if not ret:
+                break
+            result = pipeline.process(frame)
+            if index < start:
+                if index == start - 1:
+                    boundary = track_positions(result.objects)
+                continue
+            frames += 1
+            seen.update(int(object_id) for object_id in result.objects)
+            crossings.extend((index, int(c.object_id), c.zone, c.direction)
+                             for c in result.crossings)
+            final = result.objects
+    cap.release()
+    return {
+        'start': start,
+        'frames': frames,
+        'crossings': crossings,
+        'seen': seen,
+        'boundary': boundary,
+        'final': track_positions(final) if final else {}
+    }
+
+def match_tracks(boundary, previous, max_distance):
+    """Map this segment's IDs to the previous segment's global IDs by position"""
+    if not boundary or not previous:
+        return {}
+    local_ids = list(boundary)
+    global_ids = list(previous)
+    rows, cols = hungarian_match(np.array([boundary[i] for i in local_ids]),
+                                 np.array([previous[i] for i in global_ids]), max_distance)
+    return {local_ids[row]: global_ids[col] for row, col in zip(rows, cols)}
+
+def stitch(results, fps, cooldown, max_distance=ANALYZE_STITCH_DISTANCE):
+    """Merge segment results in video order
+    
+    Returns (crossings, track count) where crossings are (frame, global
+    object ID, zone, direction) after applying the cooldown in video time.
+    """
+    next_id = 0
+    previous = {}  # Global ID -> position on the previous segment's last frame
+    crossings = []
+    for result in sorted(results, key=lambda r: r['start']):
+        mapping = match_tracks(result['boundary'], previous, max_distance)
+        
+        def global_id(local_id):
+            nonlocal next_id
+            if local_id not in mapping:
+                mapping[local_id] = next_id
+                next_id += 1
+            return mapping[local_id]
+        
+        for object_id in sorted(result['seen']):
+            global_id(object_id)
+        crossings.extend((frame, global_id(object_id), zone, direction)
+                         for frame, object_id, zone, direction in result['crossings'])
+        previous = {global_id(object_id): position
+                    for object_id, position in result['final'].items()}
+    
+    # Same rule as IntrusionDetector, keyed by (object, zone), on video time
+    last_event_time = {}
+    kept = []
+    for frame, object_id, zone, direction in crossings:
+        video_time = frame / fps
+        last_time = last_event_time.get((object_id, zone))
+        if last_time is not None and video_time - last_time < cooldown:
+            continue
+        last_event_time[(object_id, zone)] = video_time
+        kept.append((frame, object_id, zone, direction))
+    return kept, next_id
+
+def analyze_video(path, camera=None, workers=None, segment_seconds=ANALYZE_SEGMENT_SECONDS,
+                  overlap_seconds=ANALYZE_OVERLAP_SECONDS, verbose=True):
+    """Analyze a video file in parallel
+    
+    Returns (crossings, stats); crossings are (frame, object ID, zone,
+    direction) in video order.
+    """
+    camera = camera or {}
+    frame_count, fps = probe_video(path)
+    segments = plan_segments(frame_count, fps, segment_seconds, overlap_seconds)
+    
+    started = time.perf_counter()
+    results = []
+    if not segments:
+        # No frame count (0 or unknown for some containers): the file cannot
+        # be split, so it is read to the end as one segment in this process
+        if verbose:
+            print("[WARNING] Unknown frame count; analyzing sequentially")
+        workers = 1
+        segments = [(0, 0, sys.maxsize)]
+        results.append(analyze_segment(path, camera, *segments[0]))
+    else:
+        workers = min(workers or os.cpu_count() or 1, len(segments))
+        # Spawn, as in supervisor.py, so workers start from a clean interpreter
+        with ProcessPoolExecutor(workers, mp_context=mp.get_context('spawn'),
+                                 initializer=init_worker) as pool:
+            futures = [pool.submit(analyze_segment, path, camera, *segment) for segment in segments]
+            for done, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                results.append(result)
+                if verbose:
+                    print(f"[OK] Segment {done}/{len(segments)} done "
+                          f"(from {result['start'] / fps:.1f}s, {result['frames']} frames)")
+    elapsed = time.perf_counter() - started
+    
+    crossings, tracks = stitch(results, fps, camera.get('event_cooldown', EVENT_COOLDOWN))
+    frames = sum(result['frames'] for result in results)
+    stats = {
+        'frames': frames,
+        'fps': fps,
+        'segments': len(segments),
+        'workers': workers,
+        'seconds': elapsed,
+        'frames_per_second': frames / elapsed if elapsed else 0.0,
+        'tracks': tracks
+    }
+    return crossings, stats
+
+def recording_start(path, start_time, duration):
+    """Unix time at which the recording started"""
+    if start_time is not None:
+        start = parse_timestamp(start_time)
+        if start is None:
+            raise ValueError(f"Invalid start time: {start_time}")
+        return start
+    return os.path.getmtime(path) - duration
+
+def make_events(crossings, fps, start, camera_id):
+    """Intrusion events stamped with their time in the recording"""
+    origin = datetime.fromtimestamp(start, timezone.utc).replace(tzinfo=None)
+    events = []
+    for frame, object_id, zone, direction in crossings:
+        video_time = frame / fps
+        event = {
+            "timestamp": (origin + timedelta(seconds=video_time)).isoformat() + "Z",
+            "event_type": "intrusion_detected",
+            "value": 1,
+            "video_time": round(video_time, 3),
+            "frame": frame,
+            "object_id": object_id,
+            "zone": zone,
+            "direction": direction
+        }
+        if camera_id is not None:
+            event["camera_id"] = camera_id
+        events.append(event)
+    return events
+
+def main():
+    """Offline analysis entry point"""
+    parser = argparse.ArgumentParser(description="Analyze a recorded video file offline")
+    parser.add_argument('video')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='worker processes (default: one per CPU)')
+    parser.add_argument('--segment-seconds', type=float, default=ANALYZE_SEGMENT_SECONDS)
+    parser.add_argument('--overlap-seconds', type=float, default=ANALYZE_OVERLAP_SECONDS)
+    parser.add_argument('--camera-id', default=None,
+                        help='use this camera from CAMERAS (perimeter and thresholds)')
+    parser.add_argument('--start-time', default=None,
+                        help='wall-clock time of the first frame (ISO 8601)')
+    parser.add_argument('--output', default=None, help='write events as NDJSON')
+    parser.add_argument('--db', default=None, help='also store events in this database')
+    args = parser.parse_args()
+    
+    camera = next((c for c in CAMERAS if c['camera_id'] == args.camera_id), None)
+    if camera is None:
+        camera = {} if args.camera_id is None else {'camera_id': args.camera_id}
+    
+    print("\n" + "="*60)
+    print("OFFLINE VIDEO ANALYSIS")
+    print("="*60)
+    print(f"Video: {args.video}")
+    print("="*60 + "\n")
+    
+    crossings, stats = analyze_video(args.video, camera, args.workers, args.segment_seconds,
+                                     args.overlap_seconds)
+    fps = stats['fps']
+    start = recording_start(args.video, args.start_time, stats['frames'] / fps)
+    events = make_events(crossings, fps, start, args.camera_id)
+    
+    for event in events:
+        print(f"[ALERT] {event['timestamp']} (video {event['video_time']:.2f}s) "
+              f"Object #{event['object_id']} crossed the perimeter! "
+              f"({event['zone']}, {event['direction']})")
+    if args.output:
+        with open(args.output, 'w') as f:
+            for event in events:
+                f.write(json.dumps(event) + '\n')
+        print(f"[OK] {len(events)} event(s) written to {args.output}")
+    if args.db:
+        from storage.database import Database
+        db = Database(args.db)
+        db.insert_events(events)
+        db.close()
+        print(f"[OK] {len(events)} event(s) stored in {args.db}")
+    
+    print(f"\nFrames: {stats['frames']} in {stats['seconds']:.1f}s "
+          f"({stats['frames_per_second']:.0f} FPS, {stats['frames_per_second'] / fps:.1f}x "
+          f"real time) with {stats['workers']} worker(s) over {stats['segments']} segment(s)")
+    print(f"Tracks: {stats['tracks']}, intrusions: {len(events)}")
+    print("[OK] Analysis finished\n")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,8 +1,34 @@
-from flask import Flask, request, jsonify
-from storage.database import Database
+import json
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context
+from backend.schema import (MEDIA_TYPES, is_valid_event, parse_number, parse_time, event_to_dict,
+                            bucket_to_dict, media_to_dict)
+from storage.database import Database, EventWriter, decode_cursor
+from storage.media_store import MediaStore
+from storage.retention import EventRetention
+from storage.rollups import GRANULARITIES
+from utils.preview import preview_buffer
+from utils.profiler import metrics_registry
+from config.runtime import RUNTIME_DEFAULTS, read_overrides, update_overrides
+from config.settings import API_MAX_BATCH_SIZE, API_MAX_PAGE_SIZE
 
 app = Flask(__name__)
-db = Database()
+media_store = MediaStore()
+
+# Opened by init_storage(), not on import: processes that only import this
+# module (spawned capture processes and workers) must not open the database
+db = None
+writer = None  # Groups inserts from all requests into batched transactions
+retention = None  # Archives aged-out events when a limit is set
+
+def init_storage(db_path=None):
+    """Open the database and start the event writer (and retention, if a limit is set)"""
+    global db, writer, retention
+    db = Database(db_path) if db_path else Database()
+    writer = EventWriter(db).start()
+    retention = EventRetention(db)
+    if retention.enabled:
+        retention.start()
+    return app
 
 @app.route('/api/events', methods=['POST'])
 def receive_event():
@@ -11,41 +37,179 @@ def receive_event():
         event = request.get_json()
         
         # Validate event structure
-        required_fields = ['timestamp', 'event_type', 'value']
-        if not all(field in event for field in required_fields):
-            return jsonify({'error': 'Missing required fields'}), 400
+        if not is_valid_event(event):
+            return jsonify({'error': 'Missing or invalid fields'}), 400
         
-        # Store event in database
-        db.insert_event(event)
+        # Queue event for the next database write
+        if not writer.submit([event]):
+            return jsonify({'error': 'Event queue is full, retry later'}), 503
         
         return jsonify({'status': 'success', 'message': 'Event received'}), 200
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/events/batch', methods=['POST'])
+def receive_events_batch():
+    """Receive and store an array of detection events
+    
+    Valid events are stored; the indices of invalid ones are returned in
+    'rejected'.
+    """
+    try:
+        events = request.get_json()
+        if not isinstance(events, list):
+            return jsonify({'error': 'Expected an array of events'}), 400
+        if len(events) > API_MAX_BATCH_SIZE:
+            return jsonify({'error': f'At most {API_MAX_BATCH_SIZE} events per batch'}), 413
+        
+        valid = [event for event in events if is_valid_event(event)]
+        rejected = [index for index, event in enumerate(events) if not is_valid_event(event)]
+        if not writer.submit(valid):
+            return jsonify({'error': 'Event queue is full, retry later'}), 503
+        
+        return jsonify({'status': 'success', 'accepted': len(valid), 'rejected': rejected}), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/events', methods=['GET'])
 def get_events():
-    """Retrieve recent events"""
+    """Retrieve events, newest first
+    
+    Query parameters: start / end (Unix seconds or ISO 8601), event_type,
+    camera_id, min_value, limit and cursor (from the previous page's
+    next_cursor). format=ndjson streams every matching event (up to limit,
+    if given) as one JSON object per line.
+    """
+    try:
+        filters = {
+            'start': parse_time(request.args.get('start')),
+            'end': parse_time(request.args.get('end')),
+            'event_type': request.args.get('event_type'),
+            'camera_id': request.args.get('camera_id'),
+            'min_value': parse_number('min_value', request.args.get('min_value')),
+        }
+        cursor = request.args.get('cursor')
+        if cursor is not None:
+            decode_cursor(cursor)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        if request.args.get('format') == 'ndjson':
+            limit = request.args.get('limit', type=int)
+            rows = db.iter_events(limit=limit, cursor=cursor, **filters)
+            lines = (json.dumps(event_to_dict(e)) + '\n' for e in rows)
+            return Response(stream_with_context(lines), mimetype='application/x-ndjson')
+        
+        limit = min(max(request.args.get('limit', 10, type=int), 1), API_MAX_PAGE_SIZE)
+        events, next_cursor = db.query_events(cursor=cursor, limit=limit, **filters)
+        
+        events_list = [event_to_dict(e) for e in events]
+        
+        return jsonify({'events': events_list, 'next_cursor': next_cursor}), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/events/stats', methods=['GET'])
+def get_event_stats():
+    """Bucketed event counts and value sums per camera and event type
+    
+    Query parameters: granularity (minute, hour or day; default hour),
+    start / end (Unix seconds or ISO 8601), camera_id, event_type and limit
+    (newest buckets returned, in ascending order). Answered from the
+    rollup tables, so the cost does not grow with the number of events.
+    """
+    try:
+        granularity = request.args.get('granularity', 'hour')
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {granularity}")
+        start = parse_time(request.args.get('start'))
+        end = parse_time(request.args.get('end'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        limit = min(max(request.args.get('limit', 1000, type=int), 1), API_MAX_PAGE_SIZE)
+        rows = db.get_stats(granularity, start, end, request.args.get('camera_id'),
+                            request.args.get('event_type'), limit)
+        
+        buckets = [bucket_to_dict(row) for row in rows]
+        
+        return jsonify({'granularity': granularity, 'buckets': buckets}), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/media/<media_uid>', methods=['GET'])
+def get_media(media_uid):
+    """List the snapshot and clip stored for an event's media_uid"""
     try:
-        limit = request.args.get('limit', 10, type=int)
-        events = db.get_recent_events(limit)
+        rows = db.get_media(media_uid)
+        if not rows:
+            return jsonify({'error': 'No media for this event'}), 404
         
-        events_list = [
-            {
-                'id': e[0],
-                'timestamp': e[1],
-                'event_type': e[2],
-                'value': e[3]
-            }
-            for e in events
-        ]
+        return jsonify({'media_uid': media_uid, 'media': [media_to_dict(row) for row in rows]}), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/media/<media_uid>/<kind>', methods=['GET'])
+def get_media_file(media_uid, kind):
+    """Serve an event's snapshot (JPEG) or clip (MJPEG AVI)"""
+    try:
+        path = next((row[4] for row in db.get_media(media_uid) if row[2] == kind), None)
+        if path is None or kind not in MEDIA_TYPES:
+            return jsonify({'error': f'No {kind} for this event'}), 404
         
-        return jsonify({'events': events_list}), 200
+        return send_file(media_store.absolute_path(path), mimetype=MEDIA_TYPES[kind])
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/config', methods=['GET'])
+def get_config():
+    """Runtime setting overrides of every camera ("default" applies to all)"""
+    try:
+        return jsonify({'settings': list(RUNTIME_DEFAULTS), 'overrides': read_overrides()}), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/config/<camera_id>', methods=['PUT'])
+def put_config(camera_id):
+    """Change runtime settings of a camera; running pipelines apply them within a second
+    
+    The body maps setting names to values; null removes an override.
+    """
+    changes = request.get_json(silent=True)  # None for a malformed body or another content type
+    if not isinstance(changes, dict):
+        return jsonify({'error': 'Expected a JSON object of settings'}), 400
+    
+    try:
+        overrides = update_overrides(camera_id, changes)
+        return jsonify({'camera_id': camera_id, 'overrides': overrides}), 200
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/preview.mjpg', methods=['GET'])
+def preview_stream():
+    """Stream headless preview frames as MJPEG"""
+    return Response(preview_buffer.stream(), mimetype='multipart/x-mixed-replace; boundary=frame')
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Per-stage pipeline latencies of every camera in Prometheus text format"""
+    return Response(metrics_registry.render(),
+                    content_type='text/plain; version=0.0.4; charset=utf-8')
+
 def run_api():
-    """Start Flask API server"""
+    """Open the event storage and start the Flask API server"""
+    init_storage()
     print("Starting Flask API on http://localhost:5000")
     app.run(host='0.0.0.0', port=5000, debug=False, use_reloader=False)
\ No newline at end of file
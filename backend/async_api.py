@@ -0,0 +1,357 @@
+"""Asyncio API server (aiohttp), run as its own process
+
+Serves the same event routes as backend/api.py on a single event loop,
+plus /api/events/stream: a server-sent-events feed that pushes every
+accepted event to all connected subscribers as it arrives, so dashboards
+do not have to poll. Start it with:
+    python -m backend.async_api [--host 0.0.0.0] [--port 5000] [--db data/events.db]
+
+and set API_SERVER = "async" so main.py and supervisor.py do not start the
+threaded Flask API themselves. The MJPEG preview is rendered inside the
+detection process, so /api/preview.mjpg is only served by the Flask API.
+/metrics has the same format as the Flask API's, but this process runs
+no pipelines, so it lists only the stages profiled in this process.
+
+SQLite calls block, so queries run in worker threads through the
+connection pool; inserts only hand events to the EventWriter.
+"""
+import argparse
+import asyncio
+import json
+from itertools import islice
+from aiohttp import web
+from backend.schema import (MEDIA_TYPES, is_valid_event, parse_number, parse_time, event_to_dict,
+                            bucket_to_dict, media_to_dict)
+from storage.database import Database, EventWriter, decode_cursor
+from storage.media_store import MediaStore
+from storage.retention import EventRetention
+from storage.rollups import GRANULARITIES
+from utils.profiler import metrics_registry
+from config.runtime import RUNTIME_DEFAULTS, read_overrides, update_overrides
+from config.settings import (API_MAX_BATCH_SIZE, API_MAX_PAGE_SIZE, DB_QUERY_PAGE_SIZE,
+                             STREAM_QUEUE_SIZE, STREAM_KEEPALIVE)
+
+class EventBroadcaster:
+    """Fans accepted events out to /api/events/stream subscribers
+    
+    Each subscriber has its own bounded queue and optional event_type /
+    camera_id filter. Publishing never waits: a subscriber whose queue is
+    full misses the event (counted in 'dropped'), so one slow client cannot
+    hold back the others or the ingest path. Each event is encoded once,
+    however many subscribers receive it.
+    """
+    
+    def __init__(self, queue_size=STREAM_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.subscribers = {}
+        self.published = 0
+        self.dropped = 0
+    
+    def subscribe(self, event_type=None, camera_id=None):
+        """Register a subscriber and return its queue"""
+        queue = asyncio.Queue(self.queue_size)
+        self.subscribers[queue] = (event_type, camera_id)
+        return queue
+    
+    def unsubscribe(self, queue):
+        """Remove a subscriber"""
+        self.subscribers.pop(queue, None)
+    
+    def publish(self, events):
+        """Queue events for every subscriber whose filter matches"""
+        for event in events:
+            message = f"data: {json.dumps(event)}\n\n".encode()
+            self.published += 1
+            for queue, (event_type, camera_id) in self.subscribers.items():
+                if event_type is not None and event.get('event_type') != event_type:
+                    continue
+                if camera_id is not None and event.get('camera_id') != camera_id:
+                    continue
+                try:
+                    queue.put_nowait(message)
+                except asyncio.QueueFull:
+                    self.dropped += 1
+    
+    def close(self):
+        """End every open stream"""
+        for queue in list(self.subscribers):
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(None)
+    
+    def get_stats(self):
+        """Return subscriber and delivery counters"""
+        return {
+            'subscribers': len(self.subscribers),
+            'published': self.published,
+            'dropped': self.dropped
+        }
+
+DATABASE = web.AppKey('database', Database)
+WRITER = web.AppKey('writer', EventWriter)
+BROADCASTER = web.AppKey('broadcaster', EventBroadcaster)
+MEDIA_STORE = web.AppKey('media_store', MediaStore)
+RETENTION = web.AppKey('retention', EventRetention)
+
+def get_arg(query, name, default=None, type=None):
+    """Read a query parameter like Flask's request.args.get (default if missing or invalid)"""
+    value = query.get(name)
+    if value is None or type is None:
+        return default if value is None else value
+    try:
+        return type(value)
+    except ValueError:
+        return default
+
+async def receive_event(request):
+    """Receive and store detection events"""
+    try:
+        event = await request.json()
+        
+        # Validate event structure
+        if not is_valid_event(event):
+            return web.json_response({'error': 'Missing or invalid fields'}, status=400)
+        
+        # Queue event for the next database write and push it to live streams
+        if not request.app[WRITER].submit([event]):
+            return web.json_response({'error': 'Event queue is full, retry later'}, status=503)
+        request.app[BROADCASTER].publish([event])
+        
+        return web.json_response({'status': 'success', 'message': 'Event received'})
+    
+    except Exception as e:
+        return web.json_response({'error': str(e)}, status=500)
+
+async def receive_events_batch(request):
+    """Receive and store an array of detection events
+    
+    Valid events are stored; the indices of invalid ones are returned in
+    'rejected'.
+    """
+    try:
+        events = await request.json()
+        if not isinstance(events, list):
+            return web.json_response({'error': 'Expected an array of events'}, status=400)
+        if len(events) > API_MAX_BATCH_SIZE:
+            return web.json_response({'error': f'At most {API_MAX_BATCH_SIZE} events per batch'},
+                                     status=413)
+        
+        valid = [event for event in events if is_valid_event(event)]
+        rejected = [index for index, event in enumerate(events) if not is_valid_event(event)]
+        if not request.app[WRITER].submit(valid):
+            return web.json_response({'error': 'Event queue is full, retry later'}, status=503)
+        request.app[BROADCASTER].publish(valid)
+        
+        return web.json_response({'status': 'success', 'accepted': len(valid),
+                                  'rejected': rejected})
+    
+    except Exception as e:
+        return web.json_response({'error': str(e)}, status=500)
+
+async def get_events(request):
+    """Retrieve events, newest first (same parameters as the Flask API)"""
+    query = request.query
+    db = request.app[DATABASE]
+    try:
+        filters = {
+            'start': parse_time(query.get('start')),
+            'end': parse_time(query.get('end')),
+            'event_type': query.get('event_type'),
+            'camera_id': query.get('camera_id'),
+            'min_value': parse_number('min_value', query.get('min_value')),
+        }
+        cursor = query.get('cursor')
+        if cursor is not None:
+            decode_cursor(cursor)
+    except ValueError as e:
+        return web.json_response({'error': str(e)}, status=400)
+    
+    try:
+        if query.get('format') == 'ndjson':
+            limit = get_arg(query, 'limit', type=int)
+            rows = db.iter_events(limit=limit, cursor=cursor, **filters)
+            response = web.StreamResponse(headers={'Content-Type': 'application/x-ndjson'})
+            await response.prepare(request)
+            while True:
+                # One page per worker thread call, written before the next is read
+                page = await asyncio.to_thread(list, islice(rows, DB_QUERY_PAGE_SIZE))
+                if not page:
+                    break
+                await response.write(''.join(json.dumps(event_to_dict(e)) + '\n'
+                                             for e in page).encode())
+            await response.write_eof()
+            return response
+        
+        limit = min(max(get_arg(query, 'limit', 10, type=int), 1), API_MAX_PAGE_SIZE)
+        events, next_cursor = await asyncio.to_thread(db.query_events, cursor=cursor,
+                                                      limit=limit, **filters)
+        
+        events_list = [event_to_dict(e) for e in events]
+        
+        return web.json_response({'events': events_list, 'next_cursor': next_cursor})
+    
+    except Exception as e:
+        return web.json_response({'error': str(e)}, status=500)
+
+async def get_event_stats(request):
+    """Bucketed event counts and value sums (same parameters as the Flask API)"""
+    query = request.query
+    try:
+        granularity = query.get('granularity', 'hour')
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {granularity}")
+        start = parse_time(query.get('start'))
+        end = parse_time(query.get('end'))
+    except ValueError as e:
+        return web.json_response({'error': str(e)}, status=400)
+    
+    try:
+        limit = min(max(get_arg(query, 'limit', 1000, type=int), 1), API_MAX_PAGE_SIZE)
+        rows = await asyncio.to_thread(request.app[DATABASE].get_stats, granularity, start, end,
+                                       query.get('camera_id'), query.get('event_type'), limit)
+        
+        buckets = [bucket_to_dict(row) for row in rows]
+        
+        return web.json_response({'granularity': granularity, 'buckets': buckets})
+    
+    except Exception as e:
+        return web.json_response({'error': str(e)}, status=500)
+
+async def stream_events(request):
+    """Push newly received events as server-sent events
+    
+    Optional event_type and camera_id query parameters filter the stream.
+    Each event is sent as one "data:" line holding the event JSON as it was
+    posted. A comment line is sent every STREAM_KEEPALIVE seconds while
+    idle, which also detects disconnected clients.
+    """
+    broadcaster = request.app[BROADCASTER]
+    response = web.StreamResponse(headers={
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache'
+    })
+    await response.prepare(request)
+    queue = broadcaster.subscribe(request.query.get('event_type'),
+                                  request.query.get('camera_id'))
+    try:
+        await response.write(b': connected\n\n')
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), STREAM_KEEPALIVE)
+            except asyncio.TimeoutError:
+                await response.write(b': keep-alive\n\n')
+                continue
+            if message is None:
+                break
+            await response.write(message)
+    except ConnectionResetError:
+        pass
+    finally:
+        broadcaster.unsubscribe(queue)
+    return response
+
+async def get_media(request):
+    """List the snapshot and clip stored for an event's media_uid"""
+    media_uid = request.match_info['media_uid']
+    try:
+        rows = await asyncio.to_thread(request.app[DATABASE].get_media, media_uid)
+        if not rows:
+            return web.json_response({'error': 'No media for this event'}, status=404)
+        
+        return web.json_response({'media_uid': media_uid,
+                                  'media': [media_to_dict(row) for row in rows]})
+    
+    except Exception as e:
+        return web.json_response({'error': str(e)}, status=500)
+
+async def get_media_file(request):
+    """Serve an event's snapshot (JPEG) or clip (MJPEG AVI)"""
+    media_uid = request.match_info['media_uid']
+    kind = request.match_info['kind']
+    try:
+        rows = await asyncio.to_thread(request.app[DATABASE].get_media, media_uid)
+        path = next((row[4] for row in rows if row[2] == kind), None)
+        if path is None or kind not in MEDIA_TYPES:
+            return web.json_response({'error': f'No {kind} for this event'}, status=404)
+        
+        return web.FileResponse(request.app[MEDIA_STORE].absolute_path(path),
+                                headers={'Content-Type': MEDIA_TYPES[kind]})
+    
+    except Exception as e:
+        return web.json_response({'error': str(e)}, status=500)
+
+async def get_config(request):
+    """Runtime setting overrides of every camera ("default" applies to all)"""
+    try:
+        overrides = await asyncio.to_thread(read_overrides)
+        return web.json_response({'settings': list(RUNTIME_DEFAULTS), 'overrides': overrides})
+    
+    except Exception as e:
+        return web.json_response({'error': str(e)}, status=500)
+
+async def put_config(request):
+    """Change runtime settings of a camera; running pipelines apply them within a second"""
+    camera_id = request.match_info['camera_id']
+    try:
+        changes = await request.json()
+        overrides = await asyncio.to_thread(update_overrides, camera_id, changes)
+        return web.json_response({'camera_id': camera_id, 'overrides': overrides})
+    
+    except ValueError as e:
+        return web.json_response({'error': str(e)}, status=400)
+    except Exception as e:
+        return web.json_response({'error': str(e)}, status=500)
+
+async def metrics(request):
+    """Per-stage pipeline latencies in Prometheus text format"""
+    return web.Response(body=metrics_registry.render().encode('utf-8'),
+                        headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'})
+
+async def close_streams(app):
+    """End open event streams so shutdown does not wait for them"""
+    app[BROADCASTER].close()
+
+async def close_storage(app):
+    """Stop retention, write pending events and close the database"""
+    app[RETENTION].stop()
+    app[WRITER].stop()
+    app[DATABASE].close()
+
+def create_app(db_path=None):
+    """Build the aiohttp application backed by its own database and writer"""
+    db = Database(db_path) if db_path else Database()
+    app = web.Application()
+    app[DATABASE] = db
+    app[WRITER] = EventWriter(db).start()
+    app[BROADCASTER] = EventBroadcaster()
+    app[MEDIA_STORE] = MediaStore()
+    app[RETENTION] = EventRetention(db)
+    if app[RETENTION].enabled:
+        app[RETENTION].start()
+    app.router.add_post('/api/events', receive_event)
+    app.router.add_post('/api/events/batch', receive_events_batch)
+    app.router.add_get('/api/events', get_events)
+    app.router.add_get('/api/events/stats', get_event_stats)
+    app.router.add_get('/api/events/stream', stream_events)
+    app.router.add_get('/api/media/{media_uid}', get_media)
+    app.router.add_get('/api/media/{media_uid}/{kind}', get_media_file)
+    app.router.add_get('/api/config', get_config)
+    app.router.add_put('/api/config/{camera_id}', put_config)
+    app.router.add_get('/metrics', metrics)
+    app.on_shutdown.append(close_streams)
+    app.on_cleanup.append(close_storage)
+    return app
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Run the asyncio event API")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--db', default=None, help='database path (default: DB_PATH)')
+    args = parser.parse_args()
+    
+    print(f"Starting async API on http://localhost:{args.port}")
+    web.run_app(create_app(args.db), host=args.host, port=args.port, print=None)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
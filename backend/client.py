@@ -0,0 +1,257 @@
+import json
+import os
+import queue
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from config.settings import (API_BATCH_URL, EVENT_QUEUE_SIZE, EVENT_BATCH_SIZE,
+                             EVENT_BATCH_INTERVAL, EVENT_MAX_RETRIES, EVENT_RETRY_DELAY, EVENT_REPLAY_INTERVAL,
+                             EVENT_SEND_TIMEOUT, EVENT_JOURNAL_PATH)
+
+class EventDispatcher:
+    """Sends events to the backend API from a background thread
+    
+    submit() only enqueues, so the frame loop never waits on the network.
+    The dispatcher thread posts events to the bulk endpoint in batches (by
+    size or time window) over a keep-alive session and retries failed
+    batches with exponential backoff. While the API is unreachable, batches are appended to an
+    NDJSON journal on disk and replayed once it answers again. Events are
+    dropped, and counted, only when the in-memory queue is full; events the
+    journal cannot take (full disk, read-only path) or give back (corrupt
+    lines) are counted as lost, and the thread keeps running.
+    """
+    
+    def __init__(self, url=API_BATCH_URL, queue_size=EVENT_QUEUE_SIZE, batch_size=EVENT_BATCH_SIZE,
+                 batch_interval=EVENT_BATCH_INTERVAL, max_retries=EVENT_MAX_RETRIES,
+                 retry_delay=EVENT_RETRY_DELAY, replay_interval=EVENT_REPLAY_INTERVAL,
+                 timeout=EVENT_SEND_TIMEOUT, journal_path=EVENT_JOURNAL_PATH):
+        self.url = url
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.batch_size = max(1, batch_size)
+        self.batch_interval = batch_interval
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.replay_interval = replay_interval
+        self.timeout = timeout
+        self.journal_path = journal_path
+        
+        # One pooled keep-alive connection, reused for every request
+        self.session = requests.Session()
+        self.session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.retry_at = 0.0  # While the API is down, journal batches until this time
+        
+        # Counters (written by the dispatcher thread, except dropped)
+        self.sent = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.journaled = 0
+        self.replayed = 0
+        self.lost = 0  # Events the journal could not store or read back
+        self.retries = 0
+        self.max_queue_depth = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.latency_count = 0
+    
+    def start(self):
+        """Start the dispatcher thread"""
+        self.thread = threading.Thread(target=self.run, name="event-dispatcher", daemon=True)
+        self.thread.start()
+        return self
+    
+    def submit(self, event):
+        """Queue an event for sending; never blocks"""
+        try:
+            self.queue.put_nowait((time.monotonic(), event))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+        return True
+    
+    def stop(self, timeout=5.0):
+        """Flush queued events (to the API or the journal) and stop the thread"""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+        self.session.close()
+    
+    def next_batch(self):
+        """Collect up to batch_size events, waiting at most batch_interval after the first"""
+        try:
+            batch = [self.queue.get(timeout=self.batch_interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.batch_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self.queue.get(timeout=remaining) if remaining > 0
+                             else self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+    
+    def run(self):
+        """Dispatcher thread: send batches until stopped, then flush the queue"""
+        while not self.stop_event.is_set():
+            batch = self.next_batch()
+            if batch:
+                self.dispatch(batch)
+            elif time.monotonic() >= self.retry_at and os.path.exists(self.journal_path):
+                self.replay_journal()
+        
+        # Final flush: no retries, whatever fails goes to the journal
+        self.max_retries = 0
+        while not self.queue.empty():
+            batch = []
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            self.dispatch(batch)
+    
+    def dispatch(self, batch):
+        """Send a batch of (enqueue time, event) pairs, journaling what cannot be sent"""
+        events = [event for _, event in batch]
+        done = 0 if time.monotonic() < self.retry_at else self.send_with_retries(events)
+        if done < len(events):
+            self.append_journal(events[done:])
+        if done == 0:
+            return
+        
+        now = time.monotonic()
+        for queued_at, _ in batch[:done]:
+            latency = now - queued_at
+            self.latency_total += latency
+            self.latency_max = max(self.latency_max, latency)
+        self.latency_count += done
+        print(f"[OK] Sent {done} event(s)")
+        
+        # The API is reachable again: send anything journaled while it was down
+        if done == len(events) and os.path.exists(self.journal_path):
+            self.replay_journal()
+    
+    def send_with_retries(self, events):
+        """Send a batch, retrying failures with exponential backoff
+        
+        Returns how many events were delivered: all of them, or none if the
+        API stayed unreachable.
+        """
+        delay = self.retry_delay
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.retries += 1
+                self.stop_event.wait(delay)
+                delay *= 2
+            try:
+                self.send(events)
+                self.retry_at = 0.0
+                return len(events)
+            except requests.exceptions.RequestException as e:
+                error = e
+        
+        print(f"[WARNING] API connection error: {error}")
+        self.retry_at = time.monotonic() + self.replay_interval
+        return 0
+    
+    def send(self, events):
+        """Post a batch to the bulk endpoint; raises on connection or server errors
+        
+        Events the API rejects as invalid are counted and not retried.
+        """
+        response = self.session.post(self.url, json=events, timeout=self.timeout)
+        if response.status_code >= 500:
+            raise requests.exceptions.HTTPError(f"Server error {response.status_code}")
+        if response.status_code != 200:
+            print(f"[ERROR] Failed to send {len(events)} event(s): {response.status_code}")
+            self.rejected += len(events)
+            return
+        
+        rejected = len(response.json().get('rejected', []))
+        if rejected:
+            print(f"[ERROR] API rejected {rejected} invalid event(s)")
+        self.rejected += rejected
+        self.sent += len(events) - rejected
+    
+    def append_journal(self, events):
+        """Append events to the on-disk journal, one JSON object per line"""
+        try:
+            with open(self.journal_path, 'a') as f:
+                for event in events:
+                    f.write(json.dumps(event) + '\n')
+        except (OSError, ValueError) as e:
+            self.lost += len(events)
+            print(f"[ERROR] Could not journal {len(events)} event(s), they are lost: {e}")
+            return
+        self.journaled += len(events)
+        print(f"[WARNING] API unreachable, journaled {len(events)} event(s)")
+    
+    def read_journal(self):
+        """Journaled events; corrupt lines (e.g. cut off by a crash) are skipped as lost"""
+        events = []
+        with open(self.journal_path, errors='replace') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    self.lost += 1
+                    print(f"[ERROR] Skipping corrupt journal line: {line.strip()[:80]!r}")
+        return events
+    
+    def replay_journal(self):
+        """Send journaled events; whatever cannot be sent stays in the journal
+        
+        If the journal cannot be read or rewritten, the error is logged and
+        the replay is tried again after replay_interval.
+        """
+        try:
+            self.replay_events(self.read_journal())
+        except OSError as e:
+            print(f"[ERROR] Could not replay the event journal: {e}")
+            self.retry_at = time.monotonic() + self.replay_interval
+    
+    def replay_events(self, events):
+        """Send events read from the journal and remove or rewrite it"""
+        sent = 0
+        while sent < len(events):
+            chunk = events[sent:sent + self.batch_size]
+            done = self.send_with_retries(chunk)
+            sent += done
+            if done < len(chunk):
+                break
+        self.replayed += sent
+        
+        if sent == len(events):
+            os.remove(self.journal_path)
+            print(f"[OK] Replayed {sent} journaled event(s)")
+            return
+        
+        # Rewrite the remainder; write then rename so a crash never loses the journal
+        tmp_path = self.journal_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            for event in events[sent:]:
+                f.write(json.dumps(event) + '\n')
+        os.replace(tmp_path, self.journal_path)
+    
+    def get_stats(self):
+        """Return queue depth, delivery counters and enqueue-to-ack latency"""
+        return {
+            'queue_depth': self.queue.qsize(),
+            'max_queue_depth': self.max_queue_depth,
+            'sent': self.sent,
+            'dropped': self.dropped,
+            'rejected': self.rejected,
+            'journaled': self.journaled,
+            'replayed': self.replayed,
+            'lost': self.lost,
+            'retries': self.retries,
+            'mean_latency_ms': (1000.0 * self.latency_total / self.latency_count
+                                if self.latency_count else 0.0),
+            'max_latency_ms': 1000.0 * self.latency_max,
+        }
\ No newline at end of file
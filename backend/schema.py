@@ -0,0 +1,88 @@
+"""Event validation and JSON conversion shared by the API servers"""
+import math
+from datetime import datetime, timezone
+from storage.database import parse_timestamp
+
+REQUIRED_FIELDS = ['timestamp', 'event_type', 'value']
+CROSSING_FIELDS = ['zone', 'direction']  # Optional on intrusion events; string or null
+MEDIA_TYPES = {'snapshot': 'image/jpeg', 'clip': 'video/x-msvideo'}  # Media kind -> content type
+
+def is_valid_event(event):
+    """Check that an event has all required fields, with values the database can store
+    
+    timestamp and event_type must be non-empty strings and value a number,
+    so a malformed event is rejected with a 400 instead of failing the
+    write batch it would join. The timestamp must also parse as ISO 8601:
+    events are listed by their parsed time, so an event without one would
+    be stored but never returned.
+    """
+    if not isinstance(event, dict) or not all(field in event for field in REQUIRED_FIELDS):
+        return False
+    value = event['value']
+    return (all(isinstance(event[field], str) and event[field] for field in ('timestamp', 'event_type'))
+            and isinstance(value, (int, float)) and not isinstance(value, bool)
+            and parse_timestamp(event['timestamp']) is not None
+            and all(isinstance(event.get(field), (str, type(None))) for field in CROSSING_FIELDS))
+
+def parse_number(name, value):
+    """Parse a numeric query parameter; None if absent, ValueError if malformed"""
+    if value is None:
+        return None
+    try:
+        number = float(value)
+    except ValueError:
+        number = math.nan
+    if not math.isfinite(number):
+        raise ValueError(f"Invalid {name}: {value}")
+    return number
+
+def parse_time(value):
+    """Parse a time query parameter (Unix seconds or ISO 8601) into Unix seconds"""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        ts = parse_timestamp(value)
+        if ts is None:
+            raise ValueError(f"Invalid time: {value}")
+        return ts
+
+def event_to_dict(e):
+    """Convert an event row to its JSON representation"""
+    return {
+        'id': e[0],
+        'timestamp': e[1],
+        'event_type': e[2],
+        'value': e[3],
+        'camera_id': e[4],
+        'media_uid': e[5],
+        'zone': e[6],
+        'direction': e[7]
+    }
+
+def media_to_dict(row):
+    """Convert an event_media row to JSON, with the URL that serves the file"""
+    media_uid, camera_id, kind, sha256, path, size, frames, ts = row
+    return {
+        'media_uid': media_uid,
+        'camera_id': camera_id,
+        'kind': kind,
+        'sha256': sha256,
+        'bytes': size,
+        'frames': frames,
+        'created': datetime.fromtimestamp(ts, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'url': f"/api/media/{media_uid}/{kind}"
+    }
+
+def bucket_to_dict(row):
+    """Convert a (bucket, camera_id, event_type, count, value_sum) rollup row to JSON"""
+    bucket, camera_id, event_type, count, value_sum = row
+    return {
+        'bucket': datetime.fromtimestamp(bucket, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'bucket_ts': bucket,
+        'camera_id': camera_id,
+        'event_type': event_type,
+        'count': count,
+        'value_sum': value_sum
+    }
\ No newline at end of file
@@ -0,0 +1,79 @@
+"""Throughput of offline analysis by worker count, and stitching correctness
+
+Run from the repository root:
+    python -m benchmarks.analyze_benchmark [--loops 4] [--segment-seconds 10]
+        [--workers 1 2 4]
+
+The sample video is written --loops times back to back into one longer
+file in a temporary directory. analyze.py then processes it with each
+worker count; FPS is frames analyzed per wall-clock second (process start
+up included) and speedup is relative to one worker. Speedup cannot exceed
+the number of CPUs, which is printed with the table.
+
+The crossings and track count of each run are compared with a reference
+run over the whole file as a single segment, so any difference comes from
+splitting and stitching.
+"""
+import argparse
+import os
+import tempfile
+import cv2
+from analyze import analyze_video
+from benchmarks.common import DEFAULT_VIDEO, print_table
+
+def write_looped_video(source, path, loops):
+    """Write the source video `loops` times into one file; returns its frame count"""
+    cap = cv2.VideoCapture(source)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    frames = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+    for _ in range(loops):
+        for frame in frames:
+            writer.write(frame)
+    writer.release()
+    return len(frames) * loops
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--video', default=DEFAULT_VIDEO)
+    parser.add_argument('--loops', type=int, default=4)
+    parser.add_argument('--segment-seconds', type=float, default=10.0)
+    parser.add_argument('--overlap-seconds', type=float, default=2.0)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'looped.mp4')
+        frame_count = write_looped_video(args.video, path, args.loops)
+        print(f"[OK] {frame_count} frames written to a temporary clip")
+        
+        reference, reference_stats = analyze_video(path, workers=1, segment_seconds=1e9,
+                                                   verbose=False)
+        rows = [('sequential', 1, 1, reference_stats['frames_per_second'], '-', 'reference')]
+        baseline = None
+        for workers in args.workers:
+            crossings, stats = analyze_video(path, workers=workers,
+                                             segment_seconds=args.segment_seconds,
+                                             overlap_seconds=args.overlap_seconds, verbose=False)
+            baseline = baseline or stats['frames_per_second']
+            if crossings == reference and stats['tracks'] == reference_stats['tracks']:
+                check = 'match'
+            else:
+                check = (f"{len(crossings)}/{len(reference)} crossings, "
+                         f"{stats['tracks']}/{reference_stats['tracks']} tracks")
+            rows.append(('segmented', stats['segments'], stats['workers'],
+                         stats['frames_per_second'], stats['frames_per_second'] / baseline,
+                         check))
+    
+    print_table(f"Offline analysis of {frame_count} frames ({os.cpu_count()} CPU(s))", rows,
+                ['mode', 'segments', 'workers', 'FPS', 'speedup', 'vs sequential'])
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,226 @@
+"""Request latency and server CPU of the threaded Flask API versus the asyncio API
+
+Run from the repository root:
+    python -m benchmarks.api_benchmark [--seconds 5] [--clients 8] [--subscribers 1 10 50]
+
+Each server runs in its own process on a local port, backed by a fresh
+database in a temporary directory that is seeded with 5000 events.
+
+- request load: client threads alternate POST /api/events and
+  GET /api/events?limit=20 over keep-alive sessions for a fixed time.
+  Latency is measured per request; server CPU is the user + system time
+  of the server process (from /proc) divided by the requests served.
+- live alerts: subscribers wait for new events while 50 events are posted
+  one every 50 ms. The asyncio API pushes them over /api/events/stream;
+  the Flask API has no push, so its subscribers poll GET /api/events
+  every --poll-interval seconds. Latency runs from the POST to the moment
+  a subscriber sees the event.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import numpy as np
+import requests
+from benchmarks.common import print_table
+from utils.event import Event
+
+# Serves backend.api on its own database, as in the ingest benchmark
+FLASK_SERVER = '''
+import logging, sys
+from backend import api
+logging.getLogger('werkzeug').setLevel(logging.ERROR)
+api.init_storage(sys.argv[2])
+api.app.run(host='127.0.0.1', port=int(sys.argv[1]), threaded=True)
+'''
+
+ALERT_COUNT = 50
+ALERT_INTERVAL = 0.05
+
+def server_command(kind, port, db_path):
+    """Command line that starts one server"""
+    if kind == 'flask':
+        return [sys.executable, '-c', FLASK_SERVER, str(port), db_path]
+    return [sys.executable, '-m', 'backend.async_api', '--host', '127.0.0.1',
+            '--port', str(port), '--db', db_path]
+
+def start_server(kind, port, db_path):
+    """Start a server process and wait until it answers"""
+    base = f"http://127.0.0.1:{port}"
+    try:
+        requests.get(base, timeout=1)
+        raise RuntimeError(f"Port {port} is already in use")
+    except requests.ConnectionError:
+        pass
+    process = subprocess.Popen(server_command(kind, port, db_path),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 20
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{kind} server exited")
+        try:
+            requests.get(f"{base}/api/events?limit=1", timeout=1)
+            return process, base
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"{kind} server did not start")
+
+def cpu_seconds(pid):
+    """User + system CPU seconds used by a process so far"""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(')', 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+def seed(base, count=5000, batch=500):
+    """Store count events through the batch endpoint"""
+    events = [Event.create_intrusion_event(f"cam-{i % 8}") for i in range(batch)]
+    for _ in range(count // batch):
+        requests.post(f"{base}/api/events/batch", json=events, timeout=10).raise_for_status()
+
+def load_client(base, deadline, latencies, errors, index):
+    """Alternate event posts and event queries until the deadline"""
+    session = requests.Session()
+    event = Event.create_intrusion_event(f"cam-{index}")
+    post_url = f"{base}/api/events"
+    get_url = f"{base}/api/events?limit=20"
+    while time.monotonic() < deadline:
+        for method, url in (('post', post_url), ('get', get_url)):
+            start = time.perf_counter()
+            response = session.request(method, url, json=event if method == 'post' else None,
+                                        timeout=10)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+    session.close()
+
+def run_load(kind, port, directory, seconds, clients):
+    """Return (requests/sec, p50, p95, p99 ms, CPU ms per request)"""
+    process, base = start_server(kind, port, os.path.join(directory, f"{kind}-load.db"))
+    try:
+        seed(base)
+        latencies = []
+        errors = []
+        cpu_before = cpu_seconds(process.pid)
+        start = time.monotonic()
+        threads = [threading.Thread(target=load_client,
+                                    args=(base, start + seconds, latencies, errors, i))
+                   for i in range(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - start
+        cpu = cpu_seconds(process.pid) - cpu_before
+    finally:
+        process.terminate()
+        process.wait()
+    if errors:
+        raise AssertionError(f"{kind}: {len(errors)} failed requests")
+    p50, p95, p99 = 1000.0 * np.percentile(latencies, [50, 95, 99])
+    return len(latencies) / elapsed, p50, p95, p99, 1000.0 * cpu / len(latencies)
+
+def stream_subscriber(base, ready, received, stop):
+    """Record when each event arrives on the server-sent-events stream"""
+    response = requests.get(f"{base}/api/events/stream", stream=True, timeout=30)
+    ready.release()
+    for line in response.iter_lines():
+        if stop.is_set():
+            break
+        if line.startswith(b'data: '):
+            event = json.loads(line[6:])
+            received.append((event['value'], time.time()))
+            if len(received) >= ALERT_COUNT:
+                break
+    response.close()
+
+def polling_subscriber(base, ready, received, stop, interval):
+    """Poll for events newer than the last one seen"""
+    session = requests.Session()
+    latest = session.get(f"{base}/api/events?limit=1", timeout=10).json()['events']
+    newest = latest[0]['id'] if latest else 0
+    ready.release()
+    while not stop.is_set() and len(received) < ALERT_COUNT:
+        events = session.get(f"{base}/api/events?limit=100", timeout=10).json()['events']
+        now = time.time()
+        for event in reversed(events):
+            if event['id'] > newest:
+                received.append((event['value'], now))
+                newest = event['id']
+        stop.wait(interval)
+    session.close()
+
+def run_alerts(kind, port, directory, subscribers, poll_interval):
+    """Return (delivered %, p50 ms, p95 ms, server CPU seconds) for live alerts"""
+    process, base = start_server(kind, port, os.path.join(directory, f"{kind}-{subscribers}.db"))
+    try:
+        ready = threading.Semaphore(0)
+        stop = threading.Event()
+        inboxes = [[] for _ in range(subscribers)]
+        threads = []
+        for inbox in inboxes:
+            if kind == 'async':
+                target, args = stream_subscriber, (base, ready, inbox, stop)
+            else:
+                target, args = polling_subscriber, (base, ready, inbox, stop, poll_interval)
+            threads.append(threading.Thread(target=target, args=args, daemon=True))
+        for thread in threads:
+            thread.start()
+        for _ in threads:
+            ready.acquire()
+        time.sleep(0.2)
+        
+        cpu_before = cpu_seconds(process.pid)
+        session = requests.Session()
+        for _ in range(ALERT_COUNT):
+            # The send time travels in the event value
+            event = Event.create_intrusion_event("cam-0")
+            event['value'] = time.time()
+            session.post(f"{base}/api/events", json=event, timeout=10)
+            time.sleep(ALERT_INTERVAL)
+        for thread in threads:
+            thread.join(timeout=poll_interval + 5)
+        stop.set()
+        cpu = cpu_seconds(process.pid) - cpu_before
+    finally:
+        process.terminate()
+        process.wait()
+    
+    delays = [received - sent for inbox in inboxes for sent, received in inbox]
+    delivered = 100.0 * len(delays) / (ALERT_COUNT * subscribers)
+    p50, p95 = 1000.0 * np.percentile(delays, [50, 95]) if delays else (0.0, 0.0)
+    return delivered, p50, p95, cpu
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--subscribers', type=int, nargs='+', default=[1, 10, 50])
+    parser.add_argument('--poll-interval', type=float, default=0.5)
+    parser.add_argument('--port', type=int, default=5091)
+    args = parser.parse_args()
+    
+    load_rows = []
+    alert_rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for kind in ('flask', 'async'):
+            load_rows.append((kind,) + run_load(kind, args.port, directory, args.seconds,
+                                                args.clients))
+        for subscribers in args.subscribers:
+            for kind, mode in (('flask', f'poll {args.poll_interval:g} s'), ('async', 'SSE push')):
+                alert_rows.append((kind, mode, subscribers) +
+                                  run_alerts(kind, args.port, directory, subscribers,
+                                             args.poll_interval))
+    
+    print_table(f"Request load ({args.clients} clients, {args.seconds:.0f} s per server)",
+                load_rows, ['server', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms', 'CPU ms/req'])
+    print_table(f"Live alerts ({ALERT_COUNT} events, {1000 * ALERT_INTERVAL:.0f} ms apart)",
+                alert_rows, ['server', 'delivery', 'subscribers', 'delivered %', 'p50 ms',
+                             'p95 ms', 'server CPU s'])
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,71 @@
+"""Decode throughput of the VideoStream capture options
+
+Run from the repository root:
+    python -m benchmarks.capture_benchmark [--video data/Video1.mp4] [--frames 600] [--rounds 3]
+
+Each option set opens a fresh VideoStream on the video (looping it) and
+reads --frames frames with read_frame(). "source FPS" counts every frame
+of the video the stream advanced over, including frames grabbed without
+decoding to an image, and is the rate a live source could be consumed
+at; "delivered FPS" counts the frames returned. The best of --rounds is
+reported. CPU is the process time of that round, so decoder threads show
+up as CPU above wall time.
+
+Hardware acceleration falls back to software when no device is found;
+the stream prints a warning when that happens.
+"""
+import argparse
+import contextlib
+import os
+import time
+from benchmarks.common import DEFAULT_VIDEO, print_table
+from camera.video_stream import VideoStream
+
+OPTION_SETS = [
+    ('default', {}),
+    ('ffmpeg backend', {'backend': 'ffmpeg'}),
+    ('1 decode thread', {'decode_threads': 1}),
+    ('2 decode threads', {'decode_threads': 2}),
+    ('4 decode threads', {'decode_threads': 4}),
+    ('hw acceleration any', {'hw_acceleration': 'any'}),
+    ('640x360 output', {'resolution': (640, 360)}),
+    ('stride 2', {'frame_stride': 2}),
+    ('stride 5', {'frame_stride': 5}),
+    ('stride 5, 640x360', {'frame_stride': 5, 'resolution': (640, 360)}),
+]
+
+def run(video, options, frames):
+    """(wall seconds, CPU seconds, source frames, delivered frames) for one pass"""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        stream = VideoStream(video, **options)
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        delivered = 0
+        for _ in range(frames):
+            ret, _ = stream.read_frame()
+            if not ret:
+                break
+            delivered += 1
+        wall = time.perf_counter() - start
+        cpu = time.process_time() - cpu_start
+        stream.release()
+    return wall, cpu, delivered * stream.frame_stride, delivered
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--video', default=DEFAULT_VIDEO)
+    parser.add_argument('--frames', type=int, default=600, help='frames read per pass')
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+    
+    rows = []
+    for name, options in OPTION_SETS:
+        wall, cpu, source, delivered = min(run(args.video, options, args.frames)
+                                           for _ in range(args.rounds))
+        rows.append((name, source / wall, delivered / wall, 1000.0 * cpu / delivered))
+    print_table(f"Capture options on {args.video} ({args.frames} frames read, best of "
+                f"{args.rounds})", rows, ['options', 'source FPS', 'delivered FPS',
+                                          'CPU ms/delivered'])
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,114 @@
+"""Frame-loop latency while intrusion snapshots and clips are being written
+
+Run from the repository root:
+    python -m benchmarks.clip_recorder_benchmark [--frames 300] [--loops 2] [--fps 25]
+        [--trigger-every 100]
+
+Frames are decoded into memory first. The headless pipeline runs over them
+--loops times, paced to --fps (0 = as fast as possible), in four modes:
+
+- off: no evidence capture.
+- ring: every frame is copied into the ClipRecorder ring, no intrusions.
+- ring + writer: as ring, plus an intrusion every --trigger-every frames,
+  so the writer thread encodes a snapshot and pre/post-roll clip while the
+  loop keeps running.
+- synchronous: no ring; at each intrusion the loop itself encodes the
+  snapshot and the pre-roll frames it kept, which is what writing evidence
+  in the frame loop costs.
+
+Latency is the time per frame spent in the loop (ring copy, pipeline and
+trigger or synchronous write). Media and the database go to a temporary
+directory.
+"""
+import argparse
+import contextlib
+import os
+import tempfile
+import time
+import cv2
+import numpy as np
+from benchmarks.common import DEFAULT_VIDEO, load_frames, print_table
+from processing.pipeline import DetectionPipeline
+from storage.media_store import MediaStore
+from utils.clip_recorder import ClipRecorder
+from config.settings import MEDIA_PRE_ROLL_FRAMES, MEDIA_SCALE, MEDIA_JPEG_QUALITY
+
+def write_synchronously(store, kept):
+    """Encode a snapshot and a clip of the kept frames inside the frame loop"""
+    ok, jpeg = cv2.imencode('.jpg', kept[-1], [cv2.IMWRITE_JPEG_QUALITY, MEDIA_JPEG_QUALITY])
+    store.put(jpeg.tobytes(), 'jpg')
+    tmp_path = store.temp_path('avi')
+    h, w = kept[0].shape[:2]
+    writer = cv2.VideoWriter(tmp_path, cv2.VideoWriter_fourcc(*'MJPG'), 25, (w, h))
+    for frame in kept:
+        writer.write(frame)
+    writer.release()
+    store.put_file(tmp_path, 'avi')
+
+def run(mode, frames, loops, fps, trigger_every, directory):
+    """Per-frame loop latencies (seconds) and the recorder stats for one mode"""
+    pipeline = DetectionPipeline()
+    store = MediaStore(os.path.join(directory, 'media'))
+    recorder = None
+    if mode in ('ring', 'ring + writer'):
+        recorder = ClipRecorder(store=store, db_path=os.path.join(directory, 'events.db')).start()
+    kept = []  # Synchronous mode: scaled copies of recent frames
+    latencies = []
+    interval = 1.0 / fps if fps else 0.0
+    next_frame = time.perf_counter()
+    index = 0
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(loops):
+            for frame in frames:
+                start = time.perf_counter()
+                if recorder:
+                    recorder.add(frame)
+                elif mode == 'synchronous':
+                    kept.append(cv2.resize(frame, None, fx=MEDIA_SCALE, fy=MEDIA_SCALE))
+                    del kept[:-MEDIA_PRE_ROLL_FRAMES]
+                pipeline.process(frame)
+                index += 1
+                if index % trigger_every == 0:
+                    if mode == 'ring + writer':
+                        recorder.trigger()
+                    elif mode == 'synchronous':
+                        write_synchronously(store, kept)
+                latencies.append(time.perf_counter() - start)
+                
+                if interval:
+                    next_frame += interval
+                    delay = next_frame - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+        if recorder:
+            recorder.stop()
+    return latencies, recorder.get_stats() if recorder else None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--video', default=DEFAULT_VIDEO)
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--loops', type=int, default=2)
+    parser.add_argument('--fps', type=float, default=25.0, help='pace of the loop; 0 = unpaced')
+    parser.add_argument('--trigger-every', type=int, default=100)
+    args = parser.parse_args()
+    
+    frames = load_frames(args.video, args.frames)
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in ('off', 'ring', 'ring + writer', 'synchronous'):
+            latencies, stats = run(mode, frames, args.loops, args.fps, args.trigger_every,
+                                   directory)
+            p50, p95, p99 = 1000.0 * np.percentile(latencies, [50, 95, 99])
+            rows.append((mode, p50, p95, p99, 1000.0 * max(latencies),
+                         stats['written'] if stats else '-',
+                         stats['frames_lost'] if stats else '-',
+                         f"{stats['ring_mb']:.0f}" if stats else '-'))
+    
+    pace = f"{args.fps:g} FPS" if args.fps else "unpaced"
+    print_table(f"Frame loop latency in ms ({len(frames) * args.loops} frames, {pace}, intrusion "
+                f"every {args.trigger_every} frames)", rows,
+                ['mode', 'p50', 'p95', 'p99', 'max', 'media', 'lost frames', 'ring MB'])
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
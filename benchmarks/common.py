@@ -0,0 +1,76 @@
+import time
+import cv2
+import numpy as np
+
+DEFAULT_VIDEO = "data/Video1.mp4"
+
+def load_frames(path=DEFAULT_VIDEO, limit=300):
+    """Decode up to limit frames of a video file into memory"""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Cannot open video source: {path}")
+    frames = []
+    while len(frames) < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    if not frames:
+        raise RuntimeError(f"No frames decoded from {path}")
+    return frames
+
+def synthetic_frames(width, height, objects, count, seed=0):
+    """Generate count frames of textured boxes moving over a textured background
+    
+    Box size scales with the resolution, and boxes move mostly vertically
+    so they cross a horizontal perimeter at mid-height, bouncing off the
+    frame edges. Mild per-frame noise keeps the background from being
+    perfectly static. The same arguments always give the same frames.
+    """
+    rng = np.random.default_rng(seed)
+    
+    def texture(w, h, cell, low, high, channels):
+        """Random texture of roughly cell-sized blocks"""
+        cells = rng.integers(low, high, (h // cell + 1, w // cell + 1, channels), dtype=np.uint8)
+        return cv2.resize(cells, (w, h), interpolation=cv2.INTER_NEAREST).reshape(h, w, channels)
+    
+    background = np.repeat(texture(width, height, 16, 110, 170, 1), 3, axis=2)
+    box_w, box_h = width // 10, height // 6
+    patches = [texture(box_w, box_h, max(box_h // 4, 1), 0, 90, 3) for _ in range(objects)]
+    limit = np.array([width - box_w, height - box_h], dtype=np.float64)
+    positions = rng.uniform(0, 1, (objects, 2)) * limit
+    velocities = np.column_stack([rng.normal(0, 1, objects),
+                                  rng.choice([-1, 1], objects) * rng.uniform(10, 20, objects)])
+    velocities *= height / 480.0
+    
+    frames = []
+    for _ in range(count):
+        frame = background + rng.integers(0, 4, (height, width, 1), dtype=np.uint8)
+        for (x, y), patch in zip(positions.astype(int), patches):
+            frame[y:y + box_h, x:x + box_w] = patch
+        frames.append(frame)
+        positions += velocities
+        outside = (positions < 0) | (positions > limit)
+        velocities[outside] *= -1
+        positions = np.clip(positions, 0, limit)
+    return frames
+
+def run_timed(function, frames):
+    """Call function on every frame and return frames per second"""
+    start = time.perf_counter()
+    for frame in frames:
+        function(frame)
+    elapsed = time.perf_counter() - start
+    return len(frames) / elapsed
+
+def print_table(title, rows, columns):
+    """Print benchmark results as an aligned table"""
+    print(f"\n{title}")
+    cells = [[f"{cell:.2f}" if isinstance(cell, float) else str(cell) for cell in row]
+             for row in rows]
+    widths = [max([len(column)] + [len(row[i]) for row in cells]) + 2
+              for i, column in enumerate(columns)]
+    print("".join(f"{column:>{width}}" for column, width in zip(columns, widths)))
+    for row in cells:
+        print("".join(f"{cell:>{width}}" for cell, width in zip(row, widths)))
\ No newline at end of file
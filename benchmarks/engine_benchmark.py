@@ -0,0 +1,64 @@
+"""Compare motion engines on data/Video1.mp4
+
+Run from the repository root:
+    python -m benchmarks.engine_benchmark [--frames 300] [--engines frame_diff mog2]
+                                          [--contour-backends contours components]
+
+Each engine runs MotionDetector.detect and ContourProcessor.get_centroids over
+the same preloaded frames. Reports time per frame for detection and contour
+extraction, plus the average number of contours per frame. Fewer spurious
+contours also means less work for the tracker.
+"""
+import argparse
+import time
+from benchmarks.common import DEFAULT_VIDEO, load_frames, print_table
+from processing.motion_detector import MotionDetector
+from processing.motion_engines import MOTION_ENGINES
+from processing.contour_utils import ContourProcessor
+
+def run_engine(frames, engine, contour_backend):
+    """Return (detect ms/frame, contour ms/frame, contours per frame, max contours)"""
+    detector = MotionDetector(engine=engine)
+    processor = ContourProcessor(backend=contour_backend)
+    detect_time = 0.0
+    contour_time = 0.0
+    contour_counts = []
+    
+    for frame in frames:
+        start = time.perf_counter()
+        mask = detector.detect(frame)
+        detect_time += time.perf_counter() - start
+        if mask is None:
+            continue
+        start = time.perf_counter()
+        _, contours = processor.get_centroids(mask)
+        contour_time += time.perf_counter() - start
+        contour_counts.append(len(contours))
+    
+    n = len(frames)
+    return (1000.0 * detect_time / n, 1000.0 * contour_time / n,
+            sum(contour_counts) / float(len(contour_counts)), max(contour_counts))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--video', default=DEFAULT_VIDEO)
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--engines', nargs='+', default=list(MOTION_ENGINES),
+                        choices=list(MOTION_ENGINES))
+    parser.add_argument('--contour-backends', nargs='+', default=['contours'],
+                        choices=['contours', 'components'])
+    args = parser.parse_args()
+    
+    frames = load_frames(args.video, args.frames)
+    rows = []
+    for engine in args.engines:
+        for backend in args.contour_backends:
+            detect_ms, contour_ms, mean_contours, max_contours = run_engine(frames, engine, backend)
+            rows.append((engine, backend, detect_ms, contour_ms, detect_ms + contour_ms,
+                         mean_contours, max_contours))
+    
+    print_table(f"Motion engines ({len(frames)} frames)", rows,
+                ['engine', 'backend', 'detect ms', 'contour ms', 'total ms', 'contours/frame', 'max'])
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,128 @@
+"""Frame throughput from a capture process: multiprocessing.Queue vs the shared-memory ring
+
+Run from the repository root:
+    python -m benchmarks.frame_transport_benchmark [--frames 300] [--slots 4]
+
+A producer process sends --frames synthetic frames at 720p and 1080p to
+this process as fast as it can:
+
+- queue: each frame is put on a multiprocessing.Queue, so it is pickled,
+  written through a pipe and unpickled into a new array.
+- shared ring: each frame is copied into a free SharedFrameRing slot
+  (where a decoder would write it) and only the slot index is sent; this
+  process reads it with SharedFrameStream, the reader used by main.py and
+  the supervisor.
+
+The reader touches every frame (sums one row per 16) so views are really
+read. FPS is frames received per wall second; latency is from the
+producer handing a frame over to the reader getting it. Reader CPU is
+the process time of this process per frame.
+"""
+import argparse
+import contextlib
+import multiprocessing as mp
+import os
+import time
+import numpy as np
+from benchmarks.common import print_table
+from camera.shared_frames import FrameChannel, SharedFrameRing, SharedFrameStream
+
+RESOLUTIONS = [('720p', (720, 1280, 3)), ('1080p', (1080, 1920, 3))]
+
+def produce_queue(shape, frames, frame_queue):
+    """Producer: pickle every frame through a multiprocessing.Queue"""
+    frame = np.random.default_rng(0).integers(0, 256, shape, dtype=np.uint8)
+    for _ in range(frames):
+        frame_queue.put((time.monotonic(), frame))
+    frame_queue.put(None)
+
+def produce_shared(shape, frames, channel):
+    """Producer: copy every frame into a free ring slot and send its index"""
+    frame = np.random.default_rng(0).integers(0, 256, shape, dtype=np.uint8)
+    ring = SharedFrameRing(shape, frame.dtype, channel.slots)
+    channel.ready.put(ring.describe())
+    free_slots = list(range(channel.slots))
+    for seq in range(frames):
+        if not free_slots:
+            free_slots.append(channel.free.get())
+        slot = free_slots.pop()
+        np.copyto(ring.frames[slot], frame)
+        ring.seqs[slot] = seq
+        channel.ready.put((slot, seq, time.monotonic()))
+    channel.ready.put(None)
+    channel.stop.wait(10.0)
+    ring.close()
+
+def consume_queue(frame_queue):
+    """Frames from a Queue; yields (handover time, frame)"""
+    while True:
+        message = frame_queue.get()
+        if message is None:
+            return
+        yield message
+
+def consume_shared(stream):
+    """Frames from a SharedFrameStream; yields (handover time, frame)"""
+    while True:
+        ret, frame = stream.read_frame()
+        if not ret:
+            return
+        yield stream.last_frame_time, frame
+
+def run(transport, shape, frames, slots):
+    """(FPS, latency ms list, reader CPU ms per frame) for one transport and resolution"""
+    context = mp.get_context('spawn')
+    if transport == 'queue':
+        frame_queue = context.Queue(slots)
+        producer = context.Process(target=produce_queue, args=(shape, frames, frame_queue))
+        received = consume_queue(frame_queue)
+        stream = None
+    else:
+        channel = FrameChannel(context, slots)
+        producer = context.Process(target=produce_shared, args=(shape, frames, channel))
+        stream = SharedFrameStream(channel)
+        received = consume_shared(stream)
+    producer.start()
+    
+    latencies = []
+    checksum = 0
+    start = cpu_start = None
+    for handed_over, frame in received:
+        if start is None:
+            # Time from the first frame on, without process startup
+            start = time.perf_counter()
+            cpu_start = time.process_time()
+        latencies.append(1000.0 * (time.monotonic() - handed_over))
+        checksum += int(frame[::16].sum(dtype=np.uint64))
+    wall = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+    if stream:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            stream.release()
+    producer.join()
+    return (len(latencies) - 1) / wall, latencies, 1000.0 * cpu / len(latencies), checksum
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--slots', type=int, default=4, help='ring slots and queue capacity')
+    args = parser.parse_args()
+    
+    rows = []
+    for name, shape in RESOLUTIONS:
+        checksums = set()
+        for transport in ('queue', 'shared ring'):
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                fps, latencies, cpu_ms, checksum = run(transport, shape, args.frames, args.slots)
+            checksums.add(checksum)
+            p50, p99 = np.percentile(latencies, [50, 99])
+            rows.append((name, transport, fps, p50, p99, cpu_ms))
+        if len(checksums) != 1:
+            print(f"[WARNING] {name}: the transports delivered different frame contents")
+    
+    print_table(f"Frame transport from a capture process ({args.frames} frames, "
+                f"{args.slots} slots)", rows,
+                ['resolution', 'transport', 'FPS', 'p50 ms', 'p99 ms', 'reader CPU ms/frame'])
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
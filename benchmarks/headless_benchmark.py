@@ -0,0 +1,65 @@
+"""Compare headed and headless main-loop throughput on data/Video1.mp4
+
+Run from the repository root:
+    python -m benchmarks.headless_benchmark [--frames 300] [--display]
+
+Frames are decoded into memory first so only the per-frame loop is timed.
+Without --display the headed mode draws all overlays but skips cv2.imshow,
+so the reported speedup is a lower bound on a machine with a display.
+"""
+import argparse
+import cv2
+from benchmarks.common import DEFAULT_VIDEO, load_frames, run_timed, print_table
+from processing.pipeline import DetectionPipeline
+from utils.overlay import annotate_frame
+from utils.preview import PreviewWriter, MJPEGBuffer
+
+def make_loop(headless, display=False, preview=None):
+    """Build a per-frame function mirroring the main.py loop"""
+    pipeline = DetectionPipeline()
+    state = {'index': 0}
+    
+    def step(frame):
+        result = pipeline.process(frame)
+        preview_due = preview is not None and preview.is_due(state['index'], False)
+        state['index'] += 1
+        if not headless or preview_due:
+            annotate_frame(frame, result, len(result.objects), None, 30)
+        if preview_due:
+            preview.write(frame)
+        if display and not headless:
+            cv2.imshow('Benchmark', frame)
+            cv2.waitKey(1)
+    
+    return step
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--video', default=DEFAULT_VIDEO)
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--display', action='store_true', help='include cv2.imshow in headed mode')
+    args = parser.parse_args()
+    
+    frames = load_frames(args.video, args.frames)
+    modes = [
+        ('headed', make_loop(False, args.display)),
+        ('headless', make_loop(True)),
+        ('headless+preview/30', make_loop(True, preview=PreviewWriter(
+            'every_n', 30, 'mjpeg', buffer=MJPEGBuffer()))),
+    ]
+    
+    rows = []
+    baseline = None
+    for name, step in modes:
+        # Fresh copies so overlays drawn by one mode never leak into the next
+        fps = run_timed(step, [frame.copy() for frame in frames])
+        baseline = baseline or fps
+        rows.append((name, fps, 1000.0 / fps, fps / baseline))
+    
+    if args.display:
+        cv2.destroyAllWindows()
+    print_table(f"Headed vs headless ({len(frames)} frames)", rows,
+                ['mode', 'fps', 'ms/frame', 'speedup'])
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,129 @@
+"""Sustained event ingest rate of the API with and without batched writes
+
+Run from the repository root:
+    python -m benchmarks.ingest_benchmark [--seconds 3] [--clients 4] [--batch 100]
+
+Each configuration serves the Flask app on a local port backed by a fresh
+database in a temporary directory. Client threads post events over
+keep-alive sessions for a fixed time; the rate counts events that were
+acknowledged and written to the database.
+
+- per-event commit: one POST and one committed transaction per event, with
+  SQLite's default rollback journal and full sync (the original behavior)
+- write-behind: one POST per event, stored by EventWriter in batched
+  transactions on a WAL database
+- bulk + write-behind: --batch events per POST /api/events/batch
+"""
+import argparse
+import logging
+import os
+import tempfile
+import threading
+import time
+import requests
+from werkzeug.serving import make_server
+from benchmarks.common import print_table
+from backend import api
+from storage.database import Database, EventWriter
+from utils.event import Event
+
+class DirectWriter:
+    """Original storage path: each event is committed during its own request"""
+    
+    def __init__(self, db):
+        self.db = db
+        self.transactions = 0
+    
+    def submit(self, events):
+        """Commit each event in its own transaction"""
+        for event in events:
+            self.db.insert_events([event])
+            self.transactions += 1
+        return True
+    
+    def flush(self):
+        """Nothing is buffered"""
+    
+    def stop(self):
+        """Nothing to stop"""
+    
+    def get_stats(self):
+        """Return the transaction count"""
+        return {'transactions': self.transactions}
+
+def client(url, batch, deadline, counts, index):
+    """Post events until the deadline, counting acknowledged events"""
+    session = requests.Session()
+    events = [Event.create_intrusion_event(f"cam-{index}") for _ in range(batch)]
+    payload = events if url.endswith('/batch') else events[0]
+    while time.monotonic() < deadline:
+        response = session.post(url, json=payload, timeout=10)
+        if response.status_code == 200:
+            counts[index] += batch
+    session.close()
+
+def run_config(directory, name, legacy, batch, seconds, clients):
+    """Return (events/sec, transactions) for one configuration"""
+    db_path = os.path.join(directory, f"{name}.db")
+    if legacy:
+        # One shared connection, as before the connection pool
+        db = Database(db_path, readers=0)
+        db.conn.execute('PRAGMA journal_mode=DELETE')
+        db.conn.execute('PRAGMA synchronous=FULL')
+        writer = DirectWriter(db)
+    else:
+        db = Database(db_path)
+        writer = EventWriter(db).start()
+    api.db, api.writer = db, writer
+    
+    server = make_server('127.0.0.1', 0, api.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    path = '/api/events/batch' if batch > 1 else '/api/events'
+    url = f"http://127.0.0.1:{server.server_port}{path}"
+    
+    counts = [0] * clients
+    start = time.monotonic()
+    threads = [threading.Thread(target=client, args=(url, batch, start + seconds, counts, i))
+               for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    writer.flush()
+    elapsed = time.monotonic() - start
+    
+    server.shutdown()
+    writer.stop()
+    stored = db.conn.execute('SELECT COUNT(*) FROM events').fetchone()[0]
+    db.close()
+    if stored != sum(counts):
+        raise AssertionError(f"{name}: {sum(counts)} events acknowledged but {stored} stored")
+    return stored / elapsed, writer.get_stats()['transactions']
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--batch', type=int, default=100, help='events per bulk request')
+    args = parser.parse_args()
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    
+    configs = [
+        ('per-event commit', True, 1),
+        ('write-behind', False, 1),
+        (f'bulk {args.batch} + write-behind', False, args.batch),
+    ]
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        baseline = None
+        for index, (label, legacy, batch) in enumerate(configs):
+            rate, transactions = run_config(directory, f"run{index}", legacy, batch,
+                                            args.seconds, args.clients)
+            baseline = baseline or rate
+            rows.append((label, rate, transactions, rate / baseline))
+    
+    print_table(f"Event ingest ({args.clients} clients, {args.seconds:.0f} s per run)", rows,
+                ['config', 'events/s', 'transactions', 'speedup'])
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,70 @@
+"""Time motion detection and contour extraction under different processing options
+
+Run from the repository root:
+    python -m benchmarks.motion_benchmark [--frames 300] [--scales 1.0 0.5 0.25] [--roi-margin 150]
+                                          [--preallocate]
+
+Each configuration runs MotionDetector.detect and ContourProcessor.get_centroids
+over the same preloaded frames and reports time per frame, the share of pixels
+analyzed and the number of centroids found. --preallocate runs MotionDetector
+with reusable per-stage buffers; compare peak RSS between runs with and without it.
+"""
+import argparse
+import time
+from benchmarks.common import DEFAULT_VIDEO, load_frames, print_table
+from processing.motion_detector import MotionDetector, perimeter_roi
+from processing.contour_utils import ContourProcessor
+from processing.perimeter import Perimeter
+from utils.memory import peak_rss_mb
+from config.settings import PERIMETER_LINE
+
+def run_config(frames, scale, roi, preallocate):
+    """Return (ms per frame, analyzed pixel share, total centroids) for one configuration"""
+    detector = MotionDetector(scale=scale, roi=roi, preallocate=preallocate)
+    processor = ContourProcessor()
+    centroid_count = 0
+    
+    start = time.perf_counter()
+    for frame in frames:
+        mask = detector.detect(frame)
+        if mask is not None:
+            centroids, _ = processor.get_centroids(mask, detector.scale, detector.offset)
+            centroid_count += len(centroids)
+    elapsed = time.perf_counter() - start
+    
+    h, w = frames[0].shape[:2]
+    pixel_share = mask.size / float(h * w)
+    return 1000.0 * elapsed / len(frames), pixel_share, centroid_count
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--video', default=DEFAULT_VIDEO)
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--scales', type=float, nargs='+', default=[1.0, 0.5, 0.25])
+    parser.add_argument('--roi-margin', type=int, default=150,
+                        help='margin around the perimeter for the ROI runs')
+    parser.add_argument('--preallocate', action='store_true',
+                        help='use preallocated per-stage buffers')
+    args = parser.parse_args()
+    
+    frames = load_frames(args.video, args.frames)
+    roi = perimeter_roi(Perimeter.from_line(PERIMETER_LINE).bounds, args.roi_margin)
+    
+    rows = []
+    baseline = None
+    for use_roi in (False, True):
+        for scale in args.scales:
+            ms, pixel_share, centroid_count = run_config(frames, scale, roi if use_roi else None,
+                                                           args.preallocate)
+            baseline = baseline or ms
+            rows.append((scale, 'yes' if use_roi else 'no', ms, pixel_share, baseline / ms,
+                         centroid_count))
+    
+    print_table(f"Motion detection ({len(frames)} frames, {frames[0].shape[1]}x{frames[0].shape[0]})",
+                rows, ['scale', 'roi', 'ms/frame', 'pixels', 'speedup', 'centroids'])
+    peak_rss = peak_rss_mb()
+    if peak_rss is not None:
+        print(f"Peak RSS: {peak_rss:.0f} MB")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
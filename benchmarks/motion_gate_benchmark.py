@@ -0,0 +1,89 @@
+"""CPU saved by the motion gate on a clip with idle periods, and its effect on detections
+
+Run from the repository root:
+    python -m benchmarks.motion_gate_benchmark [--idle-seconds 20] [--noise 2.0] [--rounds 3]
+
+The clip is idle video, data/Video1.mp4, then idle video again. Idle
+video repeats the first or last frame with Gaussian sensor noise, so it is
+static but never bit-identical. The headless pipeline runs over it from
+memory with the gate off and on; CPU is the process time of the best
+round. The gate's own estimate of the CPU it saved is printed next to
+the measured difference.
+
+Crossings (frame, object ID) and the set of track IDs are compared between
+the two runs with the cooldown disabled; the gate is only safe to enable
+when they match.
+"""
+import argparse
+import contextlib
+import os
+import time
+import numpy as np
+from benchmarks.common import DEFAULT_VIDEO, load_frames, print_table
+from processing.pipeline import DetectionPipeline
+
+def idle_frames(frame, count, noise, rng):
+    """count copies of a frame with Gaussian noise added"""
+    frames = []
+    for _ in range(count):
+        noisy = frame + rng.normal(0.0, noise, frame.shape)
+        frames.append(np.clip(noisy, 0, 255).astype(np.uint8))
+    return frames
+
+def run(frames, gate):
+    """(CPU seconds, crossings, track IDs, gate stats) for one pass"""
+    pipeline = DetectionPipeline({'motion_gate': gate, 'event_cooldown': 0})
+    crossings = []
+    tracks = set()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.process_time()
+        for index, frame in enumerate(frames):
+            result = pipeline.process(frame)
+            crossings.extend((index, c.object_id) for c in result.crossings)
+            tracks.update(result.objects)
+        cpu = time.process_time() - start
+    return cpu, crossings, tracks, pipeline.gate.get_stats() if gate else None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--video', default=DEFAULT_VIDEO)
+    parser.add_argument('--idle-seconds', type=float, default=20.0,
+                        help='idle video before and after the sample video')
+    parser.add_argument('--noise', type=float, default=2.0, help='sensor noise sigma (gray levels)')
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+    
+    video = load_frames(args.video, 10000)
+    rng = np.random.default_rng(0)
+    idle = int(args.idle_seconds * 25)
+    frames = (idle_frames(video[0], idle, args.noise, rng) + video +
+              idle_frames(video[-1], idle, args.noise, rng))
+    
+    best = {}
+    for _ in range(args.rounds):
+        for gate in (False, True):
+            outcome = run(frames, gate)
+            if gate not in best or outcome[0] < best[gate][0]:
+                best[gate] = outcome
+    
+    cpu_off, crossings_off, tracks_off, _ = best[False]
+    cpu_on, crossings_on, tracks_on, stats = best[True]
+    rows = [
+        ('off', cpu_off, 1000.0 * cpu_off / len(frames), '-', '-', '-'),
+        ('on', cpu_on, 1000.0 * cpu_on / len(frames), f"{stats['skipped_pct']:.1f}",
+         f"{cpu_off - cpu_on:.2f}", f"{stats['saved_seconds']:.2f}"),
+    ]
+    print_table(f"Motion gate on {len(frames)} frames ({2 * idle} idle, {len(video)} video; "
+                f"best of {args.rounds})", rows,
+                ['gate', 'CPU s', 'CPU ms/frame', 'skipped %', 'saved s', 'estimated s'])
+    print(f"Skipped without a test while idle: {stats['idle_skipped']} frames; "
+          f"gate tests took {stats['gate_seconds']:.2f} s")
+    if crossings_on == crossings_off and tracks_on == tracks_off:
+        print(f"[OK] Same {len(crossings_on)} crossing(s) and {len(tracks_on)} track(s) "
+              f"with the gate on")
+    else:
+        print(f"[WARNING] Detections differ: {len(crossings_off)} vs {len(crossings_on)} "
+              f"crossings, {len(tracks_off)} vs {len(tracks_on)} tracks")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
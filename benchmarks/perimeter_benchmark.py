@@ -0,0 +1,88 @@
+"""Per-frame perimeter crossing test latency against zone and track count
+
+Run from the repository root:
+    python -m benchmarks.perimeter_benchmark [--zones 1 10 100 1000] [--tracks 50 500] [--frames 100]
+
+Zones are random small polygons scattered over a 1920x1080 scene and tracks
+move with random velocities, bouncing off the edges. Each configuration is
+timed with the bounding-box index (Perimeter.find_crossings) and with an
+exact test of every (track, segment) pair; both must report the same crossings.
+"""
+import argparse
+import time
+import numpy as np
+from benchmarks.common import print_table
+from processing.perimeter import Perimeter
+
+SCENE_SIZE = np.array([1920.0, 1080.0])
+
+def make_zones(count, rng):
+    """Random hexagon zones of 20-60 pixel radius"""
+    angles = np.linspace(0, 2 * np.pi, 6, endpoint=False)
+    zones = []
+    for index in range(count):
+        center = rng.uniform(0, 1, 2) * SCENE_SIZE
+        radius = rng.uniform(20, 60)
+        points = center + radius * np.column_stack([np.cos(angles), np.sin(angles)])
+        zones.append({'name': f"zone-{index}", 'type': 'polygon', 'points': points.tolist()})
+    return zones
+
+def brute_force(perimeter, prev, curr):
+    """Exact test of every (track, segment) pair, without the index"""
+    tracks = np.repeat(np.arange(len(prev)), len(perimeter.segments))
+    segments = np.tile(np.arange(len(perimeter.segments)), len(prev))
+    crossed = perimeter.intersect(tracks, segments, prev, curr)[0]
+    return set(zip(tracks[crossed].tolist(), perimeter.segment_zone[segments[crossed]].tolist()))
+
+def run_config(zone_count, track_count, frames, seed=0):
+    """Return (indexed ms/frame, brute-force ms/frame, crossings) for one configuration"""
+    rng = np.random.default_rng(seed)
+    perimeter = Perimeter(make_zones(zone_count, rng))
+    positions = rng.uniform(0, 1, (track_count, 2)) * SCENE_SIZE
+    velocities = rng.normal(0, 8, (track_count, 2))
+    
+    indexed_time = 0.0
+    brute_time = 0.0
+    crossings = 0
+    for _ in range(frames):
+        # Tracks bounce off the scene edges
+        prev = positions
+        positions = positions + velocities
+        outside = (positions < 0) | (positions > SCENE_SIZE)
+        velocities[outside] *= -1
+        positions = np.clip(positions, 0, SCENE_SIZE)
+        
+        start = time.perf_counter()
+        tracks, zones, _ = perimeter.find_crossings(prev, positions)
+        indexed_time += time.perf_counter() - start
+        
+        start = time.perf_counter()
+        expected = brute_force(perimeter, prev, positions)
+        brute_time += time.perf_counter() - start
+        
+        if set(zip(tracks.tolist(), zones.tolist())) != expected:
+            raise AssertionError("Indexed and brute-force crossings differ")
+        crossings += len(tracks)
+    
+    return 1000.0 * indexed_time / frames, 1000.0 * brute_time / frames, crossings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--zones', type=int, nargs='+', default=[1, 10, 100, 1000])
+    parser.add_argument('--tracks', type=int, nargs='+', default=[50, 500])
+    parser.add_argument('--frames', type=int, default=100)
+    args = parser.parse_args()
+    
+    rows = []
+    for track_count in args.tracks:
+        for zone_count in args.zones:
+            indexed_ms, brute_ms, crossings = run_config(zone_count, track_count, args.frames)
+            rows.append((zone_count, zone_count * 6, track_count, indexed_ms, brute_ms,
+                         brute_ms / indexed_ms, crossings))
+    
+    print_table(f"Perimeter crossing test ({args.frames} frames per run)", rows,
+                ['zones', 'segments', 'tracks', 'indexed ms', 'all pairs ms', 'speedup',
+                 'crossings'])
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
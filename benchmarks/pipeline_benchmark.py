@@ -0,0 +1,255 @@
+"""Offline throughput and correctness harness for the full detection pipeline
+
+Run from the repository root:
+    python -m benchmarks.pipeline_benchmark [--frames 300] [--iterations 3]
+        [--resolutions 640x480 1280x720 1920x1080] [--objects 4 16 64]
+        [--synthetic-frames 120] [--output results.json] [--compare baseline.json]
+    python -m benchmarks.pipeline_benchmark --check [--golden benchmarks/golden.json]
+    python -m benchmarks.pipeline_benchmark --write-golden [--golden benchmarks/golden.json]
+
+Clips are data/Video1.mp4 and synthetic clips of textured boxes at each
+resolution and object count (benchmarks.common.synthetic_frames). Each
+clip is decoded or generated once into memory, then DetectionPipeline runs
+over it with no display and no network:
+
+- end to end: --iterations passes with a fresh pipeline and no profiler;
+  the best pass gives FPS and ms/frame, the mean is reported too.
+- stages: one more pass with a StageProfiler gives p50/p95/p99 of the
+  motion, contours and tracking stages.
+
+--output writes the results and the environment (Python, OpenCV, NumPy,
+CPU count, git commit) as JSON. --compare reads such a file and prints the
+FPS change per clip; the exit status is 1 when any clip got slower by more
+than --threshold percent.
+
+--check runs the clips recorded in the golden file and compares every
+perimeter crossing (frame, object ID, zone, direction) and the first and
+last frame of every track ID; --write-golden records them. The event
+cooldown is disabled for these runs so results do not depend on speed.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import cv2
+import numpy as np
+from benchmarks.common import DEFAULT_VIDEO, load_frames, synthetic_frames, print_table
+from processing.pipeline import DetectionPipeline
+from utils.profiler import StageProfiler
+
+GOLDEN_PATH = "benchmarks/golden.json"
+
+def clip_specs(args):
+    """Clip definitions selected on the command line"""
+    specs = [{'name': 'video', 'source': 'video', 'path': args.video, 'frames': args.frames}]
+    for resolution in args.resolutions:
+        width, height = (int(value) for value in resolution.split('x'))
+        for objects in args.objects:
+            specs.append({'name': f"synthetic-{width}x{height}-n{objects}", 'source': 'synthetic',
+                          'width': width, 'height': height, 'objects': objects,
+                          'frames': args.synthetic_frames, 'seed': 0})
+    return specs
+
+def load_clip(spec):
+    """Decode or generate the frames of one clip"""
+    if spec['source'] == 'video':
+        return load_frames(spec['path'], spec['frames'])
+    return synthetic_frames(spec['width'], spec['height'], spec['objects'], spec['frames'],
+                            spec['seed'])
+
+def make_pipeline(spec, profiler=None, cooldown=None):
+    """Pipeline for a clip; synthetic clips get a perimeter across the middle"""
+    camera = {}
+    if spec['source'] == 'synthetic':
+        camera['perimeter_line'] = (0, spec['height'] // 2, spec['width'], spec['height'] // 2)
+    if cooldown is not None:
+        camera['event_cooldown'] = cooldown
+    return DetectionPipeline(camera, profiler=profiler)
+
+def run_pass(spec, frames, profiler=None):
+    """Seconds for one pass of a fresh pipeline over the frames"""
+    pipeline = make_pipeline(spec, profiler)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        for frame in frames:
+            pipeline.process(frame)
+        return time.perf_counter() - start
+
+def benchmark_clip(spec, frames, iterations):
+    """Timing results for one clip"""
+    times = [run_pass(spec, frames) for _ in range(iterations)]
+    profiler = StageProfiler(window=len(frames))
+    run_pass(spec, frames, profiler)
+    stages = {
+        stage: {
+            'p50_ms': 1000 * stats['p50'],
+            'p95_ms': 1000 * stats['p95'],
+            'p99_ms': 1000 * stats['p99'],
+            'mean_ms': 1000 * stats['sum'] / stats['count']
+        }
+        for stage, stats in profiler.summary().items()
+    }
+    return {
+        'clip': spec['name'],
+        'spec': spec,
+        'frames': len(frames),
+        'iterations': iterations,
+        'fps': len(frames) / min(times),
+        'ms_per_frame': 1000 * min(times) / len(frames),
+        'ms_per_frame_mean': 1000 * float(np.mean(times)) / len(frames),
+        'stages': stages
+    }
+
+def trace_clip(spec, frames):
+    """Crossings and track spans of one clip, with the cooldown off
+    
+    Tracks are [object ID, first frame, last frame]; a track is present on
+    every frame in between, so this captures the tracked IDs of each frame.
+    """
+    pipeline = make_pipeline(spec, cooldown=0)
+    crossings = []
+    spans = {}
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for index, frame in enumerate(frames):
+            result = pipeline.process(frame)
+            crossings.extend([index, int(c.object_id), c.zone, c.direction]
+                             for c in result.crossings)
+            for object_id in result.objects:
+                spans.setdefault(int(object_id), [index, index])[1] = index
+    tracks = [[object_id, first, last] for object_id, (first, last) in sorted(spans.items())]
+    return {'crossings': crossings, 'tracks': tracks}
+
+def environment():
+    """Versions and hardware the results were measured on"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'commit': commit,
+        'python': platform.python_version(),
+        'opencv': cv2.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+
+def compare(results, baseline_path, threshold):
+    """Print FPS changes against a baseline file; returns the clips that regressed"""
+    with open(baseline_path) as f:
+        baseline = {result['clip']: result for result in json.load(f)['results']}
+    rows = []
+    regressed = []
+    for result in results:
+        old = baseline.get(result['clip'])
+        if old is None:
+            rows.append((result['clip'], '-', result['fps'], '-'))
+            continue
+        change = 100.0 * (result['fps'] / old['fps'] - 1)
+        rows.append((result['clip'], old['fps'], result['fps'], change))
+        if change < -threshold:
+            regressed.append(result['clip'])
+    print_table(f"Compared with {baseline_path}", rows, ['clip', 'base FPS', 'FPS', 'change %'])
+    return regressed
+
+def check_golden(golden_path):
+    """Compare every clip in the golden file; returns the number of mismatching clips"""
+    with open(golden_path) as f:
+        golden = json.load(f)
+    recorded_with = golden['environment']['opencv']
+    if recorded_with != cv2.__version__:
+        print(f"[WARNING] Golden file was recorded with OpenCV {recorded_with}, running "
+              f"{cv2.__version__}; small differences may come from OpenCV itself")
+    failures = 0
+    for expected in golden['clips']:
+        spec = expected['spec']
+        actual = trace_clip(spec, load_clip(spec))
+        problems = []
+        if actual['crossings'] != expected['crossings']:
+            problems.append(f"crossings differ: expected {len(expected['crossings'])}, "
+                            f"got {len(actual['crossings'])}")
+        if actual['tracks'] != expected['tracks']:
+            first = next((e for a, e in zip(actual['tracks'], expected['tracks']) if a != e),
+                         None)
+            problems.append(f"tracks differ: expected {len(expected['tracks'])}, got "
+                            f"{len(actual['tracks'])}"
+                            + (f"; first mismatch at track [id, first, last] {first}"
+                               if first else ""))
+        if problems:
+            failures += 1
+            print(f"[ERROR] {spec['name']}: {'; '.join(problems)}")
+        else:
+            print(f"[OK] {spec['name']}: {len(actual['crossings'])} crossing(s) and "
+                  f"{len(actual['tracks'])} track(s) match")
+    return failures
+
+def write_golden(specs, golden_path):
+    """Record crossings and tracked IDs of every clip"""
+    clips = []
+    for spec in specs:
+        trace = trace_clip(spec, load_clip(spec))
+        clips.append(dict(spec=spec, **trace))
+        print(f"[OK] {spec['name']}: {len(trace['crossings'])} crossing(s) recorded")
+    with open(golden_path, 'w') as f:
+        json.dump({'environment': environment(), 'clips': clips}, f)
+    print(f"[OK] Golden file written to {golden_path}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--video', default=DEFAULT_VIDEO)
+    parser.add_argument('--frames', type=int, default=300, help='video frames to decode')
+    parser.add_argument('--resolutions', nargs='*', default=['640x480', '1280x720', '1920x1080'])
+    parser.add_argument('--objects', type=int, nargs='+', default=[4, 16, 64])
+    parser.add_argument('--synthetic-frames', type=int, default=120)
+    parser.add_argument('--iterations', type=int, default=3)
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--compare', help='results JSON of an earlier run')
+    parser.add_argument('--threshold', type=float, default=5.0,
+                        help='FPS drop in percent reported as a regression')
+    parser.add_argument('--golden', default=GOLDEN_PATH)
+    parser.add_argument('--check', action='store_true', help='compare against the golden file')
+    parser.add_argument('--write-golden', action='store_true',
+                        help='record the golden file from the selected clips')
+    args = parser.parse_args()
+    
+    if args.check:
+        sys.exit(1 if check_golden(args.golden) else 0)
+    if args.write_golden:
+        write_golden(clip_specs(args), args.golden)
+        return
+    
+    results = []
+    for spec in clip_specs(args):
+        # One clip in memory at a time; 1080p clips are large
+        frames = load_clip(spec)
+        results.append(benchmark_clip(spec, frames, args.iterations))
+        del frames
+    
+    print_table(f"End-to-end pipeline (best of {args.iterations})",
+                [(r['clip'], r['frames'], r['fps'], r['ms_per_frame'], r['ms_per_frame_mean'])
+                 for r in results], ['clip', 'frames', 'FPS', 'ms/frame', 'mean ms/frame'])
+    stage_names = list(results[0]['stages'])
+    print_table("Stage p50 / p95 (ms)",
+                [(r['clip'],) + tuple(f"{r['stages'][stage]['p50_ms']:.2f} / "
+                                      f"{r['stages'][stage]['p95_ms']:.2f}"
+                                      for stage in stage_names) for r in results],
+                ['clip'] + stage_names)
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'environment': environment(), 'results': results}, f, indent=2)
+        print(f"\n[OK] Results written to {args.output}")
+    if args.compare:
+        regressed = compare(results, args.compare, args.threshold)
+        if regressed:
+            print(f"[WARNING] Slower by more than {args.threshold:g}%: {', '.join(regressed)}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,100 @@
+"""Concurrent read throughput of the SQLite connection pool while writes continue
+
+Run from the repository root:
+    python -m benchmarks.pool_benchmark [--rows 200000] [--threads 1 2 4 8] [--seconds 3]
+
+A database in a temporary directory is filled with synthetic events. For
+each reader thread count, one writer thread keeps inserting batches of
+events while the reader threads run filtered event queries (a time window
+for one camera, filtered by value) for a fixed time. Each count is run
+with the pool's reader connections and with readers=0, where every query
+shares the single writer connection as before the pool existed.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+import numpy as np
+from benchmarks.common import print_table
+from storage.database import Database
+from config.settings import DB_READER_CONNECTIONS
+
+CAMERAS = [f"cam-{i}" for i in range(8)]
+EVENT_TYPES = ["intrusion_detected", "motion_detected"]
+
+def make_events(count, start_ts, rng):
+    """Synthetic events spread one second apart from start_ts"""
+    cameras = rng.integers(0, len(CAMERAS), count)
+    types = rng.integers(0, len(EVENT_TYPES), count)
+    values = rng.integers(0, 100, count)
+    return [{
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(start_ts + i)),
+        'event_type': EVENT_TYPES[types[i]],
+        'value': int(values[i]),
+        'camera_id': CAMERAS[cameras[i]],
+    } for i in range(count)]
+
+def reader(db, rows, deadline, counts, index):
+    """Run random filtered queries until the deadline"""
+    rng = np.random.default_rng(index)
+    while time.monotonic() < deadline:
+        start = float(rng.integers(0, rows - 20000))
+        db.query_events(start=start, end=start + 20000, camera_id=CAMERAS[index % len(CAMERAS)],
+                        min_value=90, limit=200)
+        counts[index] += 1
+
+def writer(db, rows, deadline, written):
+    """Insert batches of 100 events until the deadline"""
+    rng = np.random.default_rng(1000)
+    next_ts = rows
+    while time.monotonic() < deadline:
+        db.insert_events(make_events(100, next_ts, rng))
+        next_ts += 100
+        written[0] += 100
+        time.sleep(0.005)
+
+def run_config(db, rows, thread_count, seconds):
+    """Return (queries/sec, writes/sec) for one reader thread count"""
+    counts = [0] * thread_count
+    written = [0]
+    deadline = time.monotonic() + seconds
+    threads = [threading.Thread(target=reader, args=(db, rows, deadline, counts, i))
+               for i in range(thread_count)]
+    threads.append(threading.Thread(target=writer, args=(db, rows, deadline, written)))
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+    return sum(counts) / elapsed, written[0] / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--seconds', type=float, default=3.0)
+    args = parser.parse_args()
+    
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "pool.db")
+        db = Database(path)
+        db.insert_events(make_events(args.rows, 0, np.random.default_rng(0)))
+        db.close()
+        
+        for readers in (0, DB_READER_CONNECTIONS):
+            for thread_count in args.threads:
+                db = Database(path, readers=readers)
+                queries, writes = run_config(db, args.rows, thread_count, args.seconds)
+                stats = db.pool.get_stats()
+                rows.append((readers, thread_count, queries, writes, stats['read_waits'],
+                             stats['write_waits']))
+                db.close()
+    
+    print_table(f"Pool throughput ({args.rows} rows, {args.seconds:.0f} s per run)", rows,
+                ['readers', 'threads', 'queries/s', 'writes/s', 'read waits', 'write waits'])
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
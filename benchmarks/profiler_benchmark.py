@@ -0,0 +1,72 @@
+"""Overhead of per-stage profiling on the detection pipeline
+
+Run from the repository root:
+    python -m benchmarks.profiler_benchmark [--frames 300] [--rounds 5]
+
+Frames are decoded into memory first. The headless pipeline runs over them
+with profiling off (no profiler) and on (three stages timed per frame),
+alternating for --rounds rounds; the best time of each mode is compared,
+since noise only ever adds time. On a busy machine that comparison still
+varies by a few percent between runs, so the cost of one lap() call is
+also measured on its own and expressed as a share of the mean frame time.
+"""
+import argparse
+import time
+from benchmarks.common import DEFAULT_VIDEO, load_frames, print_table
+from processing.pipeline import DetectionPipeline
+from utils.profiler import StageProfiler
+
+def run_pipeline(frames, profiler):
+    """Seconds to run a fresh pipeline over all frames"""
+    pipeline = DetectionPipeline(profiler=profiler)
+    start = time.perf_counter()
+    for frame in frames:
+        pipeline.process(frame)
+    return time.perf_counter() - start
+
+def lap_cost_ns(calls=200000):
+    """Mean ns per lap() call"""
+    profiler = StageProfiler()
+    start = time.perf_counter_ns()
+    lap_start = profiler.start()
+    for _ in range(calls):
+        lap_start = profiler.lap('stage', lap_start)
+    return (time.perf_counter_ns() - start) / calls
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--video', default=DEFAULT_VIDEO)
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+    
+    frames = load_frames(args.video, args.frames)
+    best = {'off': float('inf'), 'on': float('inf')}
+    profiler = None
+    for _ in range(args.rounds):
+        best['off'] = min(best['off'], run_pipeline(frames, None))
+        profiler = StageProfiler()
+        best['on'] = min(best['on'], run_pipeline(frames, profiler))
+    
+    frame_ms = 1000.0 * best['off'] / len(frames)
+    rows = [
+        ('off', len(frames) / best['off'], frame_ms, 0.0),
+        ('on', len(frames) / best['on'], 1000.0 * best['on'] / len(frames),
+         100.0 * (best['on'] / best['off'] - 1)),
+    ]
+    print_table(f"Pipeline with and without profiling ({len(frames)} frames, best of "
+                f"{args.rounds})", rows, ['profiling', 'FPS', 'ms/frame', 'overhead %'])
+    
+    lap_ns = lap_cost_ns()
+    per_frame_ns = 4 * lap_ns  # Three laps plus start(), counted as a full lap
+    print_table("Instrumentation cost", [(lap_ns, per_frame_ns / 1000.0,
+                                          100.0 * per_frame_ns / (frame_ms * 1e6))],
+                ['ns/lap', 'us/frame', '% of frame'])
+    
+    print_table("Stage latencies from the last run (ms)",
+                [(stage, 1000 * stats['p50'], 1000 * stats['p95'], 1000 * stats['p99'])
+                 for stage, stats in profiler.summary().items()],
+                ['stage', 'p50', 'p95', 'p99'])
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,141 @@
+"""Insert latency while old events are removed: batched retention vs one large DELETE
+
+Run from the repository root:
+    python -m benchmarks.retention_benchmark [--rows 200000] [--days 60] [--keep 30]
+
+For each strategy a fresh database in a temporary directory is filled
+with --rows synthetic events spread over the last --days days. A writer
+thread keeps inserting batches of 10 events (as the API's EventWriter
+does) while the events older than --keep days are removed:
+
+- single DELETE: one `DELETE FROM events WHERE ts < cutoff` transaction,
+  as a cron job would run it; nothing is archived.
+- batched retention: EventRetention.run_once(), which archives and
+  deletes RETENTION_BATCH_SIZE events per transaction, pausing between
+  batches, then runs incremental vacuum steps.
+
+Insert latency is measured per batch during the removal. The database
+file size (plus WAL) is reported before and after, and the last table
+times a one-day query that the database answers and one that is read
+back from the archive.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+import numpy as np
+from benchmarks.common import print_table
+from storage.database import Database
+from storage.retention import EventRetention
+
+CAMERAS = [f"cam-{i}" for i in range(8)]
+DAY_SECONDS = 86400
+
+def make_events(count, start_ts, step, rng):
+    """Synthetic events step seconds apart from start_ts"""
+    cameras = rng.integers(0, len(CAMERAS), count)
+    values = rng.integers(0, 100, count)
+    return [{
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(start_ts + i * step)),
+        'event_type': 'intrusion_detected',
+        'value': int(values[i]),
+        'camera_id': CAMERAS[cameras[i]],
+    } for i in range(count)]
+
+def fill(db, rows, days, now):
+    """Insert rows events spread evenly over the days before now"""
+    rng = np.random.default_rng(0)
+    step = days * DAY_SECONDS / rows
+    start = now - days * DAY_SECONDS
+    for offset in range(0, rows, 10000):
+        count = min(10000, rows - offset)
+        db.insert_events(make_events(count, start + offset * step, step, rng))
+
+def file_size(path):
+    """Database file plus WAL, in MB"""
+    return sum(os.path.getsize(p) for p in (path, path + '-wal') if os.path.exists(p)) / 1e6
+
+def insert_loop(db, now, done, latencies):
+    """Insert 10 new events every 5 ms until done is set"""
+    rng = np.random.default_rng(1)
+    while not done.is_set():
+        events = make_events(10, now, 0.1, rng)
+        start = time.perf_counter()
+        db.insert_events(events)
+        latencies.append(1000.0 * (time.perf_counter() - start))
+        time.sleep(0.005)
+
+def single_delete(db, cutoff):
+    """Remove everything before cutoff in one transaction"""
+    with db.pool.writer() as conn:
+        return conn.execute('DELETE FROM events WHERE ts < ?', (cutoff,)).rowcount
+
+def run(strategy, directory, rows, days, keep):
+    """(removed, seconds, latencies, MB before, MB after, db) for one strategy"""
+    path = os.path.join(directory, f"{strategy.replace(' ', '_')}.db")
+    db = Database(path, archive_root=os.path.join(directory, 'archive'))
+    now = time.time()
+    fill(db, rows, days, now)
+    with db.pool.writer() as conn:
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchall()
+    size_before = file_size(path)
+    
+    latencies = []
+    done = threading.Event()
+    thread = threading.Thread(target=insert_loop, args=(db, now, done, latencies))
+    thread.start()
+    time.sleep(0.2)  # Baseline inserts before the removal starts
+    start = time.perf_counter()
+    if strategy == 'single DELETE':
+        removed = single_delete(db, now - keep * DAY_SECONDS)
+    else:
+        removed = EventRetention(db, max_days=keep).run_once(now)['removed']
+    seconds = time.perf_counter() - start
+    done.set()
+    thread.join()
+    
+    with db.pool.writer() as conn:
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchall()
+    return removed, seconds, latencies, size_before, file_size(path), db
+
+def time_query(db, start, repeats=5):
+    """Best time in ms of fetching one day of events, and the row count"""
+    best = None
+    for _ in range(repeats):
+        begin = time.perf_counter()
+        rows = list(db.iter_events(start=start, end=start + DAY_SECONDS))
+        elapsed = 1000.0 * (time.perf_counter() - begin)
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--days', type=int, default=60)
+    parser.add_argument('--keep', type=int, default=30, help='days of events to keep')
+    args = parser.parse_args()
+    
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for strategy in ('single DELETE', 'batched retention'):
+            removed, seconds, latencies, before, after, db = run(
+                strategy, directory, args.rows, args.days, args.keep)
+            p50, p99 = np.percentile(latencies, [50, 99])
+            rows.append((strategy, removed, seconds, len(latencies), p50, p99, max(latencies),
+                         before, after))
+            if strategy == 'batched retention':
+                now = time.time()
+                queries = [('database', time_query(db, now - 2 * DAY_SECONDS)),
+                           ('archive', time_query(db, now - (args.keep + 5) * DAY_SECONDS))]
+            db.close()
+    
+    print_table(f"Removing events older than {args.keep} of {args.days} days "
+                f"({args.rows} events)", rows,
+                ['strategy', 'removed', 'seconds', 'inserts', 'insert p50 ms', 'insert p99 ms',
+                 'insert max ms', 'MB before', 'MB after'])
+    print_table("One day of events read back", [(source, ms, count) for source, (ms, count) in queries],
+                ['source', 'ms', 'events'])
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
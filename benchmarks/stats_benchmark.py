@@ -0,0 +1,85 @@
+"""Latency of hourly event statistics from the rollups versus the raw events table
+
+Run from the repository root:
+    python -m benchmarks.stats_benchmark [--counts 10000 100000 500000] [--queries 50]
+
+Events for 8 cameras are spread over 30 days and inserted in batches
+through Database.insert_events, which keeps the rollups up to date. The
+same question (hourly counts per camera for the whole range) is then
+answered from the rollups and with a GROUP BY over the events table.
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from benchmarks.common import print_table
+from storage.database import Database
+
+CAMERAS = [f"cam-{i}" for i in range(8)]
+SPAN_SECONDS = 30 * 86400
+
+RAW_SQL = '''
+    SELECT CAST(ts / 3600 AS INTEGER) * 3600 AS bucket, camera_id, event_type,
+           COUNT(*), SUM(value)
+    FROM events WHERE ts >= ? AND ts < ?
+    GROUP BY bucket, camera_id, event_type
+'''
+
+def fill(db, count, batch=5000):
+    """Insert count synthetic events; returns seconds spent inserting"""
+    rng = np.random.default_rng(0)
+    elapsed = 0.0
+    for offset in range(0, count, batch):
+        size = min(batch, count - offset)
+        times = rng.uniform(0, SPAN_SECONDS, size)
+        cameras = rng.integers(0, len(CAMERAS), size)
+        events = [{
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(t)),
+            'event_type': 'intrusion_detected',
+            'value': 1,
+            'camera_id': CAMERAS[c],
+        } for t, c in zip(times, cameras)]
+        start = time.perf_counter()
+        db.insert_events(events)
+        elapsed += time.perf_counter() - start
+    return elapsed
+
+def time_query(function, queries):
+    """Mean milliseconds per call"""
+    start = time.perf_counter()
+    for _ in range(queries):
+        function()
+    return 1000.0 * (time.perf_counter() - start) / queries
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--counts', type=int, nargs='+', default=[10000, 100000, 500000])
+    parser.add_argument('--queries', type=int, default=50)
+    args = parser.parse_args()
+    
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for count in args.counts:
+            db = Database(os.path.join(directory, f"stats-{count}.db"))
+            insert_seconds = fill(db, count)
+            
+            def from_rollups():
+                return db.get_stats('hour', 0, SPAN_SECONDS, limit=1000000)
+            
+            def from_events():
+                with db.pool.reader() as conn:
+                    return conn.execute(RAW_SQL, (0, SPAN_SECONDS)).fetchall()
+            
+            if len(from_rollups()) != len(from_events()):
+                raise AssertionError("Rollup and raw bucket counts differ")
+            rollup_ms = time_query(from_rollups, args.queries)
+            raw_ms = time_query(from_events, args.queries)
+            rows.append((count, count / insert_seconds, rollup_ms, raw_ms, raw_ms / rollup_ms))
+            db.close()
+    
+    print_table("Hourly stats per camera over 30 days", rows,
+                ['events', 'insert ev/s', 'rollup ms', 'raw scan ms', 'speedup'])
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
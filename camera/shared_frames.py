@@ -0,0 +1,245 @@
+import contextlib
+import queue
+import signal
+from multiprocessing import shared_memory
+import numpy as np
+from camera.video_stream import VideoStream
+from config.settings import CAPTURE_SHARED_SLOTS, CAPTURE_SHARED_TIMEOUT
+
+class SharedFrameRing:
+    """Fixed-size frame slots in one shared memory block
+    
+    The block starts with one int64 sequence number per slot, followed by
+    the slots, so a process that attaches by name sees the same frames as
+    numpy views without copying. The ring does no locking: ownership of a
+    slot is handed between processes through a FrameChannel.
+    """
+    
+    def __init__(self, shape, dtype=np.uint8, slots=CAPTURE_SHARED_SLOTS, name=None):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.slots = slots
+        header = slots * np.dtype(np.int64).itemsize
+        size = header + slots * int(np.prod(self.shape)) * self.dtype.itemsize
+        self.shm = shared_memory.SharedMemory(name=name, create=name is None, size=size)
+        self.owner = name is None
+        self.seqs = np.ndarray((slots,), np.int64, self.shm.buf)
+        self.frames = np.ndarray((slots,) + self.shape, self.dtype, self.shm.buf, offset=header)
+        if self.owner:
+            self.seqs[:] = -1
+    
+    @property
+    def nbytes(self):
+        """Size of the shared block"""
+        return self.shm.size
+    
+    def describe(self):
+        """Arguments for attach() in another process"""
+        return self.shm.name, self.shape, self.dtype.str, self.slots
+    
+    @classmethod
+    def attach(cls, name, shape, dtype, slots):
+        """Map a ring created by another process"""
+        return cls(shape, dtype, slots, name)
+    
+    def close(self):
+        """Unmap the block; the creating process also removes it"""
+        self.seqs = None
+        self.frames = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # A caller still holds a frame view; the mapping goes with the process
+        if self.owner:
+            with contextlib.suppress(FileNotFoundError):
+                self.shm.unlink()
+
+
+class FrameChannel:
+    """Control channel between a capture process and the process reading its frames
+    
+    Only slot indices travel through the queues: `ready` carries
+    (slot, sequence number, decode time) from the capture process, and
+    `free` carries slots the reader is done with back. The first message
+    on `ready` describes the ring and the last one is None. `skip` holds
+    frames the reader asked the capture process to grab without decoding.
+    """
+    
+    def __init__(self, context, slots=CAPTURE_SHARED_SLOTS):
+        self.slots = slots
+        self.ready = context.Queue()
+        self.free = context.Queue()
+        self.skip = context.Value('i', 0)
+        self.stop = context.Event()
+
+
+def run_capture(source, options, channel):
+    """Decode frames straight into a shared ring until stopped (executes in the capture process)
+    
+    Files wait for a free slot so no frame is lost; a live camera that
+    finds every slot still held by the reader grabs and drops the frame
+    instead, so the device never falls behind.
+    """
+    # Shutdown is driven through channel.stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    
+    stream = VideoStream(source, **options)
+    ring = None
+    try:
+        ret, frame = stream.read_frame()
+        if not ret:
+            return
+        ring = SharedFrameRing(frame.shape, frame.dtype, channel.slots)
+        ring.frames[0] = frame
+        ring.seqs[0] = 0
+        channel.ready.put(ring.describe())
+        channel.ready.put((0, 0, stream.last_frame_time))
+        free_slots = list(range(1, channel.slots))
+        seq = 1
+        
+        while not channel.stop.is_set():
+            try:
+                # Collect every slot the reader handed back
+                while True:
+                    free_slots.append(channel.free.get_nowait())
+            except queue.Empty:
+                pass
+            if not free_slots:
+                if stream.is_webcam:
+                    if not stream.cap.grab():
+                        break
+                    seq += 1  # The reader sees the gap as a dropped frame
+                    continue
+                try:
+                    free_slots.append(channel.free.get(timeout=0.1))
+                except queue.Empty:
+                    continue
+            
+            slot = free_slots.pop()
+            with channel.skip.get_lock():
+                skip, channel.skip.value = channel.skip.value, 0
+            ret, _ = stream.read_frame(skip, ring.frames[slot])
+            if not ret:
+                break
+            ring.seqs[slot] = seq
+            channel.ready.put((slot, seq, stream.last_frame_time))
+            seq += 1
+    finally:
+        channel.ready.put(None)
+        stream.release()
+        if ring:
+            # Let the reader map the block before it is removed
+            channel.stop.wait(CAPTURE_SHARED_TIMEOUT)
+            ring.close()
+
+def start_capture_process(context, source, options=None, slots=CAPTURE_SHARED_SLOTS,
+                          name="capture"):
+    """Start a capture process for one source; returns (process, channel)"""
+    channel = FrameChannel(context, slots)
+    process = context.Process(target=run_capture, args=(source, options or {}, channel),
+                              name=name, daemon=True)
+    process.start()
+    return process, channel
+
+
+class SharedFrameStream:
+    """Reads frames decoded by a capture process, without copying them
+    
+    Has the read_frame() and release() interface of VideoStream. The frame
+    returned by read_frame() is a view of a shared slot and stays valid
+    until the next call, which hands the slot back to the capture process;
+    motion detection, contours and the preview all work on that view.
+    Gaps in the sequence numbers are counted as dropped frames. When a
+    process is given, release() also stops it.
+    """
+    
+    def __init__(self, channel, process=None, timeout=CAPTURE_SHARED_TIMEOUT):
+        self.channel = channel
+        self.process = process
+        self.timeout = timeout
+        self.ring = None  # Attached on the first frame
+        self.held_slot = None
+        self.next_seq = 0
+        self.ended = False
+        self.last_frame_time = 0.0  # Monotonic time the last returned frame was decoded
+        
+        # Counters
+        self.frames_received = 0
+        self.dropped_frames = 0
+    
+    def receive(self):
+        """Next message from the capture process, or None when it ended or went silent"""
+        try:
+            message = self.channel.ready.get(timeout=self.timeout)
+        except queue.Empty:
+            print(f"[WARNING] No frame from the capture process for {self.timeout:.0f}s")
+            message = None
+        if message is None:
+            self.ended = True
+        return message
+    
+    def read_frame(self, skip=0):
+        """Return the next shared frame, after dropping skip frames"""
+        if self.held_slot is not None:
+            self.channel.free.put(self.held_slot)
+            self.held_slot = None
+        if self.ended:
+            return False, None
+        
+        if self.ring is None:
+            description = self.receive()
+            if description is None:
+                return False, None
+            self.ring = SharedFrameRing.attach(*description)
+            print(f"[OK] Shared frame ring attached: {self.ring.slots} slots, "
+                  f"{self.ring.nbytes / 1e6:.0f} MB")
+        
+        # Frames already decoded are dropped here, the rest by the capture process
+        while skip:
+            try:
+                message = self.channel.ready.get_nowait()
+            except queue.Empty:
+                break
+            if message is None:
+                self.ended = True
+                return False, None
+            self.channel.free.put(message[0])
+            skip -= 1
+        if skip:
+            with self.channel.skip.get_lock():
+                self.channel.skip.value += skip
+        
+        message = self.receive()
+        if message is None:
+            return False, None
+        slot, seq, decode_time = message
+        if self.ring.seqs[slot] != seq:
+            raise RuntimeError(f"Shared frame slot {slot} holds frame {self.ring.seqs[slot]}, "
+                               f"expected {seq}")
+        self.dropped_frames += max(0, seq - self.next_seq)
+        self.next_seq = seq + 1
+        self.frames_received += 1
+        self.held_slot = slot
+        self.last_frame_time = decode_time
+        return True, self.ring.frames[slot]
+    
+    def get_stats(self):
+        """Get transport counters"""
+        return {
+            'frames_received': self.frames_received,
+            'dropped_frames': self.dropped_frames,
+            'queue_depth': self.channel.ready.qsize(),
+        }
+    
+    def release(self):
+        """Detach from the ring and stop the capture process if this stream owns it"""
+        self.channel.stop.set()
+        if self.process is not None:
+            self.process.join(timeout=5.0)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join()
+        if self.ring:
+            self.ring.close()
+        print(f"Shared capture stats: {self.frames_received} received, "
+              f"{self.dropped_frames} dropped")
\ No newline at end of file
@@ -1,35 +1,304 @@
+import threading
+import time
 import cv2
-from config.settings import VIDEO_SOURCE, FRAME_WIDTH, FRAME_HEIGHT
+from config.settings import (VIDEO_SOURCE, FRAME_WIDTH, FRAME_HEIGHT,
+                             CAPTURE_QUEUE_SIZE, CAPTURE_QUEUE_POLICY, CAPTURE_BACKEND,
+                             CAPTURE_DECODE_THREADS, CAPTURE_HW_ACCELERATION, CAPTURE_RESOLUTION,
+                             CAPTURE_FRAME_STRIDE)
+
+# OpenCV capture backends by setting name
+CAPTURE_BACKENDS = {
+    'auto': cv2.CAP_ANY,
+    'ffmpeg': cv2.CAP_FFMPEG,
+    'v4l2': cv2.CAP_V4L2,
+    'gstreamer': cv2.CAP_GSTREAMER,
+}
+
+# Hardware decode acceleration by setting name
+HW_ACCELERATIONS = {
+    'none': cv2.VIDEO_ACCELERATION_NONE,
+    'any': cv2.VIDEO_ACCELERATION_ANY,
+    'vaapi': cv2.VIDEO_ACCELERATION_VAAPI,
+    'd3d11': cv2.VIDEO_ACCELERATION_D3D11,
+    'mfx': cv2.VIDEO_ACCELERATION_MFX,
+}
+
+def stream_options(camera):
+    """Capture options of a camera definition, falling back to the global settings"""
+    return {
+        'backend': camera.get('capture_backend', CAPTURE_BACKEND),
+        'decode_threads': camera.get('decode_threads', CAPTURE_DECODE_THREADS),
+        'hw_acceleration': camera.get('hw_acceleration', CAPTURE_HW_ACCELERATION),
+        'resolution': camera.get('capture_resolution', CAPTURE_RESOLUTION),
+        'frame_stride': camera.get('frame_stride', CAPTURE_FRAME_STRIDE),
+    }
+
 
 class VideoStream:
-    """Handles video input from webcam or video file"""
+    """Handles video input from webcam or video file
+    
+    The capture backend, decoder thread count and hardware acceleration are
+    passed to OpenCV when the source is opened; options the backend rejects
+    are dropped with a warning rather than failing the camera. A requested
+    resolution is asked of the device first (webcams scale in hardware);
+    sources that keep their native size (most files and network streams)
+    are resized after decoding, so frames always have the requested size
+    and perimeter coordinates refer to it.
+    
+    With frame_stride N only every Nth frame is decoded to an image; the
+    others are grab()bed, which demuxes and decodes them (needed for the
+    next frames of a compressed stream) but skips colour conversion and the
+    copy out of the decoder. read_frame(skip) does the same for a number of
+    extra frames chosen by the caller at run time.
+    """
+    
+    def __init__(self, source=VIDEO_SOURCE, backend=CAPTURE_BACKEND,
+                 decode_threads=CAPTURE_DECODE_THREADS, hw_acceleration=CAPTURE_HW_ACCELERATION,
+                 resolution=CAPTURE_RESOLUTION, frame_stride=CAPTURE_FRAME_STRIDE):
+        if backend not in CAPTURE_BACKENDS:
+            raise ValueError(f"Unknown capture backend: {backend}")
+        if hw_acceleration not in HW_ACCELERATIONS:
+            raise ValueError(f"Unknown hardware acceleration: {hw_acceleration}")
+        if frame_stride < 1:
+            raise ValueError(f"Frame stride must be at least 1: {frame_stride}")
+        
+        self.source = source
+        self.is_webcam = (source == 0)
+        self.frame_stride = frame_stride
+        self.cap = self._open(CAPTURE_BACKENDS[backend], decode_threads,
+                              HW_ACCELERATIONS[hw_acceleration])
+        
+        # Webcams default to the configured frame size
+        if resolution is None and self.is_webcam:
+            resolution = (FRAME_WIDTH, FRAME_HEIGHT)
+        self.resolution = None  # Size frames are resized to after decoding, if any
+        if resolution is not None:
+            self._negotiate_resolution(tuple(resolution))
+        self.decoded = None  # Decoder output buffer when frames are resized afterwards
+        
+        self.last_frame_time = 0.0  # Monotonic time the last returned frame was decoded
+        print(f"Video stream initialized: {'Webcam' if self.is_webcam else 'Video File'} "
+              f"({self.cap.getBackendName()})")
     
-    def __init__(self):
-        self.cap = cv2.VideoCapture(VIDEO_SOURCE)
-        if not self.cap.isOpened():
-            raise RuntimeError(f"Cannot open video source: {VIDEO_SOURCE}")
+    def _open(self, api, decode_threads, hw_acceleration):
+        """Open the source with the given backend and decoder options"""
+        params = []
+        if hw_acceleration != cv2.VIDEO_ACCELERATION_NONE:
+            params += [cv2.CAP_PROP_HW_ACCELERATION, hw_acceleration]
+        if decode_threads:
+            params += [cv2.CAP_PROP_N_THREADS, decode_threads]
         
-        # Set frame dimensions for webcam
-        if VIDEO_SOURCE == 0:
-            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_WIDTH)
-            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_HEIGHT)
+        cap = cv2.VideoCapture(self.source, api, params)
+        if not cap.isOpened() and params:
+            print(f"[WARNING] Capture options rejected for {self.source}, opening with defaults")
+            cap = cv2.VideoCapture(self.source, api)
+        if not cap.isOpened():
+            raise RuntimeError(f"Cannot open video source: {self.source}")
         
-        self.is_webcam = (VIDEO_SOURCE == 0)
-        print(f"Video stream initialized: {'Webcam' if self.is_webcam else 'Video File'}")
+        if hw_acceleration != cv2.VIDEO_ACCELERATION_NONE:
+            if cap.get(cv2.CAP_PROP_HW_ACCELERATION) == cv2.VIDEO_ACCELERATION_NONE:
+                print("[WARNING] Hardware decoding unavailable, using software decoding")
+            else:
+                print("[OK] Hardware decoding enabled")
+        return cap
+    
+    def _negotiate_resolution(self, resolution):
+        """Ask the source for a frame size; resize in software if it does not comply"""
+        width, height = resolution
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        delivered = (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                     int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        if delivered == resolution:
+            print(f"[OK] Source delivers {width}x{height}")
+        else:
+            self.resolution = resolution
+            print(f"[WARNING] Source delivers {delivered[0]}x{delivered[1]}, "
+                  f"resizing to {width}x{height} after decoding")
+    
+    def read_frame(self, skip=0, buffer=None):
+        """Read a single frame from video source, first dropping skip frames undecoded
+        
+        When a buffer of the frame's shape is given, the frame is decoded
+        into it instead of a new array.
+        """
+        ret, frame = self._read_into(buffer, skip)
+        self.last_frame_time = time.monotonic()
+        return ret, frame
     
-    def read_frame(self):
-        """Read a single frame from video source"""
-        ret, frame = self.cap.read()
+    def _grab(self):
+        """Advance one frame without retrieving it"""
+        if self.cap.grab():
+            return True
+        
+        # Handle video file end by looping
+        if not self.is_webcam:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            return self.cap.grab()
+        return False
+    
+    def _read_into(self, buffer, skip=0):
+        """Decode the next frame, into buffer when one is given"""
+        for _ in range(skip + self.frame_stride - 1):
+            if not self._grab():
+                return False, None
+        
+        ret, frame = self._retrieve(buffer)
         
         # Handle video file end by looping
         if not ret and not self.is_webcam:
             self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-            ret, frame = self.cap.read()
+            ret, frame = self._retrieve(buffer)
         
         return ret, frame
     
+    def _retrieve(self, buffer):
+        """Decode one frame at the output resolution"""
+        if self.resolution is None:
+            return self.cap.read(buffer)
+        ret, self.decoded = self.cap.read(self.decoded)
+        if not ret:
+            return False, None
+        return True, cv2.resize(self.decoded, self.resolution, dst=buffer,
+                                interpolation=cv2.INTER_AREA)
+    
     def release(self):
         """Release video capture resources"""
         self.cap.release()
         print("Video stream released")
-        
\ No newline at end of file
+
+
+class ThreadedVideoStream(VideoStream):
+    """Decodes frames on a background thread into a bounded ring of buffers
+    
+    The ring holds CAPTURE_QUEUE_SIZE frame buffers, each allocated on its
+    first decode and reused for every later frame. With the
+    "drop_oldest" policy the reader overwrites the oldest queued frame when
+    the consumer falls behind, so read_frame() always returns the freshest
+    frame. With "block" the reader waits for a free slot and no frame is
+    ever skipped. A frame returned by read_frame() stays valid until the
+    next call.
+    """
+    
+    def __init__(self, source=VIDEO_SOURCE, queue_size=CAPTURE_QUEUE_SIZE,
+                 policy=CAPTURE_QUEUE_POLICY, **options):
+        super().__init__(source, **options)
+        if queue_size < 2:
+            raise ValueError("Capture queue needs at least 2 slots")
+        if policy == "auto":
+            policy = "drop_oldest" if self.is_webcam else "block"
+        if policy not in ("drop_oldest", "block"):
+            raise ValueError(f"Unknown capture queue policy: {policy}")
+        
+        self.policy = policy
+        self.queue_size = queue_size
+        self.slots = [None] * queue_size
+        self.slot_times = [0.0] * queue_size  # Decode time of each slot
+        self.free_slots = list(range(queue_size))
+        self.ready_slots = []  # Decoded slots, oldest first
+        self.held_slot = None  # Slot currently owned by the consumer
+        self.pending_skip = 0  # Frames the reader should grab without decoding
+        self.stream_ended = False
+        
+        # Counters
+        self.frames_captured = 0
+        self.dropped_frames = 0
+        self.max_queue_depth = 0
+        
+        self.condition = threading.Condition()
+        self.stopped = False
+        self.thread = threading.Thread(target=self._reader, daemon=True)
+        self.thread.start()
+        print(f"Threaded capture started: {queue_size} slots, policy={policy}")
+    
+    @property
+    def queue_depth(self):
+        """Number of decoded frames waiting for the consumer"""
+        return len(self.ready_slots)
+    
+    def _acquire_slot(self):
+        """Get a slot for the reader to decode into, or None when stopped"""
+        with self.condition:
+            while not self.free_slots:
+                if self.stopped:
+                    return None
+                if self.policy == "drop_oldest" and self.ready_slots:
+                    self.dropped_frames += 1
+                    return self.ready_slots.pop(0)
+                self.condition.wait(0.1)
+            return self.free_slots.pop()
+    
+    def _reader(self):
+        """Background loop decoding frames into the ring"""
+        while not self.stopped:
+            slot = self._acquire_slot()
+            if slot is None:
+                break
+            
+            with self.condition:
+                skip, self.pending_skip = self.pending_skip, 0
+            ret, frame = self._read_into(self.slots[slot], skip)
+            
+            with self.condition:
+                if not ret:
+                    self.free_slots.append(slot)
+                    self.stream_ended = True
+                    self.condition.notify_all()
+                    break
+                # Keep the decoded array as the slot buffer (allocated once)
+                self.slots[slot] = frame
+                self.slot_times[slot] = time.monotonic()
+                self.ready_slots.append(slot)
+                self.frames_captured += 1
+                self.max_queue_depth = max(self.max_queue_depth, len(self.ready_slots))
+                self.condition.notify_all()
+    
+    def read_frame(self, skip=0):
+        """Return the next decoded frame from the ring, after dropping skip frames
+        
+        Skipped frames already in the ring are discarded; the rest are
+        grabbed without decoding by the reader.
+        """
+        with self.condition:
+            # Hand the previously returned slot back to the reader
+            if self.held_slot is not None:
+                self.free_slots.append(self.held_slot)
+                self.held_slot = None
+                self.condition.notify_all()
+            
+            while skip and self.ready_slots:
+                self.free_slots.append(self.ready_slots.pop(0))
+                skip -= 1
+            if skip:
+                self.pending_skip += skip
+                self.condition.notify_all()
+            
+            while not self.ready_slots:
+                if self.stream_ended or self.stopped:
+                    return False, None
+                self.condition.wait(0.1)
+            
+            self.held_slot = self.ready_slots.pop(0)
+            self.last_frame_time = self.slot_times[self.held_slot]
+            return True, self.slots[self.held_slot]
+    
+    def get_stats(self):
+        """Get capture counters"""
+        with self.condition:
+            return {
+                'frames_captured': self.frames_captured,
+                'dropped_frames': self.dropped_frames,
+                'queue_depth': len(self.ready_slots),
+                'max_queue_depth': self.max_queue_depth,
+            }
+    
+    def release(self):
+        """Stop the reader thread and release capture resources"""
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+        self.thread.join(timeout=2.0)
+        stats = self.get_stats()
+        print(f"Capture stats: {stats['frames_captured']} captured, "
+              f"{stats['dropped_frames']} dropped, max queue depth {stats['max_queue_depth']}")
+        super().release()
\ No newline at end of file
@@ -0,0 +1,201 @@
+import json
+import os
+import threading
+from types import MappingProxyType
+from processing.perimeter import Perimeter
+from config.settings import (MOTION_THRESHOLD, BLUR_KERNEL, MIN_CONTOUR_AREA, PERIMETER_LINE,
+                             PERIMETER_ZONES, MAX_TRACKING_DISTANCE, MAX_DISAPPEARED,
+                             EVENT_COOLDOWN, RUNTIME_CONFIG_PATH, RUNTIME_CONFIG_POLL)
+
+# Camera keys that can change while the pipeline runs, with their global defaults
+RUNTIME_DEFAULTS = {
+    'motion_threshold': MOTION_THRESHOLD,
+    'blur_kernel': BLUR_KERNEL,
+    'min_contour_area': MIN_CONTOUR_AREA,
+    'perimeter_line': PERIMETER_LINE,
+    'perimeter_zones': PERIMETER_ZONES,
+    'max_tracking_distance': MAX_TRACKING_DISTANCE,
+    'max_disappeared': MAX_DISAPPEARED,
+    'event_cooldown': EVENT_COOLDOWN,
+}
+
+# Overrides file section applied to every camera (and to main.py's camera)
+DEFAULT_SECTION = "default"
+
+# One lock per process for read-modify-write of the overrides file
+file_lock = threading.Lock()
+
+def positive_number(key, value):
+    """Reject anything but a positive int or float"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+        raise ValueError(f"{key} must be a positive number: {value!r}")
+    return value
+
+def normalize_value(key, value):
+    """Validated value of one runtime key, with lists turned into tuples"""
+    if key in ('motion_threshold', 'min_contour_area', 'max_tracking_distance'):
+        return positive_number(key, value)
+    if key == 'event_cooldown':
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+            raise ValueError(f"{key} must be a number of seconds: {value!r}")
+        return value
+    if key == 'max_disappeared':
+        if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+            raise ValueError(f"{key} must be a number of frames: {value!r}")
+        return value
+    if key == 'blur_kernel':
+        if (not isinstance(value, (list, tuple)) or len(value) != 2
+                or not all(isinstance(k, int) and k > 0 and k % 2 == 1 for k in value)):
+            raise ValueError(f"{key} must be two odd positive integers: {value!r}")
+        return tuple(value)
+    if key == 'perimeter_line':
+        if (not isinstance(value, (list, tuple)) or len(value) != 4
+                or not all(isinstance(v, (int, float)) for v in value)):
+            raise ValueError(f"{key} must be (x1, y1, x2, y2): {value!r}")
+        return tuple(value)
+    if key == 'perimeter_zones':
+        if value is not None:
+            Perimeter(value)  # Raises ValueError for invalid zones
+        return value
+    raise ValueError(f"Unknown runtime setting: {key}")
+
+def normalize_changes(changes):
+    """Validate a {key: value} dict of overrides; None values are kept (they remove one)"""
+    if not isinstance(changes, dict):
+        raise ValueError("Expected an object of settings")
+    return {key: None if value is None else normalize_value(key, value)
+            for key, value in changes.items()}
+
+def read_overrides(path=RUNTIME_CONFIG_PATH):
+    """Overrides file contents: {section: {key: value}}; empty when there is no file"""
+    try:
+        with open(path) as f:
+            overrides = json.load(f)
+    except FileNotFoundError:
+        return {}
+    if not isinstance(overrides, dict) or not all(isinstance(v, dict) for v in overrides.values()):
+        raise ValueError(f"{path} must map camera IDs to objects of settings")
+    return overrides
+
+def update_overrides(section, changes, path=RUNTIME_CONFIG_PATH):
+    """Merge validated changes into one section of the overrides file; returns the section
+    
+    A None value removes the override, so the camera falls back to its
+    definition in config/settings.py. The file is replaced atomically, so
+    watchers never read it half written.
+    """
+    changes = normalize_changes(changes)
+    with file_lock:
+        overrides = read_overrides(path)
+        merged = dict(overrides.get(section, {}))
+        for key, value in changes.items():
+            if value is None:
+                merged.pop(key, None)
+            else:
+                merged[key] = value
+        if merged:
+            overrides[section] = merged
+        else:
+            overrides.pop(section, None)
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(overrides, f, indent=2)
+        os.replace(tmp_path, path)
+    return merged
+
+
+class CameraConfig:
+    """Immutable snapshot of one camera's runtime settings
+    
+    A new snapshot is built for every change and never modified, so a
+    reader holding one sees a consistent set of values.
+    """
+    
+    def __init__(self, version, values):
+        self.version = version
+        self.values = MappingProxyType(dict(values))
+    
+    def __getitem__(self, key):
+        return self.values[key]
+    
+    def changed_keys(self, other):
+        """Keys whose value differs from another snapshot"""
+        return {key for key, value in self.values.items() if other.values.get(key) != value}
+
+
+class RuntimeConfig:
+    """Current runtime settings of one camera, reloaded when the overrides file changes
+    
+    Values are layered: global settings, then the camera definition, then
+    the "default" and camera sections of the overrides file (written by
+    the /api/config endpoint or by hand). A watcher thread polls the file;
+    on a change it builds a new CameraConfig and replaces `current` in a
+    single assignment. The frame loop only reads `current`, without
+    locks, and compares it by identity to know when to reconfigure.
+    An invalid file is reported and the previous snapshot stays active.
+    """
+    
+    def __init__(self, camera=None, path=RUNTIME_CONFIG_PATH, poll_interval=RUNTIME_CONFIG_POLL):
+        self.camera = camera or {}
+        self.camera_id = self.camera.get('camera_id')
+        self.path = path
+        self.poll_interval = poll_interval
+        self.file_state = None  # (mtime_ns, size) of the last file read
+        self.lock = threading.Lock()  # Serializes reloads; readers never take it
+        self.stopped = threading.Event()
+        self.thread = None
+        self.current = CameraConfig(0, self.build({}))
+        self.reload()
+    
+    def build(self, overrides):
+        """Resolved values for this camera from the overrides file contents"""
+        values = {key: self.camera.get(key, default) for key, default in RUNTIME_DEFAULTS.items()}
+        for section in (DEFAULT_SECTION, self.camera_id):
+            changes = normalize_changes(overrides.get(section, {}))
+            values.update((key, value) for key, value in changes.items() if value is not None)
+        return {key: value if value is None else normalize_value(key, value)
+                for key, value in values.items()}
+    
+    def reload(self):
+        """Read the overrides file if it changed; returns True when a new snapshot was published"""
+        with self.lock:
+            try:
+                stat = os.stat(self.path)
+                file_state = (stat.st_mtime_ns, stat.st_size)
+            except FileNotFoundError:
+                file_state = None
+            if file_state == self.file_state:
+                return False
+            self.file_state = file_state
+            
+            try:
+                values = self.build(read_overrides(self.path))
+            except (OSError, ValueError) as e:
+                print(f"[WARNING] Ignoring runtime config {self.path}: {e}")
+                return False
+            current = self.current
+            if dict(current.values) == values:
+                return False
+            self.current = CameraConfig(current.version + 1, values)
+            return True
+    
+    def start(self):
+        """Start watching the overrides file"""
+        self.thread = threading.Thread(target=self.watch, name="config-watch", daemon=True)
+        self.thread.start()
+        return self
+    
+    def watch(self):
+        """Watcher thread: poll the file until stopped"""
+        while not self.stopped.wait(self.poll_interval):
+            self.reload()
+    
+    def stop(self):
+        """Stop the watcher thread"""
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
\ No newline at end of file
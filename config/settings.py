@@ -4,6 +4,23 @@
 
 VIDEO_SOURCE = "data/Video1.mp4"  # Change to 0 for webcam
 
+# Background capture: decode on a reader thread into a bounded frame ring
+CAPTURE_THREADED = False
+CAPTURE_QUEUE_SIZE = 4
+CAPTURE_QUEUE_POLICY = "auto"  # "drop_oldest", "block", or "auto" (drop for webcam, block for files)
+
+# Process capture (camera/shared_frames.py): decode in a separate process, frames in shared memory
+CAPTURE_PROCESS = False  # Takes precedence over CAPTURE_THREADED
+CAPTURE_SHARED_SLOTS = 4  # Frame slots in the shared ring (4 x 2.7 MB at 720p)
+CAPTURE_SHARED_TIMEOUT = 10.0  # Seconds without a frame before the capture process counts as lost
+
+# Decoding (camera/video_stream.py); cameras override these with lowercase keys
+CAPTURE_BACKEND = "auto"  # "auto", "ffmpeg", "v4l2" or "gstreamer"
+CAPTURE_DECODE_THREADS = 0  # Decoder threads (FFmpeg); 0 = backend default
+CAPTURE_HW_ACCELERATION = "none"  # "none", "any", "vaapi", "d3d11" or "mfx"; falls back to software
+CAPTURE_RESOLUTION = None  # (width, height) to request; None = native (FRAME_WIDTH x FRAME_HEIGHT for webcams)
+CAPTURE_FRAME_STRIDE = 1  # Decode every Nth frame; the others are grabbed without decoding to an image
+
 ## Frame processing
 FRAME_WIDTH = 640
 FRAME_HEIGHT = 480
@@ -11,30 +28,136 @@ FRAME_HEIGHT = 480
 # Motion detection
 BLUR_KERNEL = (21, 21)
 MOTION_THRESHOLD = 25
+MOTION_PROCESSING_SCALE = 1.0  # Run motion detection on a downscaled frame (e.g. 0.5)
+MOTION_ROI_MARGIN = None  # Pixels above and below the perimeter line to analyze; None = full frame
+                          # Keep it larger than the objects so they are tracked before crossing
+MOTION_PREALLOCATE_BUFFERS = False  # Reuse per-stage output buffers instead of allocating per frame
+MOTION_ENGINE = "frame_diff"  # "frame_diff", "running_average", "mog2" or "knn"
+BACKGROUND_ALPHA = 0.05  # running_average: weight of each new frame in the background model
+BACKGROUND_HISTORY = 500  # mog2 / knn: frames of history in the background model
+MOG2_VAR_THRESHOLD = 16  # mog2: squared Mahalanobis distance for foreground
+KNN_DIST2_THRESHOLD = 400.0  # knn: squared distance for foreground
+
+# Motion gate (processing/motion_gate.py): skip the detection stages on static frames
+MOTION_GATE = False  # Test a thumbnail first; static frames skip motion, contours and tracking
+MOTION_GATE_SIZE = (32, 24)  # Thumbnail (width, height) for the change test
+MOTION_GATE_THRESHOLD = 8  # Gray-level change of any thumbnail cell that counts as activity
+MOTION_GATE_IDLE_FRAMES = 50  # Static frames in a row before the gate goes idle
+MOTION_GATE_IDLE_STRIDE = 5  # While idle, test only every Nth frame (1 = test every frame)
 
 # Contours
 MIN_CONTOUR_AREA = 2500
+CONTOUR_BACKEND = "contours"  # "contours" (findContours) or "components" (connectedComponentsWithStats)
 
 # Bottom-left perimeter line
 PERIMETER_LINE = (40, 430, 600, 430)
 
+# Perimeter zones; None uses PERIMETER_LINE as a full-width horizontal line.
+# Each zone: {"name": ..., "type": "line" | "polyline" | "polygon", "points": [(x, y), ...]}
+PERIMETER_ZONES = None
+
 # Tracking
 MAX_DISAPPEARED = 30
 MAX_TRACKING_DISTANCE = 80
+TRACKER_MATCHER = "greedy"  # "greedy", "hungarian" (optimal, gated) or "sparse" (KD-tree, large scenes)
 
 
 # Event cooldown per object (seconds)
 EVENT_COOLDOWN = 3.0
 
+# Runtime config (config/runtime.py): retune thresholds and perimeters without restarting
+RUNTIME_CONFIG = False  # Watch RUNTIME_CONFIG_PATH and apply changes to the running pipelines
+RUNTIME_CONFIG_PATH = "data/runtime_config.json"  # Overrides by camera ID, written by PUT /api/config
+RUNTIME_CONFIG_POLL = 1.0  # Seconds between checks of the overrides file
+
+# Multi-camera supervisor (supervisor.py)
+# Each camera runs its own pipeline in a worker process. Any threshold left
+# out of a definition falls back to the global setting above.
+CAMERAS = [
+    {
+        "camera_id": "cam-1",
+        "source": VIDEO_SOURCE,
+        "perimeter_line": PERIMETER_LINE,
+        "motion_threshold": MOTION_THRESHOLD,
+        "min_contour_area": MIN_CONTOUR_AREA,
+        "motion_engine": MOTION_ENGINE,
+    },
+]
+SUPERVISOR_REPORT_INTERVAL = 5.0  # Seconds between per-camera stats reports
+SUPERVISOR_RESTART_DELAY = 1.0  # Initial delay before restarting a crashed worker
+SUPERVISOR_MAX_RESTART_DELAY = 30.0  # Cap for the exponential restart backoff
+
+# Offline video analysis (analyze.py)
+ANALYZE_SEGMENT_SECONDS = 60.0  # Length of the video segment each worker process analyzes
+ANALYZE_OVERLAP_SECONDS = 2.0  # Video replayed before each segment to warm up motion and tracking
+ANALYZE_STITCH_DISTANCE = 20  # Max pixels between a track's boundary positions in adjacent segments
+
+# Event media (utils/clip_recorder.py): snapshot and pre/post-roll clip per intrusion
+MEDIA_CAPTURE = False  # Keep recent frames in memory and store evidence for every intrusion
+MEDIA_ROOT = "data/media"  # Content-addressed store: files are named by their SHA-256
+MEDIA_RING_FRAMES = 100  # Frames kept per camera; memory = frames x scaled frame size
+MEDIA_SCALE = 0.5  # Size of kept frames relative to the camera frame
+MEDIA_PRE_ROLL_FRAMES = 50  # Frames before the intrusion in each clip (fewer than MEDIA_RING_FRAMES)
+MEDIA_POST_ROLL_FRAMES = 50  # Frames after the intrusion in each clip
+MEDIA_CLIP_FPS = 25  # Playback rate written into clips
+MEDIA_JPEG_QUALITY = 85  # Snapshot and clip (MJPEG) quality
+MEDIA_QUEUE_SIZE = 8  # Intrusions waiting for the writer; further ones get no media
+
 # Backend API settings
 API_URL = "http://localhost:5000/api/events"
+API_BATCH_URL = "http://localhost:5000/api/events/batch"
+API_MAX_BATCH_SIZE = 1000  # Max events accepted per batch request
+API_MAX_PAGE_SIZE = 1000  # Max events per page of GET /api/events
+API_SERVER = "flask"  # "flask": API thread in main.py / supervisor.py; "async": run python -m backend.async_api
+STREAM_QUEUE_SIZE = 256  # Events buffered per /api/events/stream subscriber before it misses events
+STREAM_KEEPALIVE = 15.0  # Seconds between keep-alive comments on an idle event stream
+
+# Event dispatcher (backend/client.py)
+EVENT_QUEUE_SIZE = 1000  # Events held in memory; further events are dropped and counted
+EVENT_BATCH_SIZE = 50  # Max events sent per batch
+EVENT_BATCH_INTERVAL = 0.5  # Seconds to wait for a batch to fill
+EVENT_MAX_RETRIES = 3  # Retries per batch before it is journaled
+EVENT_RETRY_DELAY = 0.5  # Initial retry backoff in seconds (doubles per retry)
+EVENT_REPLAY_INTERVAL = 10.0  # Seconds between reconnect attempts while the API is down
+EVENT_SEND_TIMEOUT = 2.0  # HTTP timeout per request
+EVENT_JOURNAL_PATH = "data/event_journal.ndjson"  # Events kept while the API is unreachable
 
 # Database settings
 DB_PATH = "data/events.db"
+DB_WRITE_BATCH_SIZE = 500  # Events per write transaction
+DB_FLUSH_INTERVAL = 0.05  # Max seconds an accepted event waits before it is written
+DB_MAX_PENDING = 50000  # Accepted events waiting to be written; beyond this the API answers 503
+DB_QUERY_PAGE_SIZE = 1000  # Rows fetched per page when streaming query results
+DB_READER_CONNECTIONS = 4  # Pooled read connections (plus one writer); 0 = reads share the writer
+DB_POOL_TIMEOUT = 5.0  # Seconds to wait for a free pooled connection
+
+# Event retention (storage/retention.py), run by the API server
+RETENTION_DAYS = None  # Move events older than this many days to the archive; None = keep all
+RETENTION_MAX_ROWS = None  # Move the oldest events out beyond this many rows; None = no limit
+RETENTION_INTERVAL = 3600.0  # Seconds between retention passes
+RETENTION_BATCH_SIZE = 500  # Events archived and deleted per write transaction
+RETENTION_PAUSE = 0.05  # Seconds between batches, so event inserts are not held up
+RETENTION_VACUUM_PAGES = 1000  # Free pages returned to the filesystem per incremental vacuum step
+ARCHIVE_ROOT = "data/archive"  # Gzip NDJSON file per UTC day; None = delete without archiving
+ARCHIVE_CACHE_DAYS = 2  # Decoded archive days kept in memory, so paged queries decompress each once
 
 # Display settings
+HEADLESS = False  # Skip all overlay drawing and cv2.imshow (servers without a display)
 SHOW_FPS = True
+SHOW_PROFILE = False  # On-screen per-stage p50/p95 breakdown (needs PROFILE_STAGES)
 LINE_THICKNESS = 3  # Thicker line for better visibility
 FONT_SCALE = 0.7
 FONT_THICKNESS = 2
-ALERT_DURATION = 45  # Frames to show alert
\ No newline at end of file
+ALERT_DURATION = 45  # Frames to show alert
+
+# Per-stage profiling (utils/profiler.py), served as Prometheus text at /metrics
+PROFILE_STAGES = False  # Time each pipeline stage with perf_counter_ns; off = no timing calls
+PROFILE_WINDOW = 1000  # Frames per stage kept for the rolling p50/p95/p99
+
+# Headless preview: annotated frames written on demand while HEADLESS is set
+PREVIEW_MODE = "off"  # "off", "every_n" or "alert" (only while an intrusion alert is shown)
+PREVIEW_EVERY_N = 30
+PREVIEW_TARGET = "file"  # "file" (PREVIEW_PATH) or "mjpeg" (served at /api/preview.mjpg by main.py)
+PREVIEW_PATH = "data/preview.jpg"
+PREVIEW_JPEG_QUALITY = 80
+PREVIEW_STREAM_TIMEOUT = 10.0  # Seconds without a new frame before an MJPEG client is disconnected
\ No newline at end of file
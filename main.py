@@ -1,185 +1,136 @@
 import cv2
-import requests
+import multiprocessing as mp
 import threading
-from camera.video_stream import VideoStream
-from processing.motion_detector import MotionDetector
-from processing.contour_utils import ContourProcessor
-from processing.intrusion_logic import IntrusionDetector
+from camera.shared_frames import SharedFrameStream, start_capture_process
+from camera.video_stream import VideoStream, ThreadedVideoStream
+from processing.pipeline import DetectionPipeline
+from utils.clip_recorder import ClipRecorder
 from utils.event import Event
 from utils.fps import FPSCounter
-from backend.api import run_api
-from config.settings import (API_URL, PERIMETER_LINE, SHOW_FPS, 
-                              FONT_SCALE, FONT_THICKNESS, LINE_THICKNESS, ALERT_DURATION)
-
-def send_event_to_api(event):
-    """Send event to backend API"""
-    try:
-        response = requests.post(API_URL, json=event, timeout=2)
-        if response.status_code == 200:
-            print(f"[OK] Event sent: {event['event_type']} at {event['timestamp']}")
-        else:
-            print(f"[ERROR] Failed to send event: {response.status_code}")
-    except requests.exceptions.RequestException as e:
-        print(f"[WARNING] API connection error: {e}")
-
-def draw_perimeter(frame):
-    """Draw virtual perimeter line on frame"""
-    x1, y1, x2, y2 = PERIMETER_LINE
-    # Draw thick red line
-    cv2.line(frame, (x1, y1), (x2, y2), (0, 0, 255), LINE_THICKNESS)
-    # Add label with background
-    label = "DO NOT CROSS"
-    (text_w, text_h), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, FONT_SCALE, FONT_THICKNESS)
-    cv2.rectangle(frame, (x1, y1 - text_h - 10), (x1 + text_w + 10, y1), (0, 0, 255), -1)
-    cv2.putText(frame, label, (x1 + 5, y1 - 5), cv2.FONT_HERSHEY_SIMPLEX, 
-                FONT_SCALE, (255, 255, 255), FONT_THICKNESS)
-
-def draw_tracked_objects(frame, objects):
-    """Draw tracked objects with IDs"""
-    for object_id, centroid in objects.items():
-        # Draw centroid as large circle
-        cx, cy = int(centroid[0]), int(centroid[1])
-        cv2.circle(frame, (cx, cy), 8, (0, 255, 255), -1)
-        cv2.circle(frame, (cx, cy), 10, (255, 0, 0), 2)
-        
-        # Draw object ID
-        text = f"ID: {object_id}"
-        cv2.putText(frame, text, (cx - 30, cy - 15), cv2.FONT_HERSHEY_SIMPLEX,
-                    0.6, (0, 255, 255), 2)
-
-def draw_contours(frame, contours):
-    """Draw detected motion contours"""
-    cv2.drawContours(frame, contours, -1, (0, 255, 0), 2)
-
-def draw_fps(frame, fps):
-    """Draw FPS counter on frame"""
-    fps_text = f"FPS: {fps}"
-    cv2.rectangle(frame, (5, 5), (120, 40), (0, 0, 0), -1)
-    cv2.putText(frame, fps_text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX,
-                0.7, (0, 255, 0), 2)
-
-def draw_intrusion_alert(frame, object_id):
-    """Draw intrusion alert banner"""
-    h, w = frame.shape[:2]
-    # Draw red banner at top
-    cv2.rectangle(frame, (0, 0), (w, 80), (0, 0, 255), -1)
-    cv2.rectangle(frame, (0, 0), (w, 80), (255, 255, 255), 3)
-    
-    # Alert text
-    alert_text = "!!! INTRUSION DETECTED !!!"
-    (text_w, text_h), _ = cv2.getTextSize(alert_text, cv2.FONT_HERSHEY_SIMPLEX, 1.2, 3)
-    cv2.putText(frame, alert_text, ((w - text_w) // 2, 35), 
-                cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255, 255, 255), 3)
-    
-    # Object ID
-    id_text = f"Object #{object_id} crossed perimeter"
-    (id_w, id_h), _ = cv2.getTextSize(id_text, cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2)
-    cv2.putText(frame, id_text, ((w - id_w) // 2, 65), 
-                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-
-def draw_status(frame, motion_detected, objects_count):
-    """Draw system status"""
-    h, w = frame.shape[:2]
-    # Status background
-    cv2.rectangle(frame, (w - 280, 5), (w - 5, 85), (0, 0, 0), -1)
-    cv2.rectangle(frame, (w - 280, 5), (w - 5, 85), (255, 255, 255), 2)
-    
-    # Motion status
-    motion_status = "Motion: YES" if motion_detected else "Motion: NO"
-    motion_color = (0, 255, 0) if motion_detected else (100, 100, 100)
-    cv2.putText(frame, motion_status, (w - 270, 30), 
-                cv2.FONT_HERSHEY_SIMPLEX, 0.6, motion_color, 2)
-    
-    # Objects tracked
-    obj_text = f"Tracking: {objects_count} objects"
-    cv2.putText(frame, obj_text, (w - 270, 55), 
-                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-    
-    # Instructions
-    cv2.putText(frame, "Press 'Q' to quit", (w - 270, 75), 
-                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
+from utils.memory import peak_rss_mb
+from utils.overlay import annotate_frame
+from utils.preview import PreviewWriter
+from utils.profiler import StageProfiler, metrics_registry
+from backend.client import EventDispatcher
+from config.runtime import RuntimeConfig
+from config.settings import (SHOW_FPS, VIDEO_SOURCE, CAPTURE_PROCESS, CAPTURE_THREADED,
+                             ALERT_DURATION, HEADLESS, API_SERVER, PROFILE_STAGES, SHOW_PROFILE,
+                             MEDIA_CAPTURE, RUNTIME_CONFIG)
 
 def main():
     """Main application loop"""
-    # Start Flask API in separate thread
-    api_thread = threading.Thread(target=run_api, daemon=True)
-    api_thread.start()
+    # Start Flask API in separate thread (the async API runs as its own process).
+    # Imported here so the spawned capture process does not open the API database
+    # when it imports this module.
+    if API_SERVER == "flask":
+        from backend.api import run_api
+        api_thread = threading.Thread(target=run_api, daemon=True)
+        api_thread.start()
     
     # Initialize components
-    video_stream = VideoStream()
-    motion_detector = MotionDetector()
-    contour_processor = ContourProcessor()
-    intrusion_detector = IntrusionDetector()
+    if CAPTURE_PROCESS:
+        process, channel = start_capture_process(mp.get_context('spawn'), VIDEO_SOURCE)
+        video_stream = SharedFrameStream(channel, process)
+    elif CAPTURE_THREADED:
+        video_stream = ThreadedVideoStream()
+    else:
+        video_stream = VideoStream()
+    profiler = StageProfiler() if PROFILE_STAGES else None
+    if profiler:
+        metrics_registry.register(profiler)
+    runtime = RuntimeConfig().start() if RUNTIME_CONFIG else None
+    pipeline = DetectionPipeline(profiler=profiler, runtime=runtime)
     fps_counter = FPSCounter()
+    preview = PreviewWriter()
+    dispatcher = EventDispatcher().start()
+    recorder = ClipRecorder().start() if MEDIA_CAPTURE else None
     
     print("\n" + "="*60)
     print("VIRTUAL PERIMETER INTRUSION DETECTION SYSTEM")
     print("="*60)
     print("Video Source: Initialized")
-    print("API Server: Running on http://localhost:5000")
+    print(f"API Server: http://localhost:5000 ({API_SERVER})")
     print("Perimeter Line: Active")
-    print("Press 'Q' to quit")
+    if HEADLESS:
+        print(f"Headless: overlays off, preview mode '{preview.mode}'")
+        print("Press Ctrl+C to quit")
+    else:
+        print("Press 'Q' to quit")
     print("="*60 + "\n")
     
     alert_frames_remaining = 0
     alert_object_id = None
+    frame_index = 0
+    profile_summary = None
     
     try:
         while True:
             # Read frame from video source
-            ret, frame = video_stream.read_frame()
+            if profiler:
+                start = profiler.start()
+            # While the motion gate is idle, frames it would skip are not decoded
+            ret, frame = video_stream.read_frame(pipeline.decode_skips())
             if not ret:
                 print("[WARNING] End of video or camera disconnected")
                 break
+            if profiler:
+                start = profiler.lap('read', start)
             
-            # Detect motion
-            motion_mask = motion_detector.detect(frame)
-            motion_detected = False
+            # Keep a copy for intrusion snapshots and clips
+            if recorder:
+                recorder.add(frame)
+                if profiler:
+                    profiler.lap('record', start)
             
-            if motion_mask is not None:
-                # Find contours and centroids
-                centroids, contours = contour_processor.get_centroids(motion_mask)
-                motion_detected = len(centroids) > 0
-                
-                # Update intrusion detector with centroids
-                intrusion, objects, crossed_id = intrusion_detector.update(centroids)
-                
-                # If intrusion detected, create and send event
-                if intrusion:
-                    event = Event.create_intrusion_event()
-                    send_event_to_api(event)
-                    alert_frames_remaining = ALERT_DURATION
-                    alert_object_id = crossed_id
-                
-                # Draw visualizations
-                draw_contours(frame, contours)
-                draw_tracked_objects(frame, objects)
-            else:
-                # Still update tracker even without new detections
-                intrusion_detector.update([])
+            # Detect motion, extract centroids and check the perimeter
+            result = pipeline.process(frame)
             
-            # Draw perimeter line (always visible)
-            draw_perimeter(frame)
+            if profiler:
+                start = profiler.start()
+            # If intrusion detected, create and send one event per crossing
+            if result.intrusion:
+                media_uid = recorder.trigger() if recorder else None
+                for crossing in result.crossings:
+                    event = Event.create_intrusion_event(media_uid=media_uid, zone=crossing.zone,
+                                                         direction=crossing.direction)
+                    dispatcher.submit(event)
+                alert_frames_remaining = ALERT_DURATION
+                alert_object_id = result.crossed_id
+            if profiler:
+                start = profiler.lap('dispatch', start)
             
-            # Show intrusion alert if active
-            if alert_frames_remaining > 0:
-                draw_intrusion_alert(frame, alert_object_id)
+            fps_counter.update()
+            alert_active = alert_frames_remaining > 0
+            if alert_active:
                 alert_frames_remaining -= 1
             
-            # Draw status info
-            objects_count = len(intrusion_detector.tracker.objects)
-            draw_status(frame, motion_detected, objects_count)
-            
-            # Update and draw FPS
-            fps_counter.update()
-            if SHOW_FPS:
-                draw_fps(frame, fps_counter.get_fps())
+            # Draw overlays only when the frame is displayed or previewed
+            preview_due = preview.is_due(frame_index, alert_active)
+            frame_index += 1
+            if not HEADLESS or preview_due:
+                # Percentiles for the on-screen breakdown are refreshed every 30 frames
+                if profiler and SHOW_PROFILE and frame_index % 30 == 1:
+                    profile_summary = profiler.summary()
+                objects_count = len(pipeline.intrusion_detector.tracker.objects)
+                annotate_frame(frame, result, objects_count,
+                               alert_object_id if alert_active else None,
+                               fps_counter.get_fps() if SHOW_FPS else None,
+                               perimeter_line=pipeline.perimeter_line, zones=pipeline.zones,
+                               profile=profile_summary)
+            if preview_due:
+                preview.write(frame)
+            if profiler:
+                start = profiler.lap('draw', start)
+            if HEADLESS:
+                continue
             
             # Display frame
             cv2.imshow('Intrusion Detection System', frame)
             
             # Exit on 'q' or 'Q' key
             key = cv2.waitKey(1) & 0xFF
+            if profiler:
+                profiler.lap('display', start)
             if key == ord('q') or key == ord('Q'):
                 print("\n[STOP] Stopping system...")
                 break
@@ -193,7 +144,34 @@ def main():
     finally:
         # Cleanup
         video_stream.release()
-        cv2.destroyAllWindows()
+        preview.close()
+        if runtime:
+            runtime.stop()
+        if recorder:
+            recorder.stop()
+            media = recorder.get_stats()
+            print(f"Media: {media['written']} file(s) stored for {media['triggered']} intrusion(s), "
+                  f"{media['dropped']} without media, {media['frames_lost']} clip frame(s) lost, "
+                  f"ring {media['ring_mb']:.0f} MB")
+        dispatcher.stop()
+        stats = dispatcher.get_stats()
+        print(f"Events: {stats['sent']} sent, {stats['journaled']} journaled, "
+              f"{stats['dropped']} dropped, {stats['lost']} lost, mean latency {stats['mean_latency_ms']:.0f} ms")
+        if pipeline.gate:
+            gate_stats = pipeline.gate.get_stats()
+            print(f"Motion gate: {gate_stats['skipped']} of {gate_stats['frames']} frames skipped "
+                  f"({gate_stats['skipped_pct']:.0f}%), about {gate_stats['saved_seconds']:.1f} s "
+                  f"CPU saved")
+        if profiler:
+            for stage, stage_stats in profiler.summary().items():
+                print(f"Stage {stage}: p50 {1000 * stage_stats['p50']:.2f} ms, "
+                      f"p95 {1000 * stage_stats['p95']:.2f} ms, "
+                      f"p99 {1000 * stage_stats['p99']:.2f} ms")
+        peak_rss = peak_rss_mb()
+        if peak_rss is not None:
+            print(f"Peak RSS: {peak_rss:.0f} MB")
+        if not HEADLESS:
+            cv2.destroyAllWindows()
         print("[OK] System stopped successfully\n")
 
 if __name__ == "__main__":
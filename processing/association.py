@@ -0,0 +1,95 @@
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from scipy.spatial import cKDTree
+from scipy.spatial import distance as dist
+
+# Association engines match tracked object centroids (rows) to new input
+# centroids (columns). Each returns two equal-length sequences (rows, cols)
+# of matched pairs; pairs farther apart than max_distance are never matched.
+
+def greedy_match(object_centroids, input_centroids, max_distance):
+    """Greedy matching on the full distance matrix (original CentroidTracker behavior)"""
+    # Calculate distance between each pair
+    D = dist.cdist(object_centroids, input_centroids)
+    
+    # Find minimum distances
+    rows = D.min(axis=1).argsort()
+    cols = D.argmin(axis=1)[rows]
+    
+    # Track which rows/cols used
+    used_rows = set()
+    used_cols = set()
+    matched_rows = []
+    matched_cols = []
+    
+    # Match existing objects to new centroids
+    for (row, col) in zip(rows, cols):
+        if row in used_rows or col in used_cols:
+            continue
+        
+        # Check if distance is reasonable
+        if D[row, col] > max_distance:
+            continue
+        
+        used_rows.add(row)
+        used_cols.add(col)
+        matched_rows.append(row)
+        matched_cols.append(col)
+    
+    return matched_rows, matched_cols
+
+def hungarian_match(object_centroids, input_centroids, max_distance):
+    """Optimal assignment (minimum total distance) with distance gating"""
+    D = dist.cdist(object_centroids, input_centroids)
+    gated = D > max_distance
+    
+    # Gated pairs get a cost no feasible assignment can reach, so the solver
+    # first maximizes the number of feasible matches, then minimizes distance
+    cost = np.where(gated, max_distance * (min(D.shape) + 1) + 1.0, D)
+    rows, cols = linear_sum_assignment(cost)
+    
+    keep = ~gated[rows, cols]
+    return rows[keep], cols[keep]
+
+def sparse_match(object_centroids, input_centroids, max_distance):
+    """KD-tree gated matching for large scenes
+    
+    Only pairs within max_distance are ever built, so the cost is
+    O(N log N) plus the number of nearby pairs instead of a full N x M
+    matrix. Candidate pairs are matched greedily, nearest first.
+    """
+    object_tree = cKDTree(object_centroids)
+    input_tree = cKDTree(input_centroids)
+    pairs = object_tree.sparse_distance_matrix(input_tree, max_distance, output_type='ndarray')
+    
+    matched_rows = []
+    matched_cols = []
+    if len(pairs) == 0:
+        return matched_rows, matched_cols
+    
+    used_rows = np.zeros(len(object_centroids), dtype=bool)
+    used_cols = np.zeros(len(input_centroids), dtype=bool)
+    for index in np.argsort(pairs['v'], kind='stable'):
+        row, col = pairs['i'][index], pairs['j'][index]
+        if used_rows[row] or used_cols[col]:
+            continue
+        used_rows[row] = True
+        used_cols[col] = True
+        matched_rows.append(row)
+        matched_cols.append(col)
+    
+    return matched_rows, matched_cols
+
+
+# Matcher name (TRACKER_MATCHER setting) -> association function
+MATCHERS = {
+    'greedy': greedy_match,
+    'hungarian': hungarian_match,
+    'sparse': sparse_match,
+}
+
+def get_matcher(name):
+    """Look up an association engine by name"""
+    if name not in MATCHERS:
+        raise ValueError(f"Unknown tracker matcher: {name} (choose from {', '.join(MATCHERS)})")
+    return MATCHERS[name]
\ No newline at end of file
@@ -1,37 +1,127 @@
 import cv2
-from config.settings import MIN_CONTOUR_AREA
+import numpy as np
+from config.settings import MIN_CONTOUR_AREA, CONTOUR_BACKEND
+
+class ComponentContours:
+    """Contour polygons of kept connected components, traced only when first used
+    
+    Behaves like the list of contours returned by the "contours" backend, so
+    it can be passed straight to cv2.drawContours. Like that backend, it
+    holds outer outlines only: a component nested inside another one (a
+    blob inside a ring) has no polygon of its own, so there can be fewer
+    polygons than kept components.
+    """
+    
+    def __init__(self, labels, kept_labels, scale=1.0, offset=(0, 0)):
+        self.labels = labels
+        self.kept_labels = kept_labels
+        self.scale = scale
+        self.offset = offset
+        self.polygons = None
+    
+    def trace(self):
+        """Trace the outline of every kept component in full-frame coordinates"""
+        if self.polygons is None:
+            if len(self.kept_labels) == 0:
+                self.polygons = []
+            else:
+                mask = np.isin(self.labels, self.kept_labels).astype(np.uint8)
+                contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+                if self.scale != 1.0 or self.offset != (0, 0):
+                    offset = np.array(self.offset)
+                    contours = [(c / self.scale + offset).astype(np.int32) for c in contours]
+                self.polygons = list(contours)
+        return self.polygons
+    
+    def __len__(self):
+        # Count the traced polygons: nested components share their outer outline
+        return len(self.trace())
+    
+    def __getitem__(self, index):
+        return self.trace()[index]
+    
+    def __iter__(self):
+        return iter(self.trace())
+
 
 class ContourProcessor:
-    """Processes contours and calculates centroids"""
+    """Processes contours and calculates centroids
+    
+    Two extraction backends are available:
+    - "contours": findContours, then contourArea and moments per contour
+    - "components": one connectedComponentsWithStats call for all blobs;
+      centroids come back as an N x 2 array and contour polygons are only
+      traced if something (overlay drawing) actually uses them
+    """
+    
+    def __init__(self, min_area=MIN_CONTOUR_AREA, backend=CONTOUR_BACKEND):
+        if backend not in ("contours", "components"):
+            raise ValueError(f"Unknown contour backend: {backend}")
+        self.min_area = min_area
+        self.backend = backend
     
     def find_contours(self, motion_mask):
         """Find contours in motion mask"""
         contours, _ = cv2.findContours(motion_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         return contours
     
-    def filter_contours(self, contours):
+    def filter_contours(self, contours, min_area=None):
         """Filter contours by minimum area"""
-        valid_contours = [c for c in contours if cv2.contourArea(c) >= MIN_CONTOUR_AREA]
+        if min_area is None:
+            min_area = self.min_area
+        valid_contours = [c for c in contours if cv2.contourArea(c) >= min_area]
         return valid_contours
     
-    def calculate_centroid(self, contour):
+    def calculate_centroid(self, contour, scale=1.0, offset=(0, 0)):
         """Calculate centroid (cx, cy) of a contour"""
         M = cv2.moments(contour)
         if M["m00"] == 0:
             return None
-        cx = int(M["m10"] / M["m00"])
-        cy = int(M["m01"] / M["m00"])
+        cx = int(M["m10"] / M["m00"] / scale + offset[0])
+        cy = int(M["m01"] / M["m00"] / scale + offset[1])
         return (cx, cy)
     
-    def get_centroids(self, motion_mask):
-        """Get all valid centroids from motion mask"""
+    def get_centroids(self, motion_mask, scale=1.0, offset=(0, 0)):
+        """Get all valid centroids from motion mask
+        
+        A mask produced at a reduced scale or from a region of interest is
+        mapped back to full-frame coordinates using scale and offset.
+        """
+        if self.backend == "components":
+            return self.get_component_centroids(motion_mask, scale, offset)
+        
         contours = self.find_contours(motion_mask)
-        valid_contours = self.filter_contours(contours)
+        # Areas shrink with the square of the processing scale
+        valid_contours = self.filter_contours(contours, self.min_area * scale * scale)
         
         centroids = []
         for contour in valid_contours:
-            centroid = self.calculate_centroid(contour)
+            centroid = self.calculate_centroid(contour, scale, offset)
             if centroid:
                 centroids.append(centroid)
         
-        return centroids, valid_contours
\ No newline at end of file
+        if scale != 1.0 or offset != (0, 0):
+            valid_contours = [self.to_frame_coords(c, scale, offset) for c in valid_contours]
+        
+        return centroids, valid_contours
+    
+    def get_component_centroids(self, motion_mask, scale=1.0, offset=(0, 0)):
+        """Get centroids (N x 2 int array) of all large enough connected components"""
+        # Grana's block-based labelling is several times faster than the default on motion masks
+        _, labels, stats, centroids = cv2.connectedComponentsWithStatsWithAlgorithm(
+            motion_mask, 8, cv2.CV_32S, cv2.CCL_GRANA)
+        
+        # Label 0 is the background; filter every blob by area in one step
+        areas = stats[1:, cv2.CC_STAT_AREA]
+        kept_labels = np.flatnonzero(areas >= self.min_area * scale * scale) + 1
+        
+        points = centroids[kept_labels]
+        if scale != 1.0:
+            points = points / scale
+        points = (points + np.array(offset)).astype(np.int32)
+        
+        return points, ComponentContours(labels, kept_labels, scale, offset)
+    
+    def to_frame_coords(self, contour, scale, offset):
+        """Map a contour from mask coordinates back to full-frame coordinates"""
+        return (contour / scale + np.array(offset)).astype(np.int32)
\ No newline at end of file
@@ -1,147 +1,215 @@
 import time
 import numpy as np
-from scipy.spatial import distance as dist
-from collections import OrderedDict
-from config.settings import PERIMETER_LINE, EVENT_COOLDOWN, MAX_DISAPPEARED, MAX_TRACKING_DISTANCE
+from collections.abc import Mapping
+from processing.association import get_matcher
+from processing.perimeter import Perimeter, Crossing
+from config.settings import (PERIMETER_LINE, PERIMETER_ZONES, EVENT_COOLDOWN, MAX_DISAPPEARED,
+                             MAX_TRACKING_DISTANCE, TRACKER_MATCHER)
+
+class TrackView(Mapping):
+    """Read-only object ID -> value mapping over one of the tracker's arrays
+    
+    Iterates in registration (object ID) order. Values are views into the
+    tracker's storage and are only valid until the next tracker update.
+    """
+    
+    def __init__(self, tracker, array_name):
+        self.tracker = tracker
+        self.array_name = array_name
+    
+    def __getitem__(self, object_id):
+        slot = self.tracker.slot_of[object_id]
+        return getattr(self.tracker, self.array_name)[slot]
+    
+    def __iter__(self):
+        slots = self.tracker.active_slots()
+        return iter(self.tracker.ids[slots].tolist())
+    
+    def __len__(self):
+        return len(self.tracker.slot_of)
+    
+    def __contains__(self, object_id):
+        return object_id in self.tracker.slot_of
+
 
 class CentroidTracker:
-    """Tracks objects using centroid tracking algorithm"""
+    """Tracks objects using centroid tracking algorithm
+    
+    Track state is kept as a struct of arrays: one slot per track holding its
+    ID, current and previous centroid and missed-frame count. Slots of
+    deregistered tracks are reused, and aging and matching run as array
+    operations over all tracks. objects, prev_positions and disappeared are
+    read-only mapping views for callers that want per-ID access.
+    
+    Matching of tracked objects to new centroids is done by a pluggable
+    association engine (see processing/association.py).
+    """
     
-    def __init__(self):
+    INITIAL_CAPACITY = 64
+    
+    def __init__(self, max_disappeared=MAX_DISAPPEARED, max_distance=MAX_TRACKING_DISTANCE,
+                 matcher=TRACKER_MATCHER):
+        self.max_disappeared = max_disappeared
+        self.max_distance = max_distance
+        self.match = get_matcher(matcher)
         self.next_object_id = 0
-        self.objects = OrderedDict()  # Object ID -> centroid
-        self.disappeared = OrderedDict()  # Object ID -> frames disappeared
-        self.prev_positions = OrderedDict()  # Object ID -> previous centroid
+        
+        self.ids = np.full(self.INITIAL_CAPACITY, -1, dtype=np.int64)  # -1 marks a free slot
+        self.positions = np.zeros((self.INITIAL_CAPACITY, 2))  # Current centroid
+        self.prev = np.zeros((self.INITIAL_CAPACITY, 2))  # Previous centroid
+        self.missed = np.zeros(self.INITIAL_CAPACITY, dtype=np.int32)  # Frames disappeared
+        self.free_slots = list(range(self.INITIAL_CAPACITY - 1, -1, -1))
+        self.slot_of = {}  # Object ID -> slot
+        
+        self.objects = TrackView(self, 'positions')  # Object ID -> centroid
+        self.disappeared = TrackView(self, 'missed')  # Object ID -> frames disappeared
+        self.prev_positions = TrackView(self, 'prev')  # Object ID -> previous centroid
+    
+    def grow(self):
+        """Double the slot capacity"""
+        capacity = len(self.ids)
+        self.ids = np.concatenate([self.ids, np.full(capacity, -1, dtype=np.int64)])
+        self.positions = np.concatenate([self.positions, np.zeros((capacity, 2))])
+        self.prev = np.concatenate([self.prev, np.zeros((capacity, 2))])
+        self.missed = np.concatenate([self.missed, np.zeros(capacity, dtype=np.int32)])
+        self.free_slots.extend(range(2 * capacity - 1, capacity - 1, -1))
+    
+    def active_slots(self):
+        """Slots of all tracked objects, in object ID order"""
+        slots = np.flatnonzero(self.ids >= 0)
+        return slots[np.argsort(self.ids[slots], kind='stable')]
     
     def register(self, centroid):
         """Register new object with unique ID"""
-        self.objects[self.next_object_id] = centroid
-        self.disappeared[self.next_object_id] = 0
-        self.prev_positions[self.next_object_id] = centroid
+        if not self.free_slots:
+            self.grow()
+        slot = self.free_slots.pop()
+        self.ids[slot] = self.next_object_id
+        self.positions[slot] = centroid
+        self.prev[slot] = centroid
+        self.missed[slot] = 0
+        self.slot_of[self.next_object_id] = slot
         self.next_object_id += 1
     
     def deregister(self, object_id):
         """Remove object from tracking"""
-        del self.objects[object_id]
-        del self.disappeared[object_id]
-        if object_id in self.prev_positions:
-            del self.prev_positions[object_id]
+        slot = self.slot_of.pop(object_id)
+        self.ids[slot] = -1
+        self.free_slots.append(slot)
+    
+    def age(self, slots, frames=1):
+        """Count missed frames for the given slots and drop tracks gone for too long"""
+        self.missed[slots] += frames
+        expired = slots[self.missed[slots] > self.max_disappeared]
+        for object_id in self.ids[expired].tolist():
+            self.deregister(object_id)
+    
+    def mark_missed(self, frames=1):
+        """Age every track by frames with no detections (frames that were not analyzed)"""
+        if self.slot_of:
+            self.age(self.active_slots(), frames)
+        return self.objects
     
     def update(self, input_centroids):
         """Update tracked objects with new centroids"""
+        slots = self.active_slots()
+        
         # If no centroids detected, mark all as disappeared
         if len(input_centroids) == 0:
-            for object_id in list(self.disappeared.keys()):
-                self.disappeared[object_id] += 1
-                if self.disappeared[object_id] > MAX_DISAPPEARED:
-                    self.deregister(object_id)
+            self.age(slots)
             return self.objects
         
         # Convert to numpy array
-        input_centroids = np.array(input_centroids)
+        input_centroids = np.asarray(input_centroids, dtype=np.float64).reshape(-1, 2)
         
         # If no existing objects, register all
-        if len(self.objects) == 0:
+        if len(slots) == 0:
             for centroid in input_centroids:
                 self.register(centroid)
-        else:
-            # Get current object IDs and centroids
-            object_ids = list(self.objects.keys())
-            object_centroids = np.array(list(self.objects.values()))
-            
-            # Calculate distance between each pair
-            D = dist.cdist(object_centroids, input_centroids)
-            
-            # Find minimum distances
-            rows = D.min(axis=1).argsort()
-            cols = D.argmin(axis=1)[rows]
-            
-            # Track which rows/cols used
-            used_rows = set()
-            used_cols = set()
-            
-            # Match existing objects to new centroids
-            for (row, col) in zip(rows, cols):
-                if row in used_rows or col in used_cols:
-                    continue
-                
-                # Check if distance is reasonable
-                if D[row, col] > MAX_TRACKING_DISTANCE:
-                    continue
-                
-                object_id = object_ids[row]
-                self.prev_positions[object_id] = self.objects[object_id]  # Store previous
-                self.objects[object_id] = input_centroids[col]  # Update current
-                self.disappeared[object_id] = 0
-                
-                used_rows.add(row)
-                used_cols.add(col)
-            
-            # Handle disappeared objects
-            unused_rows = set(range(D.shape[0])) - used_rows
-            for row in unused_rows:
-                object_id = object_ids[row]
-                self.disappeared[object_id] += 1
-                if self.disappeared[object_id] > MAX_DISAPPEARED:
-                    self.deregister(object_id)
-            
-            # Register new objects
-            unused_cols = set(range(D.shape[1])) - used_cols
-            for col in unused_cols:
-                self.register(input_centroids[col])
+            return self.objects
+        
+        # Match existing objects to new centroids
+        rows, cols = self.match(self.positions[slots], input_centroids, self.max_distance)
+        rows = np.asarray(rows, dtype=np.intp)
+        cols = np.asarray(cols, dtype=np.intp)
+        matched = slots[rows]
+        self.prev[matched] = self.positions[matched]  # Store previous
+        self.positions[matched] = input_centroids[cols]  # Update current
+        self.missed[matched] = 0
+        
+        # Handle disappeared objects
+        unmatched = np.ones(len(slots), dtype=bool)
+        unmatched[rows] = False
+        self.age(slots[unmatched])
+        
+        # Register new objects
+        unused_cols = np.ones(len(input_centroids), dtype=bool)
+        unused_cols[cols] = False
+        for centroid in input_centroids[unused_cols]:
+            self.register(centroid)
         
         return self.objects
 
 
 class IntrusionDetector:
-    """Detects intrusions when objects cross virtual perimeter"""
+    """Detects intrusions when objects cross virtual perimeter
     
-    def __init__(self):
-        self.tracker = CentroidTracker()
+    The perimeter is either the legacy horizontal PERIMETER_LINE or a list
+    of line, polyline and polygon zones (see processing/perimeter.py). All
+    tracks are tested against all zones in one batched pass per frame.
+    """
+    
+    def __init__(self, perimeter_line=PERIMETER_LINE, cooldown=EVENT_COOLDOWN,
+                 max_disappeared=MAX_DISAPPEARED, max_distance=MAX_TRACKING_DISTANCE,
+                 matcher=TRACKER_MATCHER, zones=PERIMETER_ZONES):
+        self.tracker = CentroidTracker(max_disappeared, max_distance, matcher)
         self.crossed_objects = set()  # Objects that already crossed
-        self.last_event_time = {}  # Object ID -> last event time
-        self.line_y = PERIMETER_LINE[1]  # Horizontal line Y coordinate
+        self.last_event_time = {}  # (object ID, zone) -> last event time
+        self.cooldown = cooldown
+        self.set_perimeter(perimeter_line, zones)
     
-    def check_line_cross(self, object_id, prev_centroid, curr_centroid):
-        """Check if object crossed the line"""
-        prev_y = prev_centroid[1]
-        curr_y = curr_centroid[1]
-        
-        # Check if crossed from either direction
-        crossed = (prev_y < self.line_y and curr_y >= self.line_y) or \
-                  (prev_y > self.line_y and curr_y <= self.line_y)
-        
-        # Check cooldown for this specific object
-        current_time = time.time()
-        if object_id in self.last_event_time:
-            time_since_last = current_time - self.last_event_time[object_id]
-            if time_since_last < EVENT_COOLDOWN:
-                return False
-        
-        if crossed:
-            self.last_event_time[object_id] = current_time
-            return True
-        
-        return False
+    def set_perimeter(self, perimeter_line=PERIMETER_LINE, zones=PERIMETER_ZONES):
+        """Build the perimeter geometry; tracks are kept, per-zone cooldowns start over"""
+        if zones:
+            self.perimeter = Perimeter(zones)
+        else:
+            self.perimeter = Perimeter.from_line(perimeter_line)
+        self.last_event_time = {}
+    
+    def find_crossings(self):
+        """Crossings of all zones by tracked objects on their last move"""
+        tracker = self.tracker
+        slots = tracker.active_slots()
+        rows, zones, signs = self.perimeter.find_crossings(tracker.prev[slots],
+                                                           tracker.positions[slots])
+        object_ids = tracker.ids[slots[rows]].tolist()
+        return zip(object_ids, zones.tolist(), signs.tolist())
     
     def update(self, centroids):
-        """Update tracking and check for intrusions"""
+        """Update tracking and return (intrusion, objects, crossings) for this frame"""
         # Update tracker with new centroids
         objects = self.tracker.update(centroids)
         
-        intrusion_detected = False
-        crossed_object_id = None
+        # One timestamp per frame for all cooldown checks
+        current_time = time.time()
+        crossings = []
+        reported = set()  # (object ID, zone) pairs reported this frame
         
-        # Check each tracked object for line crossing
-        for object_id, centroid in objects.items():
-            if object_id in self.tracker.prev_positions:
-                prev_centroid = self.tracker.prev_positions[object_id]
-                
-                # Check if this object crossed the line
-                if self.check_line_cross(object_id, prev_centroid, centroid):
-                    intrusion_detected = True
-                    crossed_object_id = object_id
-                    print(f"[ALERT] Object #{object_id} crossed the perimeter!")
-                    break
+        for object_id, zone, sign in self.find_crossings():
+            # Skip objects still in their cooldown period for this zone; a
+            # second crossing of the same zone in the same move still counts
+            key = (object_id, zone)
+            last_time = self.last_event_time.get(key)
+            if (key not in reported and last_time is not None
+                    and current_time - last_time < self.cooldown):
+                continue
+            
+            reported.add(key)
+            self.last_event_time[key] = current_time
+            crossing = Crossing(object_id, self.perimeter.zone_names[zone],
+                                self.perimeter.direction(zone, sign))
+            crossings.append(crossing)
+            print(f"[ALERT] Object #{object_id} crossed the perimeter! "
+                  f"({crossing.zone}, {crossing.direction})")
         
-        return intrusion_detected, objects, crossed_object_id
\ No newline at end of file
+        return len(crossings) > 0, objects, crossings
\ No newline at end of file
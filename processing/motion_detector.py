@@ -1,38 +1,153 @@
 import cv2
 import numpy as np
-from config.settings import BLUR_KERNEL, MOTION_THRESHOLD
+from processing.motion_engines import create_motion_engine
+from config.settings import (BLUR_KERNEL, MOTION_THRESHOLD, MOTION_PROCESSING_SCALE,
+                             MOTION_PREALLOCATE_BUFFERS, MOTION_ENGINE)
+
+def perimeter_roi(bounds, margin):
+    """Region (x1, y1, x2, y2) covering the perimeter bounds plus a margin on every side
+    
+    The legacy PERIMETER_LINE spans the full frame width, so its region is
+    a horizontal band (clamped to the frame on the first frame).
+    """
+    x1, y1, x2, y2 = bounds
+    return (x1 - margin, y1 - margin, x2 + margin, y2 + margin)
+
+def scale_kernel(kernel, scale):
+    """Scale a blur kernel size, keeping each side odd and at least 1"""
+    return tuple(max(1, int(round(k * scale))) | 1 for k in kernel)
 
 class MotionDetector:
-    """Detects motion between consecutive frames"""
+    """Detects motion between consecutive frames
+    
+    Frames are converted to grayscale and blurred, then a pluggable motion
+    engine (see processing/motion_engines.py) produces the foreground mask.
+    
+    Detection can run on a downscaled image (scale < 1.0) and/or on a region
+    of interest (x1, y1, x2, y2) of the frame. The resulting mask is in that
+    reduced space; scale and offset map it back to full-frame coordinates.
+    
+    With preallocate=True every stage writes into buffers owned by the
+    detector and its engine, so no arrays are allocated per frame. The
+    returned mask is then overwritten by the next call to detect().
+    """
     
-    def __init__(self):
-        self.prev_frame = None
+    def __init__(self, threshold=MOTION_THRESHOLD, blur_kernel=BLUR_KERNEL,
+                 scale=MOTION_PROCESSING_SCALE, roi=None, preallocate=MOTION_PREALLOCATE_BUFFERS,
+                 engine=MOTION_ENGINE):
+        if not 0.0 < scale <= 1.0:
+            raise ValueError(f"Processing scale must be in (0, 1]: {scale}")
+        self.threshold = threshold
+        self.scale = scale
+        self.blur_kernel = scale_kernel(blur_kernel, scale)
+        # Each dilation grows blobs by 1/scale frame pixels, so dilate less when downscaled
+        self.dilate_iterations = max(1, int(round(2 * scale)))
+        self.dilate_kernel = np.ones((3, 3), np.uint8)  # Same as cv2.dilate's default kernel
+        self.roi = roi
+        self.roi_slices = None  # ROI clamped to the frame, set on the first frame
+        self.offset = (0, 0)  # Top-left corner of the ROI in frame coordinates
+        self.engine_name = engine
+        self.engine = create_motion_engine(engine, threshold, preallocate)
+        self.preallocate = preallocate
+        self.buffers = None  # Stage name -> reusable output array
+        self.blur_index = 0  # Which of the two blur buffers receives the next frame
+    
+    def crop_to_roi(self, frame):
+        """Restrict the frame to the region of interest"""
+        if self.roi_slices is None:
+            h, w = frame.shape[:2]
+            x1, y1, x2, y2 = self.roi
+            x1, x2 = max(0, int(x1)), min(w, int(x2))
+            y1, y2 = max(0, int(y1)), min(h, int(y2))
+            if x1 >= x2 or y1 >= y2:
+                raise ValueError(f"Motion ROI {self.roi} lies outside the {w}x{h} frame")
+            self.roi_slices = (slice(y1, y2), slice(x1, x2))
+            self.offset = (x1, y1)
+        return frame[self.roi_slices]
+    
+    def scaled_size(self, image):
+        """Size (width, height) of an image after downscaling"""
+        h, w = image.shape[:2]
+        return (max(1, int(round(w * self.scale))), max(1, int(round(h * self.scale))))
+    
+    def allocate_buffers(self, frame):
+        """Allocate one output buffer per stage, sized to the stream"""
+        h, w = frame.shape[:2]
+        width, height = self.scaled_size(frame)
+        self.buffers = {'gray': np.empty((h, w), np.uint8)}
+        if self.scale != 1.0:
+            self.buffers['scaled'] = np.empty((height, width), np.uint8)
+        self.buffers['blurred'] = [np.empty((height, width), np.uint8) for _ in range(2)]
+        self.buffers['mask'] = np.empty((height, width), np.uint8)
     
     def preprocess_frame(self, frame):
         """Convert frame to grayscale and apply blur"""
+        if self.roi is not None:
+            frame = self.crop_to_roi(frame)
+        if self.preallocate:
+            return self.preprocess_into_buffers(frame)
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        blurred = cv2.GaussianBlur(gray, BLUR_KERNEL, 0)
+        if self.scale != 1.0:
+            gray = cv2.resize(gray, self.scaled_size(gray), interpolation=cv2.INTER_AREA)
+        blurred = cv2.GaussianBlur(gray, self.blur_kernel, 0)
+        return blurred
+    
+    def preprocess_into_buffers(self, frame):
+        """Allocation-free version of preprocess_frame()"""
+        if self.buffers is None:
+            self.allocate_buffers(frame)
+        b = self.buffers
+        
+        cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=b['gray'])
+        source = b['gray']
+        if self.scale != 1.0:
+            cv2.resize(source, b['scaled'].shape[::-1], dst=b['scaled'],
+                       interpolation=cv2.INTER_AREA)
+            source = b['scaled']
+        
+        # Alternate between two blur buffers so the engine can keep the
+        # previous frame by reference instead of copying it
+        blurred = b['blurred'][self.blur_index]
+        self.blur_index ^= 1
+        cv2.GaussianBlur(source, self.blur_kernel, 0, dst=blurred)
         return blurred
     
+    def resume(self):
+        """Called before the first frame after frames were skipped"""
+        self.engine.resume()
+    
+    def set_threshold(self, threshold):
+        """Change the motion threshold; the engine keeps its background state"""
+        self.threshold = threshold
+        self.engine.set_threshold(threshold)
+    
+    def set_blur_kernel(self, blur_kernel):
+        """Change the blur kernel (given at full resolution, scaled like in __init__)"""
+        self.blur_kernel = scale_kernel(blur_kernel, self.scale)
+    
+    def set_roi(self, roi):
+        """Change the region of interest
+        
+        Buffers and the engine's background model are sized to the old
+        region, so both start over.
+        """
+        self.roi = roi
+        self.roi_slices = None
+        self.offset = (0, 0)
+        self.buffers = None
+        self.blur_index = 0
+        self.engine = create_motion_engine(self.engine_name, self.threshold, self.preallocate)
+    
     def detect(self, frame):
         """Detect motion and return motion mask"""
         processed = self.preprocess_frame(frame)
         
-        # Initialize previous frame on first call
-        if self.prev_frame is None:
-            self.prev_frame = processed
+        # Foreground mask from the motion engine (None while it warms up)
+        motion_mask = self.engine.apply(processed)
+        if motion_mask is None:
             return None
         
-        # Calculate absolute difference between frames
-        frame_diff = cv2.absdiff(self.prev_frame, processed)
-        
-        # Apply threshold to get binary motion mask
-        _, motion_mask = cv2.threshold(frame_diff, MOTION_THRESHOLD, 255, cv2.THRESH_BINARY)
-        
         # Dilate to fill gaps in motion regions
-        motion_mask = cv2.dilate(motion_mask, None, iterations=2)
-        
-        # Update previous frame
-        self.prev_frame = processed
-        
-        return motion_mask
\ No newline at end of file
+        return cv2.dilate(motion_mask, self.dilate_kernel,
+                          dst=self.buffers['mask'] if self.preallocate else None,
+                          iterations=self.dilate_iterations)
\ No newline at end of file
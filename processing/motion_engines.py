@@ -0,0 +1,148 @@
+import cv2
+import numpy as np
+from config.settings import (BACKGROUND_ALPHA, BACKGROUND_HISTORY, MOG2_VAR_THRESHOLD,
+                             KNN_DIST2_THRESHOLD)
+
+class MotionEngine:
+    """Turns preprocessed (gray, blurred) frames into a binary foreground mask
+    
+    With preallocate=True an engine writes every stage into buffers it owns,
+    so the mask returned by apply() is overwritten by the next call.
+    """
+    
+    def __init__(self, preallocate=False):
+        self.preallocate = preallocate
+        self.buffers = {}
+    
+    def buffer(self, name, like, dtype=np.uint8):
+        """Reusable output array for a stage, or None to let OpenCV allocate"""
+        if not self.preallocate:
+            return None
+        buf = self.buffers.get(name)
+        if buf is None:
+            buf = self.buffers[name] = np.empty(like.shape[:2], dtype)
+        return buf
+    
+    def apply(self, frame):
+        """Return the foreground mask for a frame, or None while warming up"""
+        raise NotImplementedError
+    
+    def resume(self):
+        """Prepare for the next frame after frames were skipped
+        
+        Background models still describe the scene after a static gap, so
+        the default keeps all state.
+        """
+    
+    def set_threshold(self, threshold):
+        """Change the difference threshold; models with their own threshold keep it"""
+        self.threshold = threshold
+
+
+class FrameDiffEngine(MotionEngine):
+    """Thresholded difference between two consecutive frames
+    
+    Keeps a reference to the previous frame, so callers reusing frame buffers
+    must alternate between two of them.
+    """
+    
+    def __init__(self, threshold, preallocate=False):
+        super().__init__(preallocate)
+        self.threshold = threshold
+        self.prev_frame = None
+    
+    def resume(self):
+        """Forget the previous frame; a difference across skipped frames is not motion"""
+        self.prev_frame = None
+    
+    def apply(self, frame):
+        # Initialize previous frame on first call
+        if self.prev_frame is None:
+            self.prev_frame = frame
+            return None
+        
+        # Calculate absolute difference between frames
+        frame_diff = cv2.absdiff(self.prev_frame, frame, dst=self.buffer('diff', frame))
+        
+        # Apply threshold to get binary motion mask
+        _, motion_mask = cv2.threshold(frame_diff, self.threshold, 255, cv2.THRESH_BINARY,
+                                       dst=self.buffer('threshold', frame))
+        
+        # Update previous frame
+        self.prev_frame = frame
+        
+        return motion_mask
+
+
+class RunningAverageEngine(MotionEngine):
+    """Thresholded difference against a running-average background model"""
+    
+    def __init__(self, threshold, preallocate=False, alpha=BACKGROUND_ALPHA):
+        super().__init__(preallocate)
+        self.threshold = threshold
+        self.alpha = alpha
+        self.background = None  # float32 running average
+    
+    def apply(self, frame):
+        if self.background is None:
+            self.background = frame.astype(np.float32)
+            return None
+        
+        # Compare against the model before folding the new frame into it
+        background = cv2.convertScaleAbs(self.background, dst=self.buffer('background', frame))
+        frame_diff = cv2.absdiff(background, frame, dst=self.buffer('diff', frame))
+        _, motion_mask = cv2.threshold(frame_diff, self.threshold, 255, cv2.THRESH_BINARY,
+                                       dst=self.buffer('threshold', frame))
+        cv2.accumulateWeighted(frame, self.background, self.alpha)
+        
+        return motion_mask
+
+
+class BackgroundSubtractorEngine(MotionEngine):
+    """Wraps an OpenCV background subtractor (MOG2 or KNN)"""
+    
+    # Subtractors mark shadows as 127; only confident foreground (255) is kept
+    SHADOW_CUTOFF = 200
+    
+    def __init__(self, subtractor, preallocate=False):
+        super().__init__(preallocate)
+        self.subtractor = subtractor
+    
+    def apply(self, frame):
+        foreground = self.subtractor.apply(frame, self.buffer('foreground', frame))
+        _, motion_mask = cv2.threshold(foreground, self.SHADOW_CUTOFF, 255, cv2.THRESH_BINARY,
+                                       dst=self.buffer('threshold', frame))
+        return motion_mask
+
+
+class MOG2Engine(BackgroundSubtractorEngine):
+    """Gaussian-mixture background model (cv2.createBackgroundSubtractorMOG2)"""
+    
+    def __init__(self, threshold, preallocate=False, history=BACKGROUND_HISTORY,
+                 var_threshold=MOG2_VAR_THRESHOLD):
+        super().__init__(cv2.createBackgroundSubtractorMOG2(history, var_threshold, True),
+                         preallocate)
+
+
+class KNNEngine(BackgroundSubtractorEngine):
+    """K-nearest-neighbours background model (cv2.createBackgroundSubtractorKNN)"""
+    
+    def __init__(self, threshold, preallocate=False, history=BACKGROUND_HISTORY,
+                 dist2_threshold=KNN_DIST2_THRESHOLD):
+        super().__init__(cv2.createBackgroundSubtractorKNN(history, dist2_threshold, True),
+                         preallocate)
+
+
+# Engine name (MOTION_ENGINE setting) -> engine class
+MOTION_ENGINES = {
+    'frame_diff': FrameDiffEngine,
+    'running_average': RunningAverageEngine,
+    'mog2': MOG2Engine,
+    'knn': KNNEngine,
+}
+
+def create_motion_engine(name, threshold, preallocate=False):
+    """Create a motion engine by name"""
+    if name not in MOTION_ENGINES:
+        raise ValueError(f"Unknown motion engine: {name} (choose from {', '.join(MOTION_ENGINES)})")
+    return MOTION_ENGINES[name](threshold, preallocate)
\ No newline at end of file
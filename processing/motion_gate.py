@@ -0,0 +1,120 @@
+import time
+import cv2
+from config.settings import (MOTION_GATE_SIZE, MOTION_GATE_THRESHOLD, MOTION_GATE_IDLE_FRAMES,
+                             MOTION_GATE_IDLE_STRIDE)
+
+class MotionGate:
+    """Decides per frame whether the detection stages need to run
+    
+    Each tested frame is reduced to a tiny grayscale thumbnail (strided
+    subsampling, then an area resize) and compared with the thumbnail of
+    the last frame that was fully processed. The frame is active when any
+    thumbnail cell changed by at least `threshold` gray levels; the largest
+    cell change is used rather than the mean over the whole thumbnail, which
+    a small object in a large frame barely moves. Comparing with the last
+    processed frame instead of the previous one means slow changes still
+    add up until they open the gate.
+    
+    After `idle_frames` static frames in a row the gate goes idle and only
+    tests every `idle_stride`-th frame; the others are skipped without a
+    test. The first active frame ends idle mode, so full-rate processing
+    resumes at most idle_stride - 1 frames after activity starts.
+    """
+    
+    def __init__(self, size=MOTION_GATE_SIZE, threshold=MOTION_GATE_THRESHOLD,
+                 idle_frames=MOTION_GATE_IDLE_FRAMES, idle_stride=MOTION_GATE_IDLE_STRIDE):
+        self.size = tuple(size)
+        self.threshold = threshold
+        self.idle_frames = idle_frames
+        self.idle_stride = max(1, idle_stride)
+        self.step = None  # Subsampling step, set on the first frame
+        self.reference = None  # Thumbnail of the last processed frame
+        self.static_run = 0  # Static frames in a row
+        self.untested = 0  # Frames skipped without a test since the last test
+        
+        self.frames = 0
+        self.skipped = 0
+        self.idle_skipped = 0  # Skipped without a test while idle
+        self.gate_time = 0.0  # Seconds spent testing frames
+        self.quiet_frames = 0  # Processed frames without detections
+        self.quiet_time = 0.0  # Seconds the stages took on them
+    
+    @property
+    def idle(self):
+        """True while only every idle_stride-th frame is tested"""
+        return self.static_run >= self.idle_frames
+    
+    def thumbnail(self, frame):
+        """Grayscale thumbnail of a frame"""
+        if self.step is None:
+            h, w = frame.shape[:2]
+            width, height = self.size
+            # Keep about 4x4 samples per thumbnail cell for the area resize
+            self.step = max(1, min(h // (4 * height), w // (4 * width)))
+        small = cv2.resize(frame[::self.step, ::self.step], self.size,
+                           interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small
+    
+    def should_process(self, frame):
+        """Return True when the frame must go through the detection stages"""
+        self.frames += 1
+        if self.idle and self.untested + 1 < self.idle_stride:
+            self.untested += 1
+            self.skipped += 1
+            self.idle_skipped += 1
+            return False
+        self.untested = 0
+        
+        start = time.perf_counter()
+        thumbnail = self.thumbnail(frame)
+        active = (self.reference is None
+                  or int(cv2.absdiff(thumbnail, self.reference).max()) >= self.threshold)
+        self.gate_time += time.perf_counter() - start
+        if active:
+            self.reference = thumbnail
+            self.static_run = 0
+            return True
+        self.static_run += 1
+        self.skipped += 1
+        return False
+    
+    def grant_skips(self):
+        """Frames the caller may drop before decoding, counted as skipped
+        
+        While idle the next untested frames would be skipped anyway, so the
+        capture can drop them without decoding them to an image.
+        """
+        if not self.idle:
+            return 0
+        count = self.idle_stride - 1 - self.untested
+        self.frames += count
+        self.skipped += count
+        self.idle_skipped += count
+        self.untested += count
+        return count
+    
+    def record_processing(self, seconds, detections):
+        """Add the time the detection stages took on a processed frame"""
+        if not detections:
+            self.quiet_frames += 1
+            self.quiet_time += seconds
+    
+    def get_stats(self):
+        """Frames seen and skipped, and the estimated CPU seconds saved
+        
+        The estimate is the skipped frames times the mean cost of a
+        processed frame without detections (the closest match for a static
+        frame), minus the time spent testing frames.
+        """
+        mean_cost = self.quiet_time / self.quiet_frames if self.quiet_frames else 0.0
+        return {
+            'frames': self.frames,
+            'skipped': self.skipped,
+            'idle_skipped': self.idle_skipped,
+            'skipped_pct': 100.0 * self.skipped / self.frames if self.frames else 0.0,
+            'idle': self.idle,
+            'gate_seconds': self.gate_time,
+            'saved_seconds': max(0.0, self.skipped * mean_cost - self.gate_time)
+        }
\ No newline at end of file
@@ -0,0 +1,185 @@
+from collections import namedtuple
+import numpy as np
+
+# One perimeter crossing reported by IntrusionDetector.update()
+Crossing = namedtuple('Crossing', [
+    'object_id',  # Tracked object that crossed
+    'zone',       # Name of the crossed zone
+    'direction',  # "enter" / "exit" for polygons, "left_to_right" / "right_to_left" for lines
+])
+
+ZONE_TYPES = ("line", "polyline", "polygon")
+
+# The original perimeter check only compared y coordinates, so the legacy
+# PERIMETER_LINE is extended this far to the left and right
+LEGACY_LINE_EXTENT = 1e9
+
+def cross(u, v):
+    """Z component of the cross product of two arrays of 2D vectors"""
+    return u[:, 0] * v[:, 1] - u[:, 1] * v[:, 0]
+
+def boxes_overlap(lo, hi, boxes):
+    """Which (lo, hi) boxes overlap the matching (x1, y1, x2, y2) boxes"""
+    return ((lo[..., 0] <= boxes[..., 2]) & (hi[..., 0] >= boxes[..., 0]) &
+            (lo[..., 1] <= boxes[..., 3]) & (hi[..., 1] >= boxes[..., 1]))
+
+
+class Perimeter:
+    """Set of perimeter zones tested against all tracks in one batched pass
+    
+    Zones are dictionaries with a "name", a "type" ("line", "polyline" or
+    "polygon") and a list of (x, y) "points". Every zone is stored as
+    segments in one array; a movement crosses a segment when the two
+    intersect, with the end point allowed to lie on the segment.
+    
+    Line directions are seen looking from a segment's first point to its
+    second. Polygon crossings are reported as "enter" or "exit".
+    
+    Bounding boxes of zones and segments act as a two-level index so exact
+    intersection tests only run for the few (track, segment) pairs whose
+    boxes overlap, which keeps sites with many zones cheap.
+    """
+    
+    def __init__(self, zones):
+        if not zones:
+            raise ValueError("A perimeter needs at least one zone")
+        self.zones = []
+        self.zone_names = []
+        self.zone_types = []
+        segments = []
+        segment_zone = []
+        inside_sign = []
+        zone_start = []
+        
+        for index, zone in enumerate(zones):
+            name = zone.get('name', f"zone-{index}")
+            zone_type = zone.get('type', 'line')
+            points = np.asarray(zone['points'], dtype=np.float64).reshape(-1, 2)
+            if zone_type not in ZONE_TYPES:
+                raise ValueError(f"Unknown perimeter zone type: {zone_type}")
+            if len(points) < (3 if zone_type == 'polygon' else 2):
+                raise ValueError(f"Perimeter zone {name} has too few points")
+            
+            ends = np.roll(points, -1, axis=0) if zone_type == 'polygon' else points[1:]
+            starts = points[:len(ends)]
+            
+            # Polygon interior lies on the right of its segments when the
+            # shoelace sum is positive (image coordinates, y down)
+            sign = 0.0
+            if zone_type == 'polygon':
+                sign = np.sign(cross(starts, ends).sum())
+                if sign == 0:
+                    raise ValueError(f"Perimeter zone {name} has no area")
+            
+            zone_start.append(len(segments))
+            segments.extend(np.hstack([starts, ends]))
+            segment_zone.extend([index] * len(starts))
+            inside_sign.extend([sign] * len(starts))
+            self.zones.append(zone)
+            self.zone_names.append(name)
+            self.zone_types.append(zone_type)
+        
+        self.segments = np.array(segments, dtype=np.float64).reshape(-1, 4)  # (ax, ay, bx, by)
+        self.segment_zone = np.array(segment_zone, dtype=np.intp)
+        self.inside_sign = np.array(inside_sign, dtype=np.float64)
+        self.zone_start = np.array(zone_start, dtype=np.intp)
+        self.zone_count = np.bincount(self.segment_zone, minlength=len(self.zones))
+        
+        # Bounding boxes (x1, y1, x2, y2) of every segment and every zone
+        self.segment_boxes = np.hstack([np.minimum(self.segments[:, :2], self.segments[:, 2:]),
+                                        np.maximum(self.segments[:, :2], self.segments[:, 2:])])
+        self.zone_boxes = np.array([
+            np.hstack([self.segment_boxes[start:start + count, :2].min(axis=0),
+                       self.segment_boxes[start:start + count, 2:].max(axis=0)])
+            for start, count in zip(self.zone_start, self.zone_count)
+        ]).reshape(-1, 4)
+    
+    @classmethod
+    def from_line(cls, perimeter_line):
+        """Perimeter for the legacy (x1, y1, x2, y2) PERIMETER_LINE setting
+        
+        Like the original check, only y1 is used and the line spans the
+        full frame width.
+        """
+        y = perimeter_line[1]
+        return cls([{'name': 'perimeter', 'type': 'line',
+                     'points': [(-LEGACY_LINE_EXTENT, y), (LEGACY_LINE_EXTENT, y)]}])
+    
+    @property
+    def bounds(self):
+        """Bounding box (x1, y1, x2, y2) of all zones"""
+        return (tuple(self.zone_boxes[:, :2].min(axis=0)) +
+                tuple(self.zone_boxes[:, 2:].max(axis=0)))
+    
+    def direction(self, zone, sign):
+        """Name of a crossing direction (sign +1 = moved to the right side)"""
+        if self.zone_types[zone] == 'polygon':
+            return "enter" if sign == self.inside_sign[self.zone_start[zone]] else "exit"
+        return "left_to_right" if sign > 0 else "right_to_left"
+    
+    def candidate_pairs(self, lo, hi):
+        """(track, segment) pairs whose bounding boxes overlap"""
+        # Coarse pass: movement boxes against zone boxes
+        tracks, zones = np.nonzero(boxes_overlap(lo[:, None], hi[:, None], self.zone_boxes))
+        
+        # Expand each (track, zone) pair to that zone's segments
+        counts = self.zone_count[zones]
+        tracks = np.repeat(tracks, counts)
+        offsets = np.repeat(self.zone_start[zones] - (np.cumsum(counts) - counts), counts)
+        segments = offsets + np.arange(len(tracks))
+        
+        # Fine pass: movement boxes against segment boxes
+        keep = boxes_overlap(lo[tracks], hi[tracks], self.segment_boxes[segments])
+        return tracks[keep], segments[keep]
+    
+    def intersect(self, tracks, segments, prev, curr):
+        """Exact crossing test
+        
+        Returns a keep mask, the direction sign and the position of the
+        crossing along the movement (0 at prev, 1 at curr) per pair.
+        """
+        a = self.segments[segments, :2]
+        ab = self.segments[segments, 2:] - a
+        p = prev[tracks]
+        move = curr[tracks] - p
+        
+        # Side of the segment before and after the move
+        d1 = cross(ab, p - a)
+        d2 = cross(ab, p + move - a)
+        # Segment end points on either side of the movement
+        e1 = cross(move, a - p)
+        e2 = cross(move, a + ab - p)
+        
+        crossed = (((d1 < 0) & (d2 >= 0)) | ((d1 > 0) & (d2 <= 0))) & (e1 * e2 <= 0)
+        # d1 and d2 differ wherever crossed is set
+        position = d1 / np.where(d1 == d2, 1.0, d1 - d2)
+        return crossed, np.where(d2 > d1, 1.0, -1.0), position
+    
+    def find_crossings(self, prev, curr):
+        """Crossings of all zones by tracks moving from prev to curr (N x 2 arrays)
+        
+        Returns (track index, zone index, direction sign) arrays ordered by
+        track, then by where the crossing lies along the movement, so a
+        track that crosses a zone twice in one move (into a polygon and out
+        again) gets both crossings in the order they happened. A movement
+        through the vertex shared by two segments of a zone counts once.
+        """
+        empty = np.empty(0, dtype=np.intp)
+        moved = np.flatnonzero(np.any(prev != curr, axis=1))
+        if len(moved) == 0 or len(self.segments) == 0:
+            return empty, empty, np.empty(0)
+        
+        prev, curr = prev[moved], curr[moved]
+        tracks, segments = self.candidate_pairs(np.minimum(prev, curr), np.maximum(prev, curr))
+        crossed, signs, positions = self.intersect(tracks, segments, prev, curr)
+        tracks, zones = tracks[crossed], self.segment_zone[segments[crossed]]
+        signs, positions = signs[crossed], positions[crossed]
+        
+        order = np.lexsort((zones, positions, tracks))
+        tracks, zones, signs, positions = tracks[order], zones[order], signs[order], positions[order]
+        # Drop the second segment hit at a shared vertex (same track, zone and position)
+        repeated = np.zeros(len(tracks), dtype=bool)
+        repeated[1:] = ((tracks[1:] == tracks[:-1]) & (zones[1:] == zones[:-1]) &
+                        np.isclose(positions[1:], positions[:-1], rtol=0, atol=1e-9))
+        keep = ~repeated
+        return moved[tracks[keep]], zones[keep], signs[keep]
\ No newline at end of file
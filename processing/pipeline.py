@@ -0,0 +1,169 @@
+import time
+from collections import namedtuple
+from processing.motion_detector import MotionDetector, perimeter_roi
+from processing.contour_utils import ContourProcessor
+from processing.intrusion_logic import IntrusionDetector
+from processing.motion_gate import MotionGate
+from config.settings import (BLUR_KERNEL, MOTION_THRESHOLD, MOTION_PROCESSING_SCALE,
+                             MOTION_ROI_MARGIN, MOTION_PREALLOCATE_BUFFERS, MOTION_ENGINE,
+                             MIN_CONTOUR_AREA, CONTOUR_BACKEND, PERIMETER_LINE, PERIMETER_ZONES,
+                             EVENT_COOLDOWN, MAX_DISAPPEARED, MAX_TRACKING_DISTANCE,
+                             TRACKER_MATCHER, MOTION_GATE)
+
+# Result of running one frame through the detection pipeline
+FrameResult = namedtuple('FrameResult', [
+    'motion_detected',  # True when at least one valid centroid was found
+    'centroids',        # Centroids of valid motion contours
+    'contours',         # Valid motion contours (for overlay drawing)
+    'intrusion',        # True when a tracked object crossed the perimeter
+    'objects',          # Tracked objects: object ID -> centroid
+    'crossed_id',       # ID of the first object that crossed, or None
+    'crossings',        # Every perimeter crossing in this frame (see processing/perimeter.py)
+    'skipped',          # True when the motion gate skipped the detection stages
+])
+
+
+class DetectionPipeline:
+    """Runs motion detection, contour extraction and intrusion logic for one camera
+    
+    Camera definitions are dictionaries (see CAMERAS in config/settings.py);
+    any threshold missing from the definition falls back to the global setting.
+    When a StageProfiler is given, the motion, contours and tracking stages
+    are timed on every frame. With the motion gate on, static frames skip
+    all three stages and count as frames without detections for tracking.
+    
+    With a RuntimeConfig (config/runtime.py), every frame compares the
+    config snapshot with the one in use and, when it was replaced, applies
+    only the settings that changed; tracks and the background model are
+    kept.
+    """
+    
+    def __init__(self, camera=None, profiler=None, runtime=None):
+        camera = camera or {}
+        self.runtime = runtime
+        self.config = None  # Runtime config snapshot in use
+        if runtime:
+            self.config = runtime.current
+            camera = dict(camera, **self.config.values)
+        self.camera_id = camera.get('camera_id')
+        self.profiler = profiler
+        self.roi_margin = camera.get('roi_margin', MOTION_ROI_MARGIN)
+        self.perimeter_line = tuple(camera.get('perimeter_line', PERIMETER_LINE))
+        
+        self.zones = camera.get('perimeter_zones', PERIMETER_ZONES)
+        self.intrusion_detector = IntrusionDetector(
+            perimeter_line=self.perimeter_line,
+            cooldown=camera.get('event_cooldown', EVENT_COOLDOWN),
+            max_disappeared=camera.get('max_disappeared', MAX_DISAPPEARED),
+            max_distance=camera.get('max_tracking_distance', MAX_TRACKING_DISTANCE),
+            matcher=camera.get('tracker_matcher', TRACKER_MATCHER),
+            zones=self.zones,
+        )
+        
+        self.motion_detector = MotionDetector(
+            threshold=camera.get('motion_threshold', MOTION_THRESHOLD),
+            blur_kernel=camera.get('blur_kernel', BLUR_KERNEL),
+            scale=camera.get('processing_scale', MOTION_PROCESSING_SCALE),
+            roi=self.motion_roi(),
+            preallocate=camera.get('preallocate_buffers', MOTION_PREALLOCATE_BUFFERS),
+            engine=camera.get('motion_engine', MOTION_ENGINE),
+        )
+        self.contour_processor = ContourProcessor(
+            min_area=camera.get('min_contour_area', MIN_CONTOUR_AREA),
+            backend=camera.get('contour_backend', CONTOUR_BACKEND),
+        )
+        self.gate = MotionGate() if camera.get('motion_gate', MOTION_GATE) else None
+        self.resuming = False  # True after skipped frames, until the next processed frame
+    
+    def motion_roi(self):
+        """Motion detection region around the perimeter, or None for the full frame"""
+        if self.roi_margin is None:
+            return None
+        return perimeter_roi(self.intrusion_detector.perimeter.bounds, self.roi_margin)
+    
+    def reconfigure(self, config):
+        """Apply the settings that differ between a new runtime config snapshot and the current one"""
+        changed = config.changed_keys(self.config)
+        self.config = config
+        if 'motion_threshold' in changed:
+            self.motion_detector.set_threshold(config['motion_threshold'])
+        if 'blur_kernel' in changed:
+            self.motion_detector.set_blur_kernel(config['blur_kernel'])
+        if 'min_contour_area' in changed:
+            self.contour_processor.min_area = config['min_contour_area']
+        if changed & {'perimeter_line', 'perimeter_zones'}:
+            self.perimeter_line = tuple(config['perimeter_line'])
+            self.zones = config['perimeter_zones']
+            self.intrusion_detector.set_perimeter(self.perimeter_line, self.zones)
+            if self.roi_margin is not None:
+                self.motion_detector.set_roi(self.motion_roi())
+        tracker = self.intrusion_detector.tracker
+        if 'max_tracking_distance' in changed:
+            tracker.max_distance = config['max_tracking_distance']
+        if 'max_disappeared' in changed:
+            tracker.max_disappeared = config['max_disappeared']
+        if 'event_cooldown' in changed:
+            self.intrusion_detector.cooldown = config['event_cooldown']
+        print(f"[OK] Runtime config v{config.version} applied: {', '.join(sorted(changed))}")
+    
+    def process(self, frame):
+        """Run a single frame through all detection stages"""
+        if self.runtime:
+            config = self.runtime.current  # Replaced whole by the watcher, so no lock
+            if config is not self.config:
+                self.reconfigure(config)
+        gate = self.gate
+        if gate:
+            if not gate.should_process(frame):
+                return self.skip_frame()
+            gate_start = time.perf_counter()
+            if self.resuming:
+                self.motion_detector.resume()
+                self.resuming = False
+        profiler = self.profiler
+        if profiler:
+            start = profiler.start()
+        motion_mask = self.motion_detector.detect(frame)
+        if profiler:
+            start = profiler.lap('motion', start)
+        
+        if motion_mask is None:
+            # Still update tracker even without new detections
+            centroids, contours = [], []
+        else:
+            # Find contours and centroids
+            centroids, contours = self.contour_processor.get_centroids(
+                motion_mask, self.motion_detector.scale, self.motion_detector.offset)
+        if profiler:
+            start = profiler.lap('contours', start)
+        
+        # Update intrusion detector with centroids
+        intrusion, objects, crossings = self.intrusion_detector.update(centroids)
+        if profiler:
+            profiler.lap('tracking', start)
+        crossed_id = crossings[0].object_id if crossings else None
+        if gate:
+            gate.record_processing(time.perf_counter() - gate_start, len(centroids))
+        
+        return FrameResult(len(centroids) > 0, centroids, contours, intrusion, objects, crossed_id,
+                           crossings, False)
+    
+    def decode_skips(self):
+        """Number of upcoming frames the capture may drop without decoding
+        
+        Non-zero only while the motion gate is idle; the frames are counted
+        as skipped and age the tracks as if they had been read.
+        """
+        if not self.gate:
+            return 0
+        count = self.gate.grant_skips()
+        if count:
+            self.resuming = True
+            self.intrusion_detector.tracker.mark_missed(count)
+        return count
+    
+    def skip_frame(self):
+        """Result for a frame the motion gate skipped; tracks age as on an empty frame"""
+        self.resuming = True
+        objects = self.intrusion_detector.tracker.mark_missed()
+        return FrameResult(False, [], [], False, objects, None, [], True)
\ No newline at end of file
@@ -0,0 +1,151 @@
+import gzip
+import json
+import os
+import re
+import threading
+from bisect import bisect_right
+from datetime import datetime, timezone
+from config.settings import ARCHIVE_ROOT, ARCHIVE_CACHE_DAYS
+
+DAY_SECONDS = 86400
+
+# Archive file of one UTC day: events-YYYY-MM-DD.ndjson.gz
+FILE_PATTERN = re.compile(r'^events-(\d{4}-\d{2}-\d{2})\.ndjson\.gz$')
+
+# Fields of an archived event, in the order of the database columns (plus ts)
+FIELDS = ('id', 'timestamp', 'event_type', 'value', 'camera_id', 'media_uid', 'zone', 'direction',
+          'ts')
+TS_INDEX = FIELDS.index('ts')
+
+def day_of(ts):
+    """UTC day (YYYY-MM-DD) of a Unix timestamp"""
+    return datetime.fromtimestamp(ts, timezone.utc).strftime('%Y-%m-%d')
+
+def day_start(day):
+    """Unix time at which a UTC day (YYYY-MM-DD) starts"""
+    return datetime.strptime(day, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp()
+
+
+class EventArchive:
+    """Events moved out of the database, as gzip-compressed NDJSON files per UTC day
+    
+    append() adds rows to the file of their day; every call writes one
+    more gzip member, which readers see as one continuous stream. Files
+    are flushed and synced before append() returns, so callers can delete
+    the rows from the database afterwards. If that delete is lost (crash),
+    the next run archives the rows again; query() drops such duplicates by
+    event ID.
+    
+    query() answers the same filters as Database.query_events() by reading
+    only the day files that overlap the requested time range. The decoded
+    rows of the last cache_days files read stay in memory until the file
+    changes, so paging through a day with Database.iter_events()
+    decompresses it once rather than once per page.
+    """
+    
+    def __init__(self, root=ARCHIVE_ROOT, cache_days=ARCHIVE_CACHE_DAYS):
+        self.root = root
+        self.cache_days = cache_days
+        self.cache = {}  # Day -> ((mtime, size), rows, keys), least recently used first
+        self.cache_lock = threading.Lock()
+    
+    def path(self, day):
+        """File of one UTC day"""
+        return os.path.join(self.root, f"events-{day}.ndjson.gz")
+    
+    def days(self):
+        """Archived UTC days, oldest first"""
+        try:
+            names = os.listdir(self.root)
+        except FileNotFoundError:
+            return []
+        return sorted(match.group(1) for match in map(FILE_PATTERN.match, names) if match)
+    
+    def end(self):
+        """Unix time after the last archived day, or None when the archive is empty"""
+        days = self.days()
+        return day_start(days[-1]) + DAY_SECONDS if days else None
+    
+    def append(self, rows):
+        """Archive rows of FIELDS (the event columns followed by ts)"""
+        by_day = {}
+        for row in rows:
+            by_day.setdefault(day_of(row[TS_INDEX]), []).append(row)
+        os.makedirs(self.root, exist_ok=True)
+        for day, day_rows in by_day.items():
+            lines = ''.join(json.dumps(dict(zip(FIELDS, row))) + '\n' for row in day_rows)
+            with open(self.path(day), 'ab') as f:
+                f.write(gzip.compress(lines.encode()))
+                f.flush()
+                os.fsync(f.fileno())
+        return sorted(by_day)
+    
+    def read_day(self, day):
+        """All rows of one archived day, newest first, with duplicates removed"""
+        return self.load_day(day)[0]
+    
+    def load_day(self, day):
+        """(rows newest first, their (-ts, -id) sort keys) of one day, from the cache if current"""
+        stat = os.stat(self.path(day))
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self.cache_lock:
+            cached = self.cache.pop(day, None)
+            if cached is not None and cached[0] == version:
+                self.cache[day] = cached
+                return cached[1:]
+        
+        rows = {}
+        with gzip.open(self.path(day), 'rt') as f:
+            for line in f:
+                event = json.loads(line)
+                # Files archived before zone and direction existed lack them
+                rows[event['id']] = tuple(event.get(field) for field in FIELDS)
+        rows = sorted(rows.values(), key=lambda row: (row[TS_INDEX], row[0]), reverse=True)
+        keys = [(-row[TS_INDEX], -row[0]) for row in rows]
+        
+        if self.cache_days > 0:
+            with self.cache_lock:
+                self.cache[day] = (version, rows, keys)
+                while len(self.cache) > self.cache_days:
+                    del self.cache[next(iter(self.cache))]
+        return rows, keys
+    
+    def query(self, start=None, end=None, event_type=None, camera_id=None, min_value=None,
+              before=None, limit=100):
+        """Archived rows matching the filters, newest first
+        
+        Same semantics as Database.query_events(): start inclusive, end
+        exclusive, and before is a decoded (ts, id) cursor. Rows are tuples
+        of FIELDS.
+        
+        Days are disjoint and their rows are sorted newest first, so the
+        scan starts at the cursor (binary search) and stops after limit
+        matches instead of filtering whole days on every page.
+        """
+        matched = []
+        for day in reversed(self.days()):
+            first = day_start(day)
+            if end is not None and first >= end:
+                continue
+            if before is not None and first > before[0]:
+                continue
+            if start is not None and first + DAY_SECONDS <= start:
+                break
+            rows, keys = self.load_day(day)
+            begin = 0
+            if end is not None:
+                begin = bisect_right(keys, (-end, float('inf')))
+            if before is not None:
+                begin = max(begin, bisect_right(keys, (-before[0], -before[1])))
+            for index in range(begin, len(rows)):
+                row = rows[index]
+                if start is not None and row[TS_INDEX] < start:
+                    break
+                if ((event_type is not None and row[2] != event_type)
+                        or (camera_id is not None and row[4] != camera_id)
+                        or (min_value is not None and row[3] < min_value)):
+                    continue
+                matched.append(row)
+                if len(matched) >= limit:
+                    return matched
+        return matched
\ No newline at end of file
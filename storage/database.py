@@ -1,14 +1,180 @@
 import sqlite3
 import os
-from config.settings import DB_PATH
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from storage import rollups
+from storage.archive import EventArchive
+from config.settings import (DB_PATH, DB_WRITE_BATCH_SIZE, DB_FLUSH_INTERVAL, DB_MAX_PENDING,
+                             DB_QUERY_PAGE_SIZE, DB_READER_CONNECTIONS, DB_POOL_TIMEOUT,
+                             ARCHIVE_ROOT)
+
+EVENT_COLUMNS = 'id, timestamp, event_type, value, camera_id, media_uid, zone, direction'
+TS_INDEX = 8  # Position of ts in rows selected as f'{EVENT_COLUMNS}, ts'
+MEDIA_COLUMNS = 'media_uid, camera_id, kind, sha256, path, bytes, frames, ts'
+
+def parse_timestamp(timestamp):
+    """Convert an ISO 8601 timestamp to Unix seconds (UTC if no zone is given), or None"""
+    try:
+        parsed = datetime.fromisoformat(str(timestamp).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+def encode_cursor(ts, event_id):
+    """Opaque pagination cursor for the position after an event"""
+    return f"{ts!r}:{event_id}"
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor(); raises ValueError for malformed cursors"""
+    ts, event_id = cursor.split(':')
+    return float(ts), int(event_id)
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection became free in time"""
+
+
+class ConnectionPool:
+    """One writer connection and N reader connections to a SQLite database in WAL mode
+    
+    WAL lets readers run concurrently with each other and with the single
+    writer. Connections are checked out for the duration of one operation
+    (one request or one page) with reader() or writer(), so a connection is
+    only ever used by one thread at a time. With readers=0 every read goes
+    through the writer connection, like a single shared connection.
+    """
+    
+    def __init__(self, db_path, readers=DB_READER_CONNECTIONS, timeout=DB_POOL_TIMEOUT):
+        self.db_path = db_path
+        self.timeout = timeout
+        self.write_conn = self.connect()
+        # Lets retention return freed pages in small steps; only takes effect
+        # on new databases (existing ones: python -m storage.retention convert)
+        self.write_conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        self.write_conn.execute('PRAGMA journal_mode=WAL')
+        self.write_lock = threading.Lock()
+        
+        self.readers = readers
+        self.idle_readers = queue.LifoQueue()
+        for _ in range(readers):
+            conn = self.connect()
+            conn.execute('PRAGMA query_only=ON')
+            self.idle_readers.put(conn)
+        
+        # Counters: checkouts that had to wait for a free connection
+        self.stats_lock = threading.Lock()
+        self.read_checkouts = 0
+        self.read_waits = 0
+        self.read_wait_time = 0.0
+        self.write_checkouts = 0
+        self.write_waits = 0
+        self.write_wait_time = 0.0
+    
+    def connect(self):
+        """Open a tuned connection that may be handed between threads"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        # NORMAL syncs the WAL only at checkpoints, which is still safe against corruption
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA busy_timeout=5000')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        return conn
+    
+    @contextmanager
+    def writer(self):
+        """Check out the writer connection; the block runs as one transaction"""
+        waited = not self.write_lock.acquire(blocking=False)
+        if waited:
+            start = time.monotonic()
+            if not self.write_lock.acquire(timeout=self.timeout):
+                raise PoolTimeout("Timed out waiting for the writer connection")
+            self.count_wait('write', time.monotonic() - start)
+        try:
+            with self.stats_lock:
+                self.write_checkouts += 1
+            with self.write_conn:
+                yield self.write_conn
+        finally:
+            self.write_lock.release()
+    
+    @contextmanager
+    def reader(self):
+        """Check out a reader connection (the writer connection if there are no readers)"""
+        if self.readers == 0:
+            with self.writer() as conn:
+                yield conn
+            return
+        
+        try:
+            conn = self.idle_readers.get_nowait()
+        except queue.Empty:
+            start = time.monotonic()
+            try:
+                conn = self.idle_readers.get(timeout=self.timeout)
+            except queue.Empty:
+                raise PoolTimeout("Timed out waiting for a reader connection") from None
+            self.count_wait('read', time.monotonic() - start)
+        try:
+            with self.stats_lock:
+                self.read_checkouts += 1
+            yield conn
+        finally:
+            self.idle_readers.put(conn)
+    
+    def count_wait(self, kind, seconds):
+        """Record one checkout that had to wait"""
+        with self.stats_lock:
+            if kind == 'read':
+                self.read_waits += 1
+                self.read_wait_time += seconds
+            else:
+                self.write_waits += 1
+                self.write_wait_time += seconds
+    
+    def get_stats(self):
+        """Return checkout and wait counters"""
+        with self.stats_lock:
+            return {
+                'readers': self.readers,
+                'idle_readers': self.idle_readers.qsize(),
+                'read_checkouts': self.read_checkouts,
+                'read_waits': self.read_waits,
+                'read_wait_ms': 1000.0 * self.read_wait_time,
+                'write_checkouts': self.write_checkouts,
+                'write_waits': self.write_waits,
+                'write_wait_ms': 1000.0 * self.write_wait_time,
+            }
+    
+    def close(self):
+        """Close all connections"""
+        while not self.idle_readers.empty():
+            self.idle_readers.get_nowait().close()
+        self.write_conn.close()
+
 
 class Database:
-    """Handles SQLite database operations"""
+    """Handles SQLite database operations
     
-    def __init__(self):
+    Used from many threads (API requests and the event writer): writes go
+    through the pool's single writer connection and reads through its
+    reader connections. self.conn is the writer connection, used directly
+    only for schema setup.
+    
+    Events that retention moved to the archive (storage/archive.py) are
+    still returned by query_events() and iter_events() for time ranges
+    that reach back into it.
+    """
+    
+    def __init__(self, db_path=DB_PATH, readers=DB_READER_CONNECTIONS, archive_root=ARCHIVE_ROOT):
         # Ensure data directory exists
-        os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-        self.conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.db_path = db_path
+        self.archive = EventArchive(archive_root) if archive_root else None
+        self.pool = ConnectionPool(db_path, readers)
+        self.conn = self.pool.write_conn
         self.create_table()
     
     def create_table(self):
@@ -19,29 +185,333 @@ class Database:
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 timestamp TEXT NOT NULL,
                 event_type TEXT NOT NULL,
-                value INTEGER NOT NULL
+                value INTEGER NOT NULL,
+                camera_id TEXT,
+                ts REAL,
+                media_uid TEXT,
+                zone TEXT,
+                direction TEXT
             )
         ''')
+        # Snapshot and clip files of an event, linked by the event's media_uid
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS event_media (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                media_uid TEXT NOT NULL,
+                camera_id TEXT,
+                kind TEXT NOT NULL,
+                sha256 TEXT NOT NULL,
+                path TEXT NOT NULL,
+                bytes INTEGER NOT NULL,
+                frames INTEGER NOT NULL,
+                ts REAL NOT NULL
+            )
+        ''')
+        self.migrate_table()
+        self.create_indexes()
+        if rollups.create_rollup_table(self.conn):
+            rollups.backfill(self.conn)
         self.conn.commit()
         print("Database initialized")
     
+    def migrate_table(self):
+        """Add columns introduced after the events table was first created"""
+        cursor = self.conn.cursor()
+        cursor.execute('PRAGMA table_info(events)')
+        columns = {row[1] for row in cursor.fetchall()}
+        if 'camera_id' not in columns:
+            cursor.execute('ALTER TABLE events ADD COLUMN camera_id TEXT')
+        if 'ts' not in columns:
+            # Numeric copy of timestamp for range queries, backfilled for existing rows
+            cursor.execute('ALTER TABLE events ADD COLUMN ts REAL')
+            cursor.execute('SELECT id, timestamp FROM events')
+            cursor.executemany('UPDATE events SET ts = ? WHERE id = ?',
+                               [(parse_timestamp(timestamp), event_id)
+                                for event_id, timestamp in cursor.fetchall()])
+        if 'media_uid' not in columns:
+            cursor.execute('ALTER TABLE events ADD COLUMN media_uid TEXT')
+        if 'zone' not in columns:
+            # Crossed zone and direction of intrusion events
+            cursor.execute('ALTER TABLE events ADD COLUMN zone TEXT')
+            cursor.execute('ALTER TABLE events ADD COLUMN direction TEXT')
+    
+    def create_indexes(self):
+        """Create indexes for time-range queries, optionally filtered by type or camera"""
+        cursor = self.conn.cursor()
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_events_ts ON events (ts, id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_events_type_ts ON events (event_type, ts, id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_events_camera_ts ON events (camera_id, ts, id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_event_media_uid ON event_media (media_uid)')
+    
     def insert_event(self, event):
         """Insert event into database"""
-        cursor = self.conn.cursor()
-        cursor.execute(
-            'INSERT INTO events (timestamp, event_type, value) VALUES (?, ?, ?)',
-            (event['timestamp'], event['event_type'], event['value'])
-        )
-        self.conn.commit()
+        with self.pool.writer() as conn:
+            ts = parse_timestamp(event['timestamp'])
+            cursor = conn.cursor()
+            cursor.execute(
+                'INSERT INTO events (timestamp, event_type, value, camera_id, ts, media_uid, zone, '
+                'direction) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (event['timestamp'], event['event_type'], event['value'], event.get('camera_id'), ts,
+                 event.get('media_uid'), event.get('zone'), event.get('direction'))
+            )
+            rollups.update_rollups(conn, [(ts, event['event_type'], event['value'],
+                                           event.get('camera_id'))])
         print(f"Event stored: {event['event_type']} at {event['timestamp']}")
     
+    def insert_events(self, events):
+        """Insert many events, and their rollup updates, in a single transaction"""
+        rows = [(e['timestamp'], e['event_type'], e['value'], e.get('camera_id'),
+                 parse_timestamp(e['timestamp']), e.get('media_uid'), e.get('zone'),
+                 e.get('direction')) for e in events]
+        with self.pool.writer() as conn:
+            conn.executemany(
+                'INSERT INTO events (timestamp, event_type, value, camera_id, ts, media_uid, zone, '
+                'direction) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                rows
+            )
+            rollups.update_rollups(conn, [(row[4], row[1], row[2], row[3]) for row in rows])
+    
+    def insert_media(self, media_uid, camera_id, items, ts):
+        """Record stored media files of one event
+        
+        items are (kind, sha256, path relative to MEDIA_ROOT, bytes, frames).
+        """
+        with self.pool.writer() as conn:
+            conn.executemany(
+                f'INSERT INTO event_media ({MEDIA_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [(media_uid, camera_id, kind, sha256, path, size, frames, ts)
+                 for kind, sha256, path, size, frames in items]
+            )
+    
+    def get_media(self, media_uid):
+        """Media files recorded for a media UID"""
+        with self.pool.reader() as conn:
+            return conn.execute(
+                f'SELECT {MEDIA_COLUMNS} FROM event_media WHERE media_uid = ? ORDER BY id',
+                (media_uid,)
+            ).fetchall()
+    
     def get_recent_events(self, limit=10):
         """Retrieve recent events"""
-        cursor = self.conn.cursor()
-        cursor.execute('SELECT * FROM events ORDER BY id DESC LIMIT ?', (limit,))
-        return cursor.fetchall()
+        with self.pool.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f'SELECT {EVENT_COLUMNS} FROM events ORDER BY id DESC LIMIT ?',
+                (limit,)
+            )
+            return cursor.fetchall()
+    
+    def query_events(self, start=None, end=None, event_type=None, camera_id=None, min_value=None,
+                     cursor=None, limit=100):
+        """Retrieve one page of events, newest first, filtered by the given criteria
+        
+        start and end are Unix seconds (start inclusive, end exclusive).
+        Pagination is keyset-based on (ts, id): pass the returned cursor to
+        get the next page. Returns (rows, next cursor or None). Events whose
+        timestamp could not be parsed have no ts and never match. Archived
+        events are merged in when the page reaches back into the archive.
+        """
+        conditions = ['ts IS NOT NULL']
+        params = []
+        if start is not None:
+            conditions.append('ts >= ?')
+            params.append(start)
+        if end is not None:
+            conditions.append('ts < ?')
+            params.append(end)
+        if event_type is not None:
+            conditions.append('event_type = ?')
+            params.append(event_type)
+        if camera_id is not None:
+            conditions.append('camera_id = ?')
+            params.append(camera_id)
+        if min_value is not None:
+            conditions.append('value >= ?')
+            params.append(min_value)
+        before = None
+        if cursor is not None:
+            before = decode_cursor(cursor)
+            conditions.append('(ts, id) < (?, ?)')
+            params.extend(before)
+        
+        with self.pool.reader() as conn:
+            rows = conn.execute(
+                f'SELECT {EVENT_COLUMNS}, ts FROM events WHERE {" AND ".join(conditions)} '
+                'ORDER BY ts DESC, id DESC LIMIT ?',
+                params + [limit]
+            ).fetchall()
+        
+        # Every archived event is older than the archive's end
+        archive_end = self.archive.end() if self.archive else None
+        if (archive_end is not None and (start is None or start < archive_end)
+                and (len(rows) < limit or rows[-1][TS_INDEX] < archive_end)):
+            archived = self.archive.query(start, end, event_type, camera_id, min_value, before,
+                                          limit)
+            # An event archived just before a crash can still be in the table
+            merged = {row[0]: row for row in archived}
+            merged.update((row[0], row) for row in rows)
+            rows = sorted(merged.values(), key=lambda row: (row[TS_INDEX], row[0]),
+                          reverse=True)[:limit]
+        
+        next_cursor = encode_cursor(rows[-1][TS_INDEX], rows[-1][0]) if len(rows) == limit else None
+        return [row[:TS_INDEX] for row in rows], next_cursor
+    
+    def get_stats(self, granularity, start=None, end=None, camera_id=None, event_type=None,
+                  limit=1000):
+        """Bucketed event counts and value sums from the rollup tables"""
+        with self.pool.reader() as conn:
+            return rollups.query_rollups(conn, granularity, start, end, camera_id, event_type, limit)
+    
+    def iter_events(self, limit=None, page_size=DB_QUERY_PAGE_SIZE, cursor=None, **filters):
+        """Yield all matching events (up to limit) page by page, newest first
+        
+        Only one page is held in memory and the reader connection is
+        returned to the pool between pages, so long exports do not hold it.
+        """
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = page_size if remaining is None else min(page_size, remaining)
+            rows, cursor = self.query_events(cursor=cursor, limit=size, **filters)
+            yield from rows
+            if remaining is not None:
+                remaining -= len(rows)
+            if cursor is None:
+                return
     
     def close(self):
-        """Close database connection"""
-        self.conn.close()
-        print("Database connection closed")
\ No newline at end of file
+        """Close database connections"""
+        self.pool.close()
+        print("Database connection closed")
+
+
+class EventWriter:
+    """Write-behind buffer that stores events from all API requests in batched transactions
+    
+    submit() returns immediately; a background thread writes pending events
+    with one executemany per transaction once DB_WRITE_BATCH_SIZE events are
+    waiting or DB_FLUSH_INTERVAL seconds have passed. Events accepted but not
+    yet flushed are lost if the process is killed. When the database falls
+    behind and max_pending events are already waiting, submit() refuses
+    new events so memory stays bounded and callers can retry later.
+    """
+    
+    def __init__(self, db, batch_size=DB_WRITE_BATCH_SIZE, flush_interval=DB_FLUSH_INTERVAL,
+                 max_pending=DB_MAX_PENDING):
+        self.db = db
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_pending = max(1, max_pending)
+        self.condition = threading.Condition()
+        self.pending = []
+        self.stopped = False
+        self.flush_requested = False
+        self.full = False  # Refusing events; logged once per overflow
+        self.thread = None
+        
+        # Counters
+        self.submitted = 0
+        self.completed = 0  # Events written or failed
+        self.failed = 0
+        self.transactions = 0
+        self.peak_pending = 0
+        self.refused = 0  # Events not accepted because the queue was full
+    
+    def start(self):
+        """Start the writer thread"""
+        self.thread = threading.Thread(target=self.run, name="event-writer", daemon=True)
+        self.thread.start()
+        return self
+    
+    def submit(self, events):
+        """Queue events for the next transaction; False (nothing queued) if the queue is full"""
+        with self.condition:
+            if self.pending and len(self.pending) + len(events) > self.max_pending:
+                if not self.full:
+                    print(f"[WARNING] Event writer queue full ({len(self.pending)} events "
+                          f"pending); refusing new events")
+                    self.full = True
+                self.refused += len(events)
+                return False
+            self.full = False
+            self.pending.extend(events)
+            self.submitted += len(events)
+            self.peak_pending = max(self.peak_pending, len(self.pending))
+            if len(self.pending) >= self.batch_size:
+                self.condition.notify_all()
+            return True
+    
+    def run(self):
+        """Writer thread: flush on size or time until stopped"""
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: (len(self.pending) >= self.batch_size or
+                                                 self.flush_requested or self.stopped),
+                                        timeout=self.flush_interval)
+                batch, self.pending = self.pending, []
+                self.flush_requested = False
+                stopping = self.stopped
+            
+            if batch:
+                self.write(batch)
+            
+            with self.condition:
+                self.completed += len(batch)
+                self.condition.notify_all()
+                if stopping and not self.pending:
+                    return
+    
+    def write(self, batch):
+        """Store a batch in one transaction, or event by event if that fails
+        
+        A failing batch is rolled back as a whole, so it is retried one
+        event per transaction: a malformed event is dropped and reported
+        without losing the events other requests sent with it. No error
+        ends the writer thread.
+        """
+        try:
+            self.db.insert_events(batch)
+            self.transactions += 1
+            return
+        except Exception as e:
+            if len(batch) == 1:
+                self.failed += 1
+                print(f"[ERROR] Failed to store event {batch[0]!r}: {e}")
+                return
+            print(f"[WARNING] Failed to store {len(batch)} event(s) ({e}); retrying one at a time")
+        
+        for event in batch:
+            try:
+                self.db.insert_events([event])
+                self.transactions += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"[ERROR] Failed to store event {event!r}: {e}")
+    
+    def flush(self, timeout=None):
+        """Wait until every event submitted so far has been written"""
+        with self.condition:
+            target = self.submitted
+            self.flush_requested = True
+            self.condition.notify_all()
+            return self.condition.wait_for(lambda: self.completed >= target, timeout)
+    
+    def stop(self):
+        """Write all pending events and stop the thread"""
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join()
+    
+    def get_stats(self):
+        """Return write counters"""
+        with self.condition:
+            pending = len(self.pending)
+        return {
+            'pending': pending,
+            'max_pending': self.peak_pending,
+            'written': self.completed - self.failed,
+            'failed': self.failed,
+            'refused': self.refused,
+            'transactions': self.transactions,
+        }
\ No newline at end of file
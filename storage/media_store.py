@@ -0,0 +1,69 @@
+import hashlib
+import os
+import uuid
+from config.settings import MEDIA_ROOT
+
+class MediaStore:
+    """Content-addressed files under one directory
+    
+    A file is named by the SHA-256 of its contents and kept in a
+    subdirectory named by the first two hex digits (root/ab/ab12...ef.jpg),
+    so storing the same bytes twice keeps a single copy. Files are written
+    under a temporary name and renamed into place, so a reader never sees a
+    partial file. Paths handed out are relative to the root.
+    
+    Directories are only created when a file is stored, so a store that
+    just serves files (the API with media capture off) leaves no trace.
+    """
+    
+    def __init__(self, root=MEDIA_ROOT):
+        self.root = root
+        self.tmp_dir = os.path.join(root, 'tmp')
+    
+    def temp_path(self, ext):
+        """Unique path for a file being built, to be passed to put_file()"""
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        return os.path.join(self.tmp_dir, f"{uuid.uuid4().hex}.{ext}")
+    
+    def relative_path(self, digest, ext):
+        """Store path of a file with the given digest"""
+        return os.path.join(digest[:2], f"{digest}.{ext}")
+    
+    def absolute_path(self, relative_path):
+        """Filesystem path of a stored file; rejects paths outside the store"""
+        root = os.path.realpath(self.root)
+        path = os.path.realpath(os.path.join(root, relative_path))
+        if os.path.commonpath([root, path]) != root:
+            raise ValueError(f"Media path outside the store: {relative_path}")
+        return path
+    
+    def commit(self, tmp_path, digest, ext):
+        """Move a finished temporary file to its content address"""
+        relative_path = self.relative_path(digest, ext)
+        path = os.path.join(self.root, relative_path)
+        if os.path.exists(path):
+            os.remove(tmp_path)  # Same content is already stored
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+        return relative_path
+    
+    def put(self, data, ext):
+        """Store bytes; returns (sha256 hex digest, relative path)"""
+        digest = hashlib.sha256(data).hexdigest()
+        relative_path = self.relative_path(digest, ext)
+        if os.path.exists(os.path.join(self.root, relative_path)):
+            return digest, relative_path
+        tmp_path = self.temp_path(ext)
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        return digest, self.commit(tmp_path, digest, ext)
+    
+    def put_file(self, tmp_path, ext):
+        """Store a file written at temp_path(); returns (sha256 hex digest, relative path)"""
+        sha256 = hashlib.sha256()
+        with open(tmp_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                sha256.update(chunk)
+        digest = sha256.hexdigest()
+        return digest, self.commit(tmp_path, digest, ext)
\ No newline at end of file
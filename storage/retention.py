@@ -0,0 +1,199 @@
+"""Event retention: keeps the events table within an age and row limit
+
+Events past RETENTION_DAYS, and the oldest events beyond
+RETENTION_MAX_ROWS, are appended to the day files of the archive
+(storage/archive.py) and then deleted, RETENTION_BATCH_SIZE at a time.
+Each batch is its own short write transaction followed by a pause, so
+event inserts from the API never wait for more than one batch. Freed
+pages are then returned to the filesystem with incremental vacuum steps
+of RETENTION_VACUUM_PAGES. Rollups and event media are kept, so
+statistics still cover archived events.
+
+The API server runs a pass every RETENTION_INTERVAL seconds when a limit
+is set. Run one pass by hand, or switch an existing database to
+incremental vacuum (a one-time full VACUUM), with:
+    python -m storage.retention run [--db data/events.db] [--days 30] [--max-rows N]
+    python -m storage.retention convert [--db data/events.db]
+"""
+import argparse
+import threading
+import time
+from storage.database import EVENT_COLUMNS, TS_INDEX, Database
+from config.settings import (RETENTION_DAYS, RETENTION_MAX_ROWS, RETENTION_INTERVAL,
+                             RETENTION_BATCH_SIZE, RETENTION_PAUSE, RETENTION_VACUUM_PAGES)
+
+DAY_SECONDS = 86400
+INCREMENTAL = 2  # PRAGMA auto_vacuum value of incremental mode
+
+class EventRetention:
+    """Moves aged-out events to the archive in small batches, on a background thread"""
+    
+    def __init__(self, db, max_days=RETENTION_DAYS, max_rows=RETENTION_MAX_ROWS,
+                 interval=RETENTION_INTERVAL, batch_size=RETENTION_BATCH_SIZE,
+                 pause=RETENTION_PAUSE, vacuum_pages=RETENTION_VACUUM_PAGES):
+        self.db = db
+        self.max_days = max_days
+        self.max_rows = max_rows
+        self.interval = interval
+        self.batch_size = max(1, batch_size)
+        self.pause = pause
+        self.vacuum_pages = max(1, vacuum_pages)
+        self.stopped = threading.Event()
+        self.thread = None
+        self.warned = False  # Reported once that the database cannot vacuum incrementally
+        
+        # Counters
+        self.passes = 0
+        self.archived = 0
+        self.deleted = 0
+        self.pages_freed = 0
+    
+    @property
+    def enabled(self):
+        """True when an age or row limit is set"""
+        return self.max_days is not None or self.max_rows is not None
+    
+    def start(self):
+        """Run a pass now and every interval seconds until stopped"""
+        self.thread = threading.Thread(target=self.run, name="event-retention", daemon=True)
+        self.thread.start()
+        return self
+    
+    def run(self):
+        """Retention thread"""
+        while not self.stopped.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"[ERROR] Event retention failed: {e}")
+            self.stopped.wait(self.interval)
+    
+    def run_once(self, now=None):
+        """One pass: archive and delete what is over the limits, then vacuum; returns stats"""
+        start = time.monotonic()
+        cutoff = None if self.max_days is None else (now or time.time()) - self.max_days * DAY_SECONDS
+        excess = 0
+        if self.max_rows is not None:
+            with self.db.pool.reader() as conn:
+                rows = conn.execute('SELECT COUNT(*) FROM events WHERE ts IS NOT NULL').fetchone()[0]
+            excess = max(0, rows - self.max_rows)
+        
+        removed = 0
+        batches = 0
+        while not self.stopped.is_set():
+            count = self.remove_batch(cutoff, excess - removed)
+            if not count:
+                break
+            removed += count
+            batches += 1
+            self.stopped.wait(self.pause)
+        pages = self.vacuum() if removed else 0
+        
+        self.passes += 1
+        if removed:
+            print(f"[OK] Retention: {removed} event(s) moved out in {batches} batch(es), "
+                  f"{pages} page(s) freed")
+        return {'removed': removed, 'batches': batches, 'pages_freed': pages,
+                'seconds': time.monotonic() - start}
+    
+    def remove_batch(self, cutoff, excess):
+        """Archive and delete the oldest events that are over a limit; returns how many"""
+        with self.db.pool.reader() as conn:
+            rows = conn.execute(
+                f'SELECT {EVENT_COLUMNS}, ts FROM events WHERE ts IS NOT NULL '
+                'ORDER BY ts, id LIMIT ?', (self.batch_size,)
+            ).fetchall()
+        
+        # Rows are oldest first, so the rows to remove are a prefix
+        aged = sum(1 for row in rows if cutoff is not None and row[TS_INDEX] < cutoff)
+        count = max(aged, min(max(excess, 0), len(rows)))
+        if not count:
+            return 0
+        rows = rows[:count]
+        
+        # Archive first: a crash in between leaves a duplicate, never a lost event
+        if self.db.archive:
+            self.db.archive.append(rows)
+            self.archived += count
+        with self.db.pool.writer() as conn:
+            conn.executemany('DELETE FROM events WHERE id = ?', [(row[0],) for row in rows])
+        self.deleted += count
+        return count
+    
+    def vacuum(self):
+        """Return free pages to the filesystem in small steps; returns pages freed"""
+        with self.db.pool.writer() as conn:
+            mode = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+        if mode != INCREMENTAL:
+            if not self.warned:
+                self.warned = True
+                print("[WARNING] Database is not in incremental vacuum mode; freed pages are "
+                      "reused but the file does not shrink (run: python -m storage.retention "
+                      "convert)")
+            return 0
+        
+        freed = 0
+        while not self.stopped.is_set():
+            with self.db.pool.writer() as conn:
+                free = conn.execute('PRAGMA freelist_count').fetchone()[0]
+                if not free:
+                    break
+                # executescript steps the pragma to completion; execute() frees one page
+                conn.executescript(f'PRAGMA incremental_vacuum({self.vacuum_pages})')
+            freed += min(free, self.vacuum_pages)
+            self.stopped.wait(self.pause)
+        with self.db.pool.writer() as conn:
+            # Truncates the file once no reader needs the old pages; never waits
+            conn.execute('PRAGMA wal_checkpoint(PASSIVE)').fetchall()
+        self.pages_freed += freed
+        return freed
+    
+    def stop(self):
+        """Stop the retention thread, finishing the current batch"""
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+    
+    def get_stats(self):
+        """Return retention counters"""
+        return {
+            'passes': self.passes,
+            'archived': self.archived,
+            'deleted': self.deleted,
+            'pages_freed': self.pages_freed,
+        }
+
+def convert(db):
+    """Switch a database to incremental auto-vacuum (rewrites the whole file once)"""
+    with db.pool.writer() as conn:
+        conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        conn.execute('VACUUM')
+        return conn.execute('PRAGMA auto_vacuum').fetchone()[0] == INCREMENTAL
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Archive aged-out events and compact the database")
+    parser.add_argument('command', choices=['run', 'convert'])
+    parser.add_argument('--db', default=None, help='database path (default: DB_PATH)')
+    parser.add_argument('--days', type=float, default=RETENTION_DAYS)
+    parser.add_argument('--max-rows', type=int, default=RETENTION_MAX_ROWS)
+    args = parser.parse_args()
+    
+    db = Database(args.db) if args.db else Database()
+    if args.command == 'convert':
+        if convert(db):
+            print("[OK] Database converted to incremental vacuum")
+        else:
+            print("[ERROR] Conversion failed")
+    else:
+        retention = EventRetention(db, args.days, args.max_rows)
+        if not retention.enabled:
+            print("[WARNING] No limit set: use --days and/or --max-rows")
+        else:
+            stats = retention.run_once()
+            print(f"[OK] {stats['removed']} event(s) archived and deleted in "
+                  f"{stats['seconds']:.1f}s")
+    db.close()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,152 @@
+"""Per-minute, per-hour and per-day event counts and value sums
+
+The event_rollups table holds one row per (granularity, camera, event
+type, bucket) and is updated with an UPSERT in the same transaction that
+inserts the raw events, so statistics never need to scan the events table.
+
+Rebuild it from the stored events with:
+    python -m storage.rollups backfill [--db data/events.db]
+"""
+import argparse
+from collections import defaultdict
+
+# Bucket size in seconds per granularity (UTC buckets)
+GRANULARITIES = {'minute': 60, 'hour': 3600, 'day': 86400}
+
+NO_CAMERA = ''  # Stored in place of a missing camera_id, which can't be part of the key
+
+UPSERT_SQL = '''
+    INSERT INTO event_rollups (granularity, camera_id, event_type, bucket, count, value_sum)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT (granularity, camera_id, event_type, bucket) DO UPDATE SET
+        count = count + excluded.count,
+        value_sum = value_sum + excluded.value_sum
+'''
+
+def create_rollup_table(conn):
+    """Create the rollup table; returns True if it did not exist yet"""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'event_rollups'"
+    ).fetchone()
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS event_rollups (
+            granularity TEXT NOT NULL,
+            camera_id TEXT NOT NULL,
+            event_type TEXT NOT NULL,
+            bucket INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            value_sum REAL NOT NULL,
+            PRIMARY KEY (granularity, camera_id, event_type, bucket)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_rollups_bucket ON event_rollups (granularity, bucket)')
+    return exists is None
+
+def aggregate(rows, totals=None):
+    """Add (ts, event_type, value, camera_id) rows to per-bucket totals
+    
+    totals maps (granularity, camera_id, event_type, bucket) to
+    [count, value_sum]. Rows without a ts are skipped.
+    """
+    if totals is None:
+        totals = defaultdict(lambda: [0, 0.0])
+    for ts, event_type, value, camera_id in rows:
+        if ts is None:
+            continue
+        camera_id = NO_CAMERA if camera_id is None else camera_id
+        for granularity, seconds in GRANULARITIES.items():
+            total = totals[(granularity, camera_id, event_type, int(ts // seconds) * seconds)]
+            total[0] += 1
+            total[1] += value
+    return totals
+
+def write_totals(conn, totals):
+    """UPSERT aggregated totals into the rollup table"""
+    conn.executemany(UPSERT_SQL, [key + tuple(total) for key, total in totals.items()])
+
+def update_rollups(conn, rows):
+    """Add newly inserted (ts, event_type, value, camera_id) rows to the rollups"""
+    write_totals(conn, aggregate(rows))
+
+def query_rollups(conn, granularity, start=None, end=None, camera_id=None, event_type=None,
+                  limit=1000):
+    """Bucketed totals as (bucket, camera_id, event_type, count, value_sum) rows
+    
+    Returns the newest `limit` rows in the range, in ascending bucket order.
+    start is inclusive and end exclusive (Unix seconds); a bucket is
+    included when it starts in the range.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown granularity: {granularity}")
+    conditions = ['granularity = ?']
+    params = [granularity]
+    if start is not None:
+        conditions.append('bucket >= ?')
+        params.append(start)
+    if end is not None:
+        conditions.append('bucket < ?')
+        params.append(end)
+    if camera_id is not None:
+        conditions.append('camera_id = ?')
+        params.append(camera_id)
+    if event_type is not None:
+        conditions.append('event_type = ?')
+        params.append(event_type)
+    
+    rows = conn.execute(
+        'SELECT bucket, camera_id, event_type, count, value_sum FROM event_rollups '
+        f'WHERE {" AND ".join(conditions)} ORDER BY bucket DESC, camera_id, event_type LIMIT ?',
+        params + [limit]
+    ).fetchall()
+    rows.reverse()
+    return [(bucket, None if camera == NO_CAMERA else camera, event_type, count, value_sum)
+            for bucket, camera, event_type, count, value_sum in rows]
+
+def backfill(conn, fetch_size=10000):
+    """Rebuild the rollups from the events table in one streaming pass
+    
+    Events are read in ts order, and totals are written out whenever a day
+    ends, so memory holds at most one day of buckets. Runs in the caller's
+    transaction. Returns the number of events aggregated.
+    """
+    conn.execute('DELETE FROM event_rollups')
+    cursor = conn.execute(
+        'SELECT ts, event_type, value, camera_id FROM events WHERE ts IS NOT NULL ORDER BY ts')
+    day_seconds = GRANULARITIES['day']
+    totals = None
+    current_day = None
+    events = 0
+    while True:
+        rows = cursor.fetchmany(fetch_size)
+        if not rows:
+            break
+        for row in rows:
+            day = int(row[0] // day_seconds)
+            if day != current_day:
+                # Every bucket of the previous day is complete
+                if totals:
+                    write_totals(conn, totals)
+                totals = None
+                current_day = day
+            totals = aggregate([row], totals)
+            events += 1
+    if totals:
+        write_totals(conn, totals)
+    return events
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Maintain event rollup tables")
+    parser.add_argument('command', choices=['backfill'])
+    parser.add_argument('--db', default=None, help='database path (default: DB_PATH)')
+    args = parser.parse_args()
+    
+    from storage.database import Database
+    db = Database(args.db) if args.db else Database()
+    with db.pool.writer() as conn:
+        events = backfill(conn)
+    print(f"[OK] Rebuilt rollups from {events} event(s)")
+    db.close()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,293 @@
+import multiprocessing as mp
+import os
+import queue
+import signal
+import threading
+import time
+from camera.shared_frames import SharedFrameStream, start_capture_process
+from camera.video_stream import VideoStream, ThreadedVideoStream, stream_options
+from processing.pipeline import DetectionPipeline
+from utils.clip_recorder import ClipRecorder
+from utils.event import Event
+from utils.memory import peak_rss_mb
+from utils.profiler import StageProfiler, metrics_registry
+from backend.client import EventDispatcher
+from config.runtime import RuntimeConfig
+from config.settings import (API_SERVER, CAMERAS, CAPTURE_PROCESS, CAPTURE_SHARED_SLOTS,
+                             CAPTURE_THREADED, EVENT_JOURNAL_PATH, MEDIA_CAPTURE, PROFILE_STAGES,
+                             RUNTIME_CONFIG, SUPERVISOR_REPORT_INTERVAL, SUPERVISOR_RESTART_DELAY,
+                             SUPERVISOR_MAX_RESTART_DELAY)
+
+def run_camera_worker(camera, stats_queue, stop_event, report_interval, channel=None):
+    """Run one camera pipeline until stopped (executes in a worker process)
+    
+    With a FrameChannel, frames come from the camera's capture process
+    through shared memory instead of being decoded here.
+    """
+    # Shutdown is driven by the supervisor through stop_event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    
+    camera_id = camera['camera_id']
+    options = stream_options(camera)
+    if channel is not None:
+        video_stream = SharedFrameStream(channel)
+    elif camera.get('threaded', CAPTURE_THREADED):
+        video_stream = ThreadedVideoStream(camera['source'], **options)
+    else:
+        video_stream = VideoStream(camera['source'], **options)
+    profiler = StageProfiler(camera_id) if PROFILE_STAGES else None
+    runtime = None
+    if camera.get('runtime_config', RUNTIME_CONFIG):
+        runtime = RuntimeConfig(camera).start()
+    pipeline = DetectionPipeline(camera, profiler=profiler, runtime=runtime)
+    
+    # Each worker journals to its own file while the API is unreachable
+    root, ext = os.path.splitext(EVENT_JOURNAL_PATH)
+    dispatcher = EventDispatcher(journal_path=f"{root}-{camera_id}{ext}").start()
+    recorder = None
+    if camera.get('media_capture', MEDIA_CAPTURE):
+        recorder = ClipRecorder(camera_id).start()
+    
+    frames = 0
+    skipped = 0
+    undecoded = 0  # Frames dropped before decoding while the motion gate is idle
+    intrusions = 0
+    lag_total = 0.0
+    lag_max = 0.0
+    window_start = time.monotonic()
+    
+    try:
+        while not stop_event.is_set():
+            if profiler:
+                start = profiler.start()
+            decode_skips = pipeline.decode_skips()
+            ret, frame = video_stream.read_frame(decode_skips)
+            if not ret:
+                # Files loop forever, so this is a lost camera: let the supervisor restart us
+                raise RuntimeError(f"Camera {camera_id} stopped delivering frames")
+            if profiler:
+                start = profiler.lap('read', start)
+            if recorder:
+                recorder.add(frame)
+                if profiler:
+                    profiler.lap('record', start)
+            
+            result = pipeline.process(frame)
+            if profiler:
+                start = profiler.start()
+            media_uid = recorder.trigger() if recorder and result.crossings else None
+            for crossing in result.crossings:
+                dispatcher.submit(Event.create_intrusion_event(camera_id, media_uid, crossing.zone,
+                                                               crossing.direction))
+                intrusions += 1
+            if profiler:
+                profiler.lap('dispatch', start)
+            
+            # Lag: time from decode to the end of processing
+            now = time.monotonic()
+            lag = now - video_stream.last_frame_time
+            lag_total += lag
+            lag_max = max(lag_max, lag)
+            frames += 1
+            skipped += result.skipped
+            undecoded += decode_skips
+            
+            elapsed = now - window_start
+            if elapsed >= report_interval:
+                stats_queue.put({
+                    'camera_id': camera_id,
+                    'fps': frames / elapsed,
+                    'skipped_pct': 100.0 * (skipped + undecoded) / (frames + undecoded),
+                    'lag_ms': 1000.0 * lag_total / frames,
+                    'max_lag_ms': 1000.0 * lag_max,
+                    'intrusions': intrusions,
+                    'tracked': len(result.objects),
+                    'peak_rss_mb': peak_rss_mb(),
+                    'event_queue': dispatcher.queue.qsize(),
+                    'events_dropped': dispatcher.dropped,
+                    'profile': profiler.summary() if profiler else None,
+                })
+                frames = 0
+                skipped = 0
+                undecoded = 0
+                intrusions = 0
+                lag_total = 0.0
+                lag_max = 0.0
+                window_start = now
+    finally:
+        video_stream.release()
+        if runtime:
+            runtime.stop()
+        if recorder:
+            recorder.stop()
+        dispatcher.stop()
+
+
+class CameraSupervisor:
+    """Runs one detection pipeline per camera in its own process and restarts crashed ones"""
+    
+    def __init__(self, cameras, report_interval=SUPERVISOR_REPORT_INTERVAL,
+                 restart_delay=SUPERVISOR_RESTART_DELAY,
+                 max_restart_delay=SUPERVISOR_MAX_RESTART_DELAY):
+        camera_ids = [camera['camera_id'] for camera in cameras]
+        if len(set(camera_ids)) != len(camera_ids):
+            raise ValueError("Camera IDs must be unique")
+        
+        self.cameras = {camera['camera_id']: camera for camera in cameras}
+        self.report_interval = report_interval
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        
+        # Spawn keeps workers independent of the API thread running in this process
+        self.context = mp.get_context('spawn')
+        self.stats_queue = self.context.Queue()
+        self.stop_event = self.context.Event()
+        
+        self.workers = {}  # Camera ID -> process
+        self.captures = {}  # Camera ID -> (capture process, FrameChannel)
+        self.started_at = {}  # Camera ID -> worker start time
+        self.restart_at = {}  # Camera ID -> scheduled restart time
+        self.backoff = {camera_id: restart_delay for camera_id in self.cameras}
+        self.restarts = {camera_id: 0 for camera_id in self.cameras}
+        self.stats = {}  # Camera ID -> latest stats report
+    
+    def start_worker(self, camera_id):
+        """Start the worker process for one camera, and its capture process if it has one"""
+        camera = self.cameras[camera_id]
+        channel = None
+        if camera.get('capture_process', CAPTURE_PROCESS):
+            capture, channel = start_capture_process(
+                self.context, camera['source'], stream_options(camera),
+                camera.get('shared_slots', CAPTURE_SHARED_SLOTS), f"capture-{camera_id}")
+            self.captures[camera_id] = (capture, channel)
+        process = self.context.Process(
+            target=run_camera_worker,
+            args=(camera, self.stats_queue, self.stop_event, self.report_interval, channel),
+            name=f"camera-{camera_id}",
+            daemon=True,
+        )
+        process.start()
+        self.workers[camera_id] = process
+        self.started_at[camera_id] = time.monotonic()
+        print(f"[OK] Started worker for camera {camera_id} (pid {process.pid})")
+    
+    def stop_capture(self, camera_id):
+        """Stop the capture process of one camera, if it has one"""
+        if camera_id not in self.captures:
+            return
+        capture, channel = self.captures.pop(camera_id)
+        channel.stop.set()
+        capture.join(timeout=5.0)
+        if capture.is_alive():
+            capture.terminate()
+            capture.join()
+    
+    def check_workers(self):
+        """Schedule restarts for exited workers and start those that are due"""
+        now = time.monotonic()
+        for camera_id, process in self.workers.items():
+            if process.is_alive() or camera_id in self.restart_at:
+                continue
+            
+            # Reset the backoff for workers that ran stably for a while
+            if now - self.started_at[camera_id] > self.max_restart_delay:
+                self.backoff[camera_id] = self.restart_delay
+            delay = self.backoff[camera_id]
+            self.backoff[camera_id] = min(delay * 2, self.max_restart_delay)
+            self.restart_at[camera_id] = now + delay
+            self.stats.pop(camera_id, None)
+            self.stop_capture(camera_id)
+            print(f"[WARNING] Worker for camera {camera_id} exited with code "
+                  f"{process.exitcode}, restarting in {delay:.1f}s")
+        
+        for camera_id, restart_time in list(self.restart_at.items()):
+            if now >= restart_time:
+                del self.restart_at[camera_id]
+                self.restarts[camera_id] += 1
+                self.start_worker(camera_id)
+    
+    def collect_stats(self, timeout):
+        """Drain worker stats reports, waiting up to timeout for the first one"""
+        try:
+            report = self.stats_queue.get(timeout=timeout)
+            while True:
+                self.stats[report['camera_id']] = report
+                if report['profile'] is not None:
+                    metrics_registry.publish(report['camera_id'], report['profile'])
+                report = self.stats_queue.get_nowait()
+        except queue.Empty:
+            pass
+    
+    def report(self):
+        """Print per-camera FPS and lag"""
+        print(f"\n{'Camera':<16}{'FPS':>8}{'Skip %':>8}{'Lag ms':>10}{'Max lag':>10}"
+              f"{'Tracked':>9}{'Peak MB':>9}{'Ev queue':>10}{'Ev drop':>9}{'Restarts':>10}")
+        total_fps = 0.0
+        for camera_id in self.cameras:
+            stats = self.stats.get(camera_id)
+            restarts = self.restarts[camera_id]
+            if stats is None:
+                print(f"{camera_id:<16}{'-':>8}{'-':>8}{'-':>10}{'-':>10}{'-':>9}{'-':>9}{'-':>10}"
+                      f"{'-':>9}{restarts:>10}")
+                continue
+            total_fps += stats['fps']
+            peak = '-' if stats['peak_rss_mb'] is None else f"{stats['peak_rss_mb']:.0f}"
+            print(f"{camera_id:<16}{stats['fps']:>8.1f}{stats['skipped_pct']:>8.0f}"
+                  f"{stats['lag_ms']:>10.1f}{stats['max_lag_ms']:>10.1f}{stats['tracked']:>9}"
+                  f"{peak:>9}{stats['event_queue']:>10}{stats['events_dropped']:>9}{restarts:>10}")
+        print(f"{'Total':<16}{total_fps:>8.1f}")
+    
+    def run(self):
+        """Start all workers and supervise them until interrupted"""
+        for camera_id in self.cameras:
+            self.start_worker(camera_id)
+        
+        next_report = time.monotonic() + self.report_interval
+        try:
+            while True:
+                self.collect_stats(timeout=0.5)
+                self.check_workers()
+                if time.monotonic() >= next_report:
+                    self.report()
+                    next_report += self.report_interval
+        except KeyboardInterrupt:
+            print("\n[STOP] Stopping supervisor...")
+        finally:
+            self.stop()
+    
+    def stop(self):
+        """Signal all workers to stop and wait for them"""
+        self.stop_event.set()
+        for camera_id, process in self.workers.items():
+            process.join(timeout=5.0)
+            if process.is_alive():
+                print(f"[WARNING] Worker for camera {camera_id} did not stop, terminating")
+                process.terminate()
+                process.join()
+        for camera_id in list(self.captures):
+            self.stop_capture(camera_id)
+
+
+def main():
+    """Supervisor entry point: one pipeline per camera in CAMERAS"""
+    # Workers send their events to this shared API. Imported here so spawned
+    # workers do not open the API database when they import this module.
+    if API_SERVER == "flask":
+        from backend.api import run_api
+        api_thread = threading.Thread(target=run_api, daemon=True)
+        api_thread.start()
+    
+    print("\n" + "="*60)
+    print("INTRUSION DETECTION SUPERVISOR")
+    print("="*60)
+    print(f"Cameras: {len(CAMERAS)}")
+    print(f"API Server: http://localhost:5000 ({API_SERVER})")
+    print("Press Ctrl+C to stop")
+    print("="*60 + "\n")
+    
+    supervisor = CameraSupervisor(CAMERAS)
+    supervisor.run()
+    print("[OK] Supervisor stopped successfully\n")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,24 @@
+import cv2
+import numpy as np
+import analyze
+
+def test_zero_frame_video(tmp_path):
+    path = str(tmp_path / 'empty.avi')
+    cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 25, (64, 64)).release()
+    
+    crossings, stats = analyze.analyze_video(path, verbose=False)
+    assert crossings == []
+    assert stats['frames'] == 0
+    assert stats['workers'] == 1
+
+def test_unknown_frame_count_reads_the_whole_file(tmp_path, monkeypatch):
+    path = str(tmp_path / 'short.avi')
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 25, (64, 64))
+    for _ in range(10):
+        writer.write(np.zeros((64, 64, 3), np.uint8))
+    writer.release()
+    monkeypatch.setattr(analyze, 'probe_video', lambda path: (0, 25.0))
+    
+    _, stats = analyze.analyze_video(path, verbose=False)
+    assert stats['frames'] == 10
+    assert stats['segments'] == 1
\ No newline at end of file
@@ -0,0 +1,56 @@
+import importlib
+import os
+import subprocess
+import sys
+import pytest
+
+@pytest.fixture(scope='module')
+def api_dir(tmp_path_factory):
+    """Working directory in which backend.api was imported"""
+    return tmp_path_factory.mktemp('api')
+
+@pytest.fixture(scope='module')
+def client(api_dir):
+    """Flask test client; the module's database and files live in a temporary directory"""
+    with pytest.MonkeyPatch.context() as patch:
+        patch.chdir(api_dir)  # DB_PATH and friends are relative
+        api = importlib.import_module('backend.api')
+        yield api.init_storage().test_client()
+        api.writer.stop()
+        api.db.close()
+
+def test_import_creates_no_media_directories(client, api_dir):
+    assert not (api_dir / 'data' / 'media').exists()
+
+def test_import_opens_no_database(tmp_path):
+    # Spawned capture processes import main.py in a fresh interpreter
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run([sys.executable, '-c', 'import backend.api'], cwd=tmp_path, check=True,
+                   env={**os.environ, 'PYTHONPATH': root})
+    assert not (tmp_path / 'data').exists()
+
+def test_put_config_with_malformed_json_is_rejected(client):
+    response = client.put('/api/config/cam-1', data='{"motion_threshold": ',
+                          content_type='application/json')
+    assert response.status_code == 400
+
+def test_put_config_without_json_content_type_is_rejected(client):
+    response = client.put('/api/config/cam-1', data='motion_threshold=30')
+    assert response.status_code == 400
+
+def test_put_config_with_non_object_is_rejected(client):
+    response = client.put('/api/config/cam-1', json=[30])
+    assert response.status_code == 400
+
+def test_malformed_min_value_is_rejected(client):
+    for value in ('abc', 'nan'):
+        response = client.get(f'/api/events?min_value={value}')
+        assert response.status_code == 400
+    assert client.get('/api/events?min_value=0.5').status_code == 200
+
+def test_full_event_queue_answers_503(client, monkeypatch):
+    api = importlib.import_module('backend.api')
+    monkeypatch.setattr(api.writer, 'submit', lambda events: False)
+    event = {'timestamp': '2024-01-01T00:00:00Z', 'event_type': 'intrusion_detected', 'value': 1}
+    assert client.post('/api/events', json=event).status_code == 503
+    assert client.post('/api/events/batch', json=[event]).status_code == 503
\ No newline at end of file
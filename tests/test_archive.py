@@ -0,0 +1,50 @@
+import gzip
+from storage import archive
+from storage.archive import EventArchive, TS_INDEX
+
+DAY = 1704067200  # 2024-01-01T00:00:00Z
+
+def make_rows(ids):
+    # Three events per hour, so paging has to order equal timestamps by ID; 150 rows span 3 days
+    return [(i, '', 'intrusion_detected', i % 7, f"cam-{i % 3}", None, None, None,
+             DAY + (i // 3) * 3600.0) for i in ids]
+
+def page_through(store, limit, **filters):
+    rows, before = [], None
+    while True:
+        page = store.query(before=before, limit=limit, **filters)
+        rows.extend(page)
+        if len(page) < limit:
+            return rows
+        before = (page[-1][TS_INDEX], page[-1][0])
+
+def test_paged_query_matches_a_full_scan(tmp_path):
+    store = EventArchive(str(tmp_path))
+    store.append(make_rows(range(150)))
+    store.append(make_rows(range(140, 150)))  # Archived again after a crash
+    
+    filters = {'start': DAY + 5 * 3600, 'end': DAY + 40 * 3600, 'camera_id': 'cam-1', 'min_value': 2}
+    expected = sorted((row for row in make_rows(range(150))
+                       if filters['start'] <= row[TS_INDEX] < filters['end']
+                       and row[4] == 'cam-1' and row[3] >= 2),
+                      key=lambda row: (row[TS_INDEX], row[0]), reverse=True)
+    assert page_through(store, 4, **filters) == expected
+    assert [row[0] for row in page_through(store, 7)] == list(range(149, -1, -1))
+
+def test_paging_decompresses_each_day_once(tmp_path, monkeypatch):
+    store = EventArchive(str(tmp_path), cache_days=1)
+    store.append(make_rows(range(150)))
+    opened = []
+    gzip_open = gzip.open
+    monkeypatch.setattr(archive.gzip, 'open', lambda *args: opened.append(args[0]) or gzip_open(*args))
+    
+    assert len(page_through(store, 5)) == 150
+    assert len(opened) == 3
+    
+    # The newest day is cached after one read, until rows are appended to it
+    assert store.query(limit=1)[0][0] == 149
+    assert store.query(limit=1)[0][0] == 149
+    assert len(opened) == 4
+    store.append(make_rows([150]))
+    assert store.query(limit=1)[0][0] == 150
+    assert len(opened) == 5
\ No newline at end of file
@@ -0,0 +1,48 @@
+import asyncio
+from aiohttp.test_utils import TestClient, TestServer
+from backend.async_api import create_app
+
+EVENT = {'timestamp': '2024-01-01T00:00:00Z', 'event_type': 'intrusion_detected', 'value': 1}
+
+def request(tmp_path, method, path, **kwargs):
+    """Send one request to a fresh app; returns (status, JSON body)"""
+    async def send():
+        app = create_app(str(tmp_path / 'events.db'))
+        async with TestClient(TestServer(app)) as client:
+            response = await client.request(method, path, **kwargs)
+            return response.status, await response.json()
+    return asyncio.run(send())
+
+def test_event_with_string_value_is_rejected(tmp_path):
+    status, body = request(tmp_path, 'POST', '/api/events', json=dict(EVENT, value="5"))
+    assert status == 400
+
+def test_event_with_null_value_is_rejected(tmp_path):
+    status, body = request(tmp_path, 'POST', '/api/events', json=dict(EVENT, value=None))
+    assert status == 400
+
+def test_batch_reports_invalid_events(tmp_path):
+    events = [EVENT, dict(EVENT, value=None), dict(EVENT, value="5")]
+    status, body = request(tmp_path, 'POST', '/api/events/batch', json=events)
+    assert status == 200
+    assert body['accepted'] == 1
+    assert body['rejected'] == [1, 2]
+
+def test_event_with_unparseable_timestamp_is_rejected(tmp_path):
+    status, body = request(tmp_path, 'POST', '/api/events', json=dict(EVENT, timestamp="yesterday"))
+    assert status == 400
+
+def test_malformed_min_value_is_rejected(tmp_path):
+    status, body = request(tmp_path, 'GET', '/api/events?min_value=abc')
+    assert status == 400
+    assert 'min_value' in body['error']
+
+def test_metrics_are_served_in_prometheus_format(tmp_path):
+    async def scrape():
+        async with TestClient(TestServer(create_app(str(tmp_path / 'events.db')))) as client:
+            response = await client.get('/metrics')
+            return response.status, response.headers['Content-Type'], await response.text()
+    status, content_type, body = asyncio.run(scrape())
+    assert status == 200
+    assert content_type == 'text/plain; version=0.0.4; charset=utf-8'
+    assert '# TYPE intrusion_stage_latency_seconds summary' in body
\ No newline at end of file
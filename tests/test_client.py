@@ -0,0 +1,26 @@
+import json
+from backend.client import EventDispatcher
+
+EVENT = {'timestamp': '2024-01-01T00:00:00Z', 'event_type': 'intrusion_detected', 'value': 1}
+
+def test_unwritable_journal_counts_events_as_lost(tmp_path):
+    dispatcher = EventDispatcher(journal_path=str(tmp_path / 'missing' / 'journal.ndjson'))
+    dispatcher.append_journal([EVENT, EVENT])
+    assert dispatcher.get_stats()['lost'] == 2
+    assert dispatcher.get_stats()['journaled'] == 0
+
+def test_corrupt_journal_lines_are_skipped(tmp_path):
+    journal = tmp_path / 'journal.ndjson'
+    journal.write_text(json.dumps(EVENT) + '\n{"timestamp": "2024-01-0\n' + json.dumps(EVENT) + '\n')
+    dispatcher = EventDispatcher(journal_path=str(journal))
+    sent = []
+    dispatcher.send = sent.extend
+    dispatcher.replay_journal()
+    assert sent == [EVENT, EVENT]
+    assert dispatcher.get_stats()['lost'] == 1
+    assert not journal.exists()
+
+def test_unreadable_journal_is_retried_later(tmp_path):
+    dispatcher = EventDispatcher(journal_path=str(tmp_path))  # A directory cannot be opened
+    dispatcher.replay_journal()
+    assert dispatcher.retry_at > 0
\ No newline at end of file
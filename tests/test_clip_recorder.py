@@ -0,0 +1,42 @@
+import numpy as np
+from storage.database import Database
+from storage.media_store import MediaStore
+from utils.clip_recorder import ClipRecorder
+
+def make_recorder(tmp_path, **kwargs):
+    return ClipRecorder(store=MediaStore(str(tmp_path / 'media')),
+                        db_path=str(tmp_path / 'events.db'), ring_frames=4, pre_roll=1,
+                        post_roll=0, **kwargs)
+
+def test_failed_job_does_not_stop_the_writer(tmp_path):
+    recorder = make_recorder(tmp_path)
+    calls = []
+    put = recorder.store.put
+    def flaky_put(data, extension):
+        calls.append(extension)
+        if len(calls) == 1:
+            raise RuntimeError("disk gone")
+        return put(data, extension)
+    recorder.store.put = flaky_put
+    recorder.start()
+    
+    frame = np.zeros((64, 64, 3), np.uint8)
+    recorder.add(frame)
+    first = recorder.trigger()
+    recorder.add(frame)
+    second = recorder.trigger()
+    recorder.stop()
+    
+    assert recorder.failed == 1
+    db = Database(str(tmp_path / 'events.db'))
+    assert db.get_media(first) == []
+    assert [row[2] for row in db.get_media(second)] == ['snapshot', 'clip']
+    db.close()
+
+def test_stop_does_not_block_on_a_full_queue(tmp_path):
+    recorder = make_recorder(tmp_path, queue_size=1)
+    recorder.thread = object()  # A writer that never takes jobs
+    recorder.add(np.zeros((64, 64, 3), np.uint8))
+    assert recorder.trigger() is not None
+    recorder.stop(timeout=0.01)
+    assert recorder.jobs.qsize() == 1
\ No newline at end of file
@@ -0,0 +1,28 @@
+import cv2
+import numpy as np
+from processing.contour_utils import ContourProcessor
+
+def ring_with_inner_blob():
+    """Mask of a ring component with a separate blob inside its hole"""
+    mask = np.zeros((200, 200), np.uint8)
+    cv2.rectangle(mask, (20, 20), (180, 180), 255, -1)
+    cv2.rectangle(mask, (40, 40), (160, 160), 0, -1)
+    cv2.rectangle(mask, (80, 80), (120, 120), 255, -1)
+    return mask
+
+def test_nested_component_can_be_drawn():
+    centroids, contours = ContourProcessor(min_area=100, backend="components").get_centroids(
+        ring_with_inner_blob())
+    assert len(centroids) == 2
+    assert len(contours) == len(list(contours)) == 1
+    assert contours[len(contours) - 1] is not None
+    
+    frame = np.zeros((200, 200, 3), np.uint8)
+    cv2.drawContours(frame, contours, -1, (0, 255, 0), 2)
+    assert frame.any()
+
+def test_backends_trace_the_same_outlines():
+    mask = ring_with_inner_blob()
+    _, traced = ContourProcessor(min_area=100, backend="contours").get_centroids(mask)
+    _, components = ContourProcessor(min_area=100, backend="components").get_centroids(mask)
+    assert len(traced) == len(components)
\ No newline at end of file
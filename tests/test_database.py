@@ -0,0 +1,17 @@
+import time
+from storage.database import Database
+from storage.retention import EventRetention
+from utils.event import Event
+
+def test_crossing_zone_and_direction_are_stored(tmp_path):
+    db = Database(str(tmp_path / 'events.db'), archive_root=str(tmp_path / 'archive'))
+    db.insert_events([Event.create_intrusion_event('cam-1', zone='yard', direction='enter'),
+                      Event.create_intrusion_event('cam-1')])
+    rows, _ = db.query_events()
+    assert [(row[6], row[7]) for row in rows] == [(None, None), ('yard', 'enter')]
+    
+    # Archived events keep them too
+    EventRetention(db, max_days=0, pause=0).run_once(time.time() + 1)
+    rows, _ = db.query_events()
+    assert [(row[6], row[7]) for row in rows] == [(None, None), ('yard', 'enter')]
+    db.close()
\ No newline at end of file
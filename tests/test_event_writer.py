@@ -0,0 +1,46 @@
+from storage.database import Database, EventWriter
+
+def valid_event(i):
+    return {'timestamp': f'2024-01-01T00:00:{i:02d}Z', 'event_type': 'intrusion_detected',
+            'value': i, 'camera_id': 'cam-1'}
+
+def stored_values(db):
+    with db.pool.reader() as conn:
+        return sorted(row[0] for row in conn.execute('SELECT value FROM events'))
+
+def run_writer(tmp_path, batch):
+    db = Database(str(tmp_path / 'events.db'), archive_root=None)
+    writer = EventWriter(db, batch_size=100, flush_interval=60).start()
+    writer.submit(batch)
+    assert writer.flush(timeout=10)
+    return db, writer
+
+def test_null_value_does_not_roll_back_other_events(tmp_path):
+    db, writer = run_writer(tmp_path, [valid_event(1), dict(valid_event(2), value=None),
+                                       valid_event(3)])
+    assert stored_values(db) == [1, 3]
+    assert writer.get_stats()['written'] == 2
+    assert writer.get_stats()['failed'] == 1
+    writer.stop()
+    db.close()
+
+def test_writer_survives_non_sqlite_error(tmp_path):
+    # A string value is stored by SQLite but makes the rollup sum raise TypeError
+    db, writer = run_writer(tmp_path, [valid_event(1), dict(valid_event(2), value="5")])
+    assert writer.thread.is_alive()
+    writer.submit([valid_event(4)])
+    assert writer.flush(timeout=10)
+    assert stored_values(db) == [1, 4]
+    assert writer.get_stats()['failed'] == 1
+    writer.stop()
+    db.close()
+
+def test_full_queue_refuses_events(tmp_path):
+    db = Database(str(tmp_path / 'events.db'), archive_root=None)
+    writer = EventWriter(db, batch_size=100, flush_interval=60, max_pending=3)  # Not started
+    assert writer.submit([valid_event(1), valid_event(2)])
+    assert not writer.submit([valid_event(3), valid_event(4)])
+    assert writer.submit([valid_event(3)])
+    assert writer.get_stats()['pending'] == 3
+    assert writer.get_stats()['refused'] == 2
+    db.close()
\ No newline at end of file
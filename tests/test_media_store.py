@@ -0,0 +1,10 @@
+from storage.media_store import MediaStore
+
+def test_directories_are_created_on_first_write(tmp_path):
+    store = MediaStore(str(tmp_path / 'media'))
+    assert not (tmp_path / 'media').exists()
+    
+    digest, path = store.put(b'jpeg bytes', 'jpg')
+    with open(store.absolute_path(path), 'rb') as f:
+        assert f.read() == b'jpeg bytes'
+    assert path == store.relative_path(digest, 'jpg')
\ No newline at end of file
@@ -0,0 +1,30 @@
+import numpy as np
+from processing.intrusion_logic import IntrusionDetector
+from processing.perimeter import Perimeter
+
+SQUARE = {'name': 'yard', 'type': 'polygon', 'points': [(0, 0), (10, 0), (10, 10), (0, 10)]}
+
+def crossings(perimeter, prev, curr):
+    tracks, zones, signs = perimeter.find_crossings(np.array([prev], float), np.array([curr], float))
+    return [(int(zone), perimeter.direction(zone, sign)) for zone, sign in zip(zones, signs)]
+
+def test_crossings_are_ordered_along_the_move():
+    perimeter = Perimeter([SQUARE])
+    # The exit segment comes first in the polygon, but the track enters first
+    assert crossings(perimeter, (-5, 5), (15, 5)) == [(0, 'enter'), (0, 'exit')]
+    assert crossings(perimeter, (15, 5), (-5, 5)) == [(0, 'enter'), (0, 'exit')]
+
+def test_move_through_a_vertex_counts_once():
+    perimeter = Perimeter([SQUARE])
+    assert crossings(perimeter, (-5, -5), (5, 5)) == [(0, 'enter')]
+
+def test_detector_reports_both_crossings_of_one_move():
+    detector = IntrusionDetector(zones=[SQUARE], cooldown=60)
+    detector.update([(-5, 5)])
+    intrusion, _, reported = detector.update([(15, 5)])
+    assert intrusion
+    assert [(c.zone, c.direction) for c in reported] == [('yard', 'enter'), ('yard', 'exit')]
+    
+    # The cooldown still applies to the next move
+    detector.update([(-5, 5)])
+    assert detector.update([(15, 5)])[2] == []
\ No newline at end of file
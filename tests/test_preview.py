@@ -0,0 +1,18 @@
+import threading
+from utils.preview import MJPEGBuffer
+
+def test_stream_ends_when_no_frame_arrives():
+    buffer = MJPEGBuffer(timeout=0.05)
+    buffer.publish(b'jpeg')
+    assert list(buffer.stream()) == [
+        b'--frame\r\nContent-Type: image/jpeg\r\nContent-Length: 4\r\n\r\njpeg\r\n']
+
+def test_close_ends_waiting_streams():
+    buffer = MJPEGBuffer(timeout=60)
+    parts = []
+    client = threading.Thread(target=lambda: parts.extend(buffer.stream()))
+    client.start()
+    buffer.publish(b'jpeg')
+    buffer.close()
+    client.join(timeout=5)
+    assert not client.is_alive()
\ No newline at end of file
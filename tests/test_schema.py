@@ -0,0 +1,34 @@
+import pytest
+from backend.schema import is_valid_event, parse_number
+
+EVENT = {'timestamp': '2024-01-01T00:00:00Z', 'event_type': 'intrusion_detected', 'value': 1}
+
+def test_valid_event():
+    assert is_valid_event(EVENT)
+    assert is_valid_event(dict(EVENT, value=0.5, camera_id='cam-1'))
+
+def test_missing_field():
+    assert not is_valid_event({'timestamp': EVENT['timestamp'], 'event_type': 'intrusion_detected'})
+    assert not is_valid_event([EVENT])
+
+def test_value_must_be_a_number():
+    for value in ("5", None, True, [1]):
+        assert not is_valid_event(dict(EVENT, value=value))
+
+def test_timestamp_and_event_type_must_be_non_empty_strings():
+    for field in ('timestamp', 'event_type'):
+        for bad in ("", None, 5):
+            assert not is_valid_event(dict(EVENT, **{field: bad}))
+
+def test_timestamp_must_parse():
+    # Stored with no ts, such an event would never appear in GET /api/events
+    for bad in ("yesterday", "2024-13-01T00:00:00Z", "12:00"):
+        assert not is_valid_event(dict(EVENT, timestamp=bad))
+    assert is_valid_event(dict(EVENT, timestamp='2024-01-01T00:00:00+02:00'))
+
+def test_parse_number():
+    assert parse_number('min_value', None) is None
+    assert parse_number('min_value', '2.5') == 2.5
+    for bad in ('abc', '', 'inf'):
+        with pytest.raises(ValueError):
+            parse_number('min_value', bad)
\ No newline at end of file
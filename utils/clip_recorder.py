@@ -0,0 +1,251 @@
+import os
+import queue
+import threading
+import time
+import uuid
+import cv2
+import numpy as np
+from storage.database import Database
+from storage.media_store import MediaStore
+from config.settings import (DB_PATH, MEDIA_RING_FRAMES, MEDIA_SCALE, MEDIA_PRE_ROLL_FRAMES,
+                             MEDIA_POST_ROLL_FRAMES, MEDIA_CLIP_FPS, MEDIA_JPEG_QUALITY,
+                             MEDIA_QUEUE_SIZE)
+
+def lower_thread_priority(increment=10):
+    """Make the calling thread yield the CPU to the frame loop (Linux; ignored elsewhere)"""
+    try:
+        # On Linux a thread ID addresses a single thread
+        thread_id = threading.get_native_id()
+        os.setpriority(os.PRIO_PROCESS, thread_id,
+                       os.getpriority(os.PRIO_PROCESS, thread_id) + increment)
+    except (AttributeError, OSError):
+        pass
+
+
+class FrameRing:
+    """Fixed number of preallocated frame slots, overwritten oldest first
+    
+    add() copies (or downscales) a frame into the next slot, so nothing is
+    allocated after the first frame and memory is size x slot bytes. Every
+    slot records the sequence number of the frame it holds; read() checks
+    it before and after copying, so a reader on another thread gets None
+    instead of a frame that was overwritten while it was being read.
+    """
+    
+    def __init__(self, size=MEDIA_RING_FRAMES, scale=MEDIA_SCALE):
+        if not 0.0 < scale <= 1.0:
+            raise ValueError(f"Media scale must be in (0, 1]: {scale}")
+        self.size = size
+        self.scale = scale
+        self.slots = None  # size x height x width x 3, allocated on the first frame
+        self.frame_size = None  # (width, height) of a slot
+        self.slot_seq = [-1] * size  # Sequence number held by each slot, -1 while written
+        self.next_seq = 0
+        self.closed = False
+        self.condition = threading.Condition()
+    
+    @property
+    def nbytes(self):
+        """Memory held by the slots"""
+        return 0 if self.slots is None else self.slots.nbytes
+    
+    def allocate(self, frame):
+        """Allocate all slots for the stream's frame size"""
+        h, w = frame.shape[:2]
+        self.frame_size = (max(1, int(round(w * self.scale))), max(1, int(round(h * self.scale))))
+        width, height = self.frame_size
+        self.slots = np.empty((self.size, height, width) + frame.shape[2:], frame.dtype)
+    
+    def add(self, frame):
+        """Copy a frame into the ring; returns its sequence number"""
+        if self.slots is None:
+            self.allocate(frame)
+        seq = self.next_seq
+        slot = seq % self.size
+        self.slot_seq[slot] = -1
+        if self.scale != 1.0:
+            cv2.resize(frame, self.frame_size, dst=self.slots[slot],
+                       interpolation=cv2.INTER_LINEAR)
+        else:
+            np.copyto(self.slots[slot], frame)
+        self.slot_seq[slot] = seq
+        with self.condition:
+            self.next_seq = seq + 1
+            self.condition.notify_all()
+        return seq
+    
+    def oldest(self):
+        """Sequence number of the oldest frame still held"""
+        return max(0, self.next_seq - self.size)
+    
+    def read(self, seq):
+        """Copy of frame seq, or None if it is no longer (or not yet) held"""
+        slot = seq % self.size
+        if self.slot_seq[slot] != seq:
+            return None
+        frame = self.slots[slot].copy()
+        if self.slot_seq[slot] != seq:
+            return None
+        return frame
+    
+    def wait_for(self, seq):
+        """Wait until frame seq was added; False if the ring was closed first"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.next_seq > seq or self.closed)
+            return self.next_seq > seq
+    
+    def close(self):
+        """Release waiting readers; no more frames will be added"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class ClipRecorder:
+    """Keeps recent frames of one camera and writes intrusion evidence in the background
+    
+    The frame loop calls add() for every frame (one copy into a FrameRing)
+    and trigger() when an intrusion fires, which only queues a job and
+    returns the media UID to put on the event. A writer thread, at lower
+    OS priority, then encodes a JPEG snapshot of the trigger frame and an
+    MJPEG AVI clip from pre_roll frames before it to post_roll frames after
+    it, waiting for post-roll frames as they arrive. Both files go to the
+    content-addressed MediaStore and are recorded in the event_media table.
+    
+    The ring must hold more than pre_roll frames so the writer has time to
+    read the pre-roll before it is overwritten; frames overwritten anyway
+    are left out of the clip and counted as lost. When MEDIA_QUEUE_SIZE
+    intrusions are already waiting, trigger() returns None and the event
+    gets no media.
+    """
+    
+    def __init__(self, camera_id=None, store=None, db_path=DB_PATH, ring_frames=MEDIA_RING_FRAMES,
+                 scale=MEDIA_SCALE, pre_roll=MEDIA_PRE_ROLL_FRAMES, post_roll=MEDIA_POST_ROLL_FRAMES,
+                 fps=MEDIA_CLIP_FPS, quality=MEDIA_JPEG_QUALITY, queue_size=MEDIA_QUEUE_SIZE):
+        if pre_roll >= ring_frames:
+            raise ValueError(f"Pre-roll ({pre_roll} frames) must be shorter than the ring "
+                             f"({ring_frames} frames)")
+        self.camera_id = camera_id
+        self.store = store or MediaStore()
+        self.db_path = db_path
+        self.db = None  # Opened by the writer thread
+        self.ring = FrameRing(ring_frames, scale)
+        self.pre_roll = pre_roll
+        self.post_roll = post_roll
+        self.fps = fps
+        self.quality = quality
+        self.jobs = queue.Queue(queue_size)
+        self.thread = None
+        
+        # Counters
+        self.triggered = 0
+        self.dropped = 0  # Intrusions that got no media because the queue was full
+        self.written = 0  # Media items (snapshots and clips) stored
+        self.frames_lost = 0  # Clip frames overwritten before the writer read them
+        self.failed = 0
+    
+    def start(self):
+        """Start the writer thread"""
+        self.thread = threading.Thread(target=self.run, name="clip-writer", daemon=True)
+        self.thread.start()
+        return self
+    
+    def add(self, frame):
+        """Keep a copy of the frame (called from the frame loop)"""
+        return self.ring.add(frame)
+    
+    def trigger(self):
+        """Queue evidence around the latest frame; returns its media UID or None"""
+        seq = self.ring.next_seq - 1
+        if seq < 0:
+            return None
+        media_uid = uuid.uuid4().hex
+        try:
+            self.jobs.put_nowait((media_uid, seq, time.time()))
+        except queue.Full:
+            self.dropped += 1
+            return None
+        self.triggered += 1
+        return media_uid
+    
+    def run(self):
+        """Writer thread: store evidence for each queued intrusion until stopped"""
+        lower_thread_priority()
+        self.db = Database(self.db_path, readers=0)
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            try:
+                self.write_evidence(*job)
+            except Exception as e:
+                # One bad job must not end the thread: later triggers would queue forever
+                self.failed += 1
+                print(f"[ERROR] Failed to store media {job[0]}: {e}")
+        self.db.close()
+    
+    def write_evidence(self, media_uid, seq, created):
+        """Encode and store the snapshot and clip for one intrusion"""
+        items = []
+        snapshot = self.ring.read(seq)
+        if snapshot is not None:
+            ok, jpeg = cv2.imencode('.jpg', snapshot, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+            if ok:
+                digest, path = self.store.put(jpeg.tobytes(), 'jpg')
+                items.append(('snapshot', digest, path, len(jpeg), 1))
+        
+        tmp_path = self.store.temp_path('avi')
+        writer = cv2.VideoWriter(tmp_path, cv2.VideoWriter_fourcc(*'MJPG'), self.fps,
+                                 self.ring.frame_size)
+        writer.set(cv2.VIDEOWRITER_PROP_QUALITY, self.quality)
+        frames = 0
+        for frame_seq in range(max(seq - self.pre_roll, self.ring.oldest()),
+                               seq + self.post_roll + 1):
+            # Post-roll frames are written as the frame loop adds them
+            if not self.ring.wait_for(frame_seq):
+                break
+            frame = self.ring.read(frame_seq)
+            if frame is None:
+                self.frames_lost += 1
+                continue
+            writer.write(frame)
+            frames += 1
+        writer.release()
+        if frames:
+            digest, path = self.store.put_file(tmp_path, 'avi')
+            items.append(('clip', digest, path, os.path.getsize(self.store.absolute_path(path)),
+                          frames))
+        elif os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        
+        if items:
+            self.db.insert_media(media_uid, self.camera_id, items, created)
+            self.written += len(items)
+    
+    def stop(self, timeout=10.0):
+        """Finish queued evidence with the frames already kept and stop the thread
+        
+        Gives up after timeout seconds if the queue stays full, e.g. because
+        the writer thread is stuck, instead of blocking shutdown.
+        """
+        self.ring.close()
+        if self.thread is not None:
+            try:
+                self.jobs.put(None, timeout=timeout)
+            except queue.Full:
+                print(f"[WARNING] Media writer did not take the stop request; "
+                      f"{self.jobs.qsize()} intrusion(s) left without media")
+                return
+            self.thread.join()
+    
+    def get_stats(self):
+        """Return capture counters and ring memory"""
+        return {
+            'triggered': self.triggered,
+            'dropped': self.dropped,
+            'pending': self.jobs.qsize(),
+            'written': self.written,
+            'frames_lost': self.frames_lost,
+            'failed': self.failed,
+            'ring_mb': self.ring.nbytes / 1e6,
+        }
\ No newline at end of file
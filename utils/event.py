@@ -4,20 +4,30 @@ class Event:
     """Represents a detection event"""
     
     @staticmethod
-    def create_intrusion_event():
-        """Create intrusion detection event"""
-        return {
+    def create_intrusion_event(camera_id=None, media_uid=None, zone=None, direction=None):
+        """Create intrusion event for one crossing, optionally linked to its snapshot and clip"""
+        event = {
             "timestamp": datetime.utcnow().isoformat() + "Z",
             "event_type": "intrusion_detected",
             "value": 1
         }
+        if camera_id is not None:
+            event["camera_id"] = camera_id
+        if media_uid is not None:
+            event["media_uid"] = media_uid
+        if zone is not None:
+            event["zone"] = zone
+            event["direction"] = direction
+        return event
     
     @staticmethod
-    def create_motion_event(motion_intensity):
+    def create_motion_event(motion_intensity, camera_id=None):
         """Create motion detection event with intensity"""
-        return {
+        event = {
             "timestamp": datetime.utcnow().isoformat() + "Z",
             "event_type": "motion_detected",
             "value": motion_intensity
         }
-        
\ No newline at end of file
+        if camera_id is not None:
+            event["camera_id"] = camera_id
+        return event
\ No newline at end of file
@@ -0,0 +1,134 @@
+import cv2
+import numpy as np
+from config.settings import (PERIMETER_LINE, FONT_SCALE, FONT_THICKNESS, LINE_THICKNESS)
+
+def draw_perimeter(frame, perimeter_line=PERIMETER_LINE):
+    """Draw virtual perimeter line on frame"""
+    x1, y1, x2, y2 = perimeter_line
+    # Draw thick red line
+    cv2.line(frame, (x1, y1), (x2, y2), (0, 0, 255), LINE_THICKNESS)
+    # Add label with background
+    label = "DO NOT CROSS"
+    (text_w, text_h), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, FONT_SCALE, FONT_THICKNESS)
+    cv2.rectangle(frame, (x1, y1 - text_h - 10), (x1 + text_w + 10, y1), (0, 0, 255), -1)
+    cv2.putText(frame, label, (x1 + 5, y1 - 5), cv2.FONT_HERSHEY_SIMPLEX, 
+                FONT_SCALE, (255, 255, 255), FONT_THICKNESS)
+
+def draw_zones(frame, zones):
+    """Draw perimeter zones (line, polyline or polygon) with their names"""
+    for zone in zones:
+        points = np.array(zone['points'], dtype=np.int32).reshape(-1, 1, 2)
+        cv2.polylines(frame, [points], zone.get('type') == 'polygon', (0, 0, 255), LINE_THICKNESS)
+        if 'name' in zone:
+            x, y = points[0, 0]
+            cv2.putText(frame, zone['name'], (int(x) + 5, int(y) - 5), cv2.FONT_HERSHEY_SIMPLEX,
+                        FONT_SCALE, (0, 0, 255), FONT_THICKNESS)
+
+def draw_tracked_objects(frame, objects):
+    """Draw tracked objects with IDs"""
+    for object_id, centroid in objects.items():
+        # Draw centroid as large circle
+        cx, cy = int(centroid[0]), int(centroid[1])
+        cv2.circle(frame, (cx, cy), 8, (0, 255, 255), -1)
+        cv2.circle(frame, (cx, cy), 10, (255, 0, 0), 2)
+        
+        # Draw object ID
+        text = f"ID: {object_id}"
+        cv2.putText(frame, text, (cx - 30, cy - 15), cv2.FONT_HERSHEY_SIMPLEX,
+                    0.6, (0, 255, 255), 2)
+
+def draw_contours(frame, contours):
+    """Draw detected motion contours"""
+    cv2.drawContours(frame, contours, -1, (0, 255, 0), 2)
+
+def draw_fps(frame, fps):
+    """Draw FPS counter on frame"""
+    fps_text = f"FPS: {fps}"
+    cv2.rectangle(frame, (5, 5), (120, 40), (0, 0, 0), -1)
+    cv2.putText(frame, fps_text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX,
+                0.7, (0, 255, 0), 2)
+
+def draw_profile(frame, summary):
+    """Draw per-stage p50 / p95 times (milliseconds) in the bottom-left corner"""
+    h, w = frame.shape[:2]
+    rows = [("stage", "p50", "p95 ms")] + [
+        (stage, f"{1000 * stats['p50']:.1f}", f"{1000 * stats['p95']:.1f}")
+        for stage, stats in summary.items()
+    ]
+    top = h - 20 * len(rows) - 15
+    cv2.rectangle(frame, (5, top), (215, h - 5), (0, 0, 0), -1)
+    for index, row in enumerate(rows):
+        y = top + 18 + 20 * index
+        color = (0, 255, 0) if index == 0 else (255, 255, 255)
+        for x, text in zip((10, 105, 155), row):
+            cv2.putText(frame, text, (x, y), cv2.FONT_HERSHEY_PLAIN, 1.0, color, 1)
+
+def draw_intrusion_alert(frame, object_id):
+    """Draw intrusion alert banner"""
+    h, w = frame.shape[:2]
+    # Draw red banner at top
+    cv2.rectangle(frame, (0, 0), (w, 80), (0, 0, 255), -1)
+    cv2.rectangle(frame, (0, 0), (w, 80), (255, 255, 255), 3)
+    
+    # Alert text
+    alert_text = "!!! INTRUSION DETECTED !!!"
+    (text_w, text_h), _ = cv2.getTextSize(alert_text, cv2.FONT_HERSHEY_SIMPLEX, 1.2, 3)
+    cv2.putText(frame, alert_text, ((w - text_w) // 2, 35), 
+                cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255, 255, 255), 3)
+    
+    # Object ID
+    id_text = f"Object #{object_id} crossed perimeter"
+    (id_w, id_h), _ = cv2.getTextSize(id_text, cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2)
+    cv2.putText(frame, id_text, ((w - id_w) // 2, 65), 
+                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+
+def draw_status(frame, motion_detected, objects_count):
+    """Draw system status"""
+    h, w = frame.shape[:2]
+    # Status background
+    cv2.rectangle(frame, (w - 280, 5), (w - 5, 85), (0, 0, 0), -1)
+    cv2.rectangle(frame, (w - 280, 5), (w - 5, 85), (255, 255, 255), 2)
+    
+    # Motion status
+    motion_status = "Motion: YES" if motion_detected else "Motion: NO"
+    motion_color = (0, 255, 0) if motion_detected else (100, 100, 100)
+    cv2.putText(frame, motion_status, (w - 270, 30), 
+                cv2.FONT_HERSHEY_SIMPLEX, 0.6, motion_color, 2)
+    
+    # Objects tracked
+    obj_text = f"Tracking: {objects_count} objects"
+    cv2.putText(frame, obj_text, (w - 270, 55), 
+                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+    
+    # Instructions
+    cv2.putText(frame, "Press 'Q' to quit", (w - 270, 75), 
+                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
+
+def annotate_frame(frame, result, objects_count, alert_object_id=None, fps=None,
+                   perimeter_line=PERIMETER_LINE, zones=None, profile=None):
+    """Draw all overlays for one processed frame
+    
+    alert_object_id is the object shown in the intrusion banner (None hides
+    the banner) and fps is drawn only when given. zones, when given, are
+    drawn instead of the perimeter line. profile is a StageProfiler summary
+    shown as a per-stage breakdown.
+    """
+    draw_contours(frame, result.contours)
+    draw_tracked_objects(frame, result.objects)
+    
+    # Draw perimeter line or zones (always visible)
+    if zones:
+        draw_zones(frame, zones)
+    else:
+        draw_perimeter(frame, perimeter_line)
+    
+    if alert_object_id is not None:
+        draw_intrusion_alert(frame, alert_object_id)
+    
+    draw_status(frame, result.motion_detected, objects_count)
+    
+    if fps is not None:
+        draw_fps(frame, fps)
+    
+    if profile:
+        draw_profile(frame, profile)
\ No newline at end of file
@@ -0,0 +1,103 @@
+import os
+import threading
+import cv2
+from config.settings import (PREVIEW_MODE, PREVIEW_EVERY_N, PREVIEW_TARGET, PREVIEW_PATH,
+                             PREVIEW_JPEG_QUALITY, PREVIEW_STREAM_TIMEOUT)
+
+class MJPEGBuffer:
+    """Holds the latest JPEG preview frame for MJPEG streaming
+    
+    A stream ends when no frame arrives for PREVIEW_STREAM_TIMEOUT seconds
+    or the buffer is closed, so clients of a stopped or lost camera do not
+    hold a server worker forever.
+    """
+    
+    def __init__(self, timeout=PREVIEW_STREAM_TIMEOUT):
+        self.condition = threading.Condition()
+        self.jpeg = None
+        self.sequence = 0
+        self.timeout = timeout
+        self.closed = False
+    
+    def publish(self, jpeg):
+        """Replace the latest preview frame and wake up streaming clients"""
+        with self.condition:
+            self.jpeg = jpeg
+            self.sequence += 1
+            self.condition.notify_all()
+    
+    def close(self):
+        """End every open stream (the producer stopped)"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+    
+    def stream(self):
+        """Yield multipart MJPEG parts as new preview frames arrive, until the producer stops"""
+        last_sequence = 0
+        while True:
+            with self.condition:
+                fresh = self.condition.wait_for(
+                    lambda: self.sequence != last_sequence or self.closed, self.timeout)
+                if not fresh or self.closed:
+                    return
+                jpeg, last_sequence = self.jpeg, self.sequence
+            yield (b'--frame\r\nContent-Type: image/jpeg\r\n'
+                   b'Content-Length: ' + str(len(jpeg)).encode() + b'\r\n\r\n' + jpeg + b'\r\n')
+
+
+# Shared with the backend, which serves it at /api/preview.mjpg
+preview_buffer = MJPEGBuffer()
+
+
+class PreviewWriter:
+    """Writes annotated preview frames on demand while running headless
+    
+    Modes: "every_n" writes every Nth frame, "alert" writes only while an
+    intrusion alert is active. Frames go to a JPEG file (replaced atomically)
+    or to the in-memory MJPEG buffer.
+    """
+    
+    def __init__(self, mode=PREVIEW_MODE, every_n=PREVIEW_EVERY_N, target=PREVIEW_TARGET,
+                 path=PREVIEW_PATH, quality=PREVIEW_JPEG_QUALITY, buffer=preview_buffer):
+        if mode not in ("off", "every_n", "alert"):
+            raise ValueError(f"Unknown preview mode: {mode}")
+        if target not in ("file", "mjpeg"):
+            raise ValueError(f"Unknown preview target: {target}")
+        self.mode = mode
+        self.every_n = max(1, every_n)
+        self.target = target
+        self.path = path
+        self.encode_params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+        self.buffer = buffer
+        self.frames_written = 0
+    
+    def close(self):
+        """Disconnect MJPEG clients once no more frames will be written"""
+        if self.target == "mjpeg":
+            self.buffer.close()
+    
+    def is_due(self, frame_index, alert_active):
+        """Check whether this frame should be rendered into the preview"""
+        if self.mode == "every_n":
+            return frame_index % self.every_n == 0
+        if self.mode == "alert":
+            return alert_active
+        return False
+    
+    def write(self, frame):
+        """Encode an annotated frame and publish it to the preview target"""
+        ok, encoded = cv2.imencode('.jpg', frame, self.encode_params)
+        if not ok:
+            print("[WARNING] Failed to encode preview frame")
+            return
+        
+        if self.target == "mjpeg":
+            self.buffer.publish(encoded.tobytes())
+        else:
+            # Write then rename so readers never see a partial file
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(encoded.tobytes())
+            os.replace(tmp_path, self.path)
+        self.frames_written += 1
\ No newline at end of file
@@ -0,0 +1,123 @@
+import threading
+import time
+import numpy as np
+from config.settings import PROFILE_WINDOW
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+class StageProfiler:
+    """Rolling per-stage latency samples for one camera
+    
+    Each stage keeps its last `window` durations (perf_counter_ns) in a
+    fixed ring, plus a running count and total. Recording is a clock read
+    and a few list/attribute updates; percentiles are only computed when
+    summary() is called. Callers hold None instead of a profiler when
+    profiling is off, so disabled timing costs nothing.
+    """
+    
+    def __init__(self, camera_id=None, window=PROFILE_WINDOW):
+        self.camera_id = camera_id
+        self.window = window
+        self.samples = {}  # Stage -> ring of durations in ns
+        self.counts = {}  # Stage -> durations recorded so far
+        self.totals = {}  # Stage -> sum of all durations in ns
+    
+    @staticmethod
+    def start():
+        """Return the current monotonic time in ns"""
+        return time.perf_counter_ns()
+    
+    def record(self, stage, duration_ns):
+        """Add one duration to a stage"""
+        count = self.counts.get(stage)
+        if count is None:
+            self.samples[stage] = [0] * self.window
+            self.totals[stage] = 0
+            count = 0
+        self.samples[stage][count % self.window] = duration_ns
+        self.counts[stage] = count + 1
+        self.totals[stage] += duration_ns
+    
+    def lap(self, stage, start_ns):
+        """Record the time since start_ns for a stage; returns now, the next stage's start"""
+        now = time.perf_counter_ns()
+        self.record(stage, now - start_ns)
+        return now
+    
+    def summary(self):
+        """Per-stage count, total seconds and p50/p95/p99 seconds over the window
+        
+        Returns {stage: {'count', 'sum', 'p50', 'p95', 'p99'}} in the order
+        the stages were first recorded. Safe to call from another thread.
+        """
+        summary = {}
+        for stage, samples in list(self.samples.items()):
+            count = self.counts.get(stage)
+            if not count:
+                continue  # First sample is still being recorded
+            recent = np.array(samples[:min(count, self.window)], dtype=np.float64) / 1e9
+            p50, p95, p99 = np.quantile(recent, QUANTILES)
+            summary[stage] = {
+                'count': count,
+                'sum': self.totals[stage] / 1e9,
+                'p50': float(p50),
+                'p95': float(p95),
+                'p99': float(p99)
+            }
+        return summary
+
+
+class MetricsRegistry:
+    """Collects stage summaries from all cameras for the /metrics endpoint
+    
+    Profilers in this process are registered and summarized on each
+    scrape; worker processes publish their summaries with their stats
+    reports instead.
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.profilers = {}  # Camera ID -> StageProfiler in this process
+        self.summaries = {}  # Camera ID -> latest summary published by a worker
+    
+    def register(self, profiler):
+        """Summarize a local profiler on every scrape"""
+        with self.lock:
+            self.profilers[profiler.camera_id] = profiler
+    
+    def publish(self, camera_id, summary):
+        """Replace the summary reported for a camera"""
+        with self.lock:
+            self.summaries[camera_id] = summary
+    
+    def collect(self):
+        """Return {camera_id: summary} for every known camera"""
+        with self.lock:
+            summaries = dict(self.summaries)
+            profilers = list(self.profilers.values())
+        for profiler in profilers:
+            summaries[profiler.camera_id] = profiler.summary()
+        return summaries
+    
+    def render(self):
+        """Prometheus text exposition of all stage latencies"""
+        name = 'intrusion_stage_latency_seconds'
+        lines = [
+            f'# HELP {name} Per-stage processing time per frame (quantiles over the '
+            f'last {PROFILE_WINDOW} frames)',
+            f'# TYPE {name} summary'
+        ]
+        for camera_id, summary in self.collect().items():
+            camera = 'default' if camera_id is None else str(camera_id).replace('"', '\\"')
+            for stage, stats in summary.items():
+                labels = f'camera="{camera}",stage="{stage}"'
+                for quantile in QUANTILES:
+                    value = stats[f"p{round(quantile * 100)}"]
+                    lines.append(f'{name}{{{labels},quantile="{quantile}"}} {value:.9f}')
+                lines.append(f'{name}_sum{{{labels}}} {stats["sum"]:.9f}')
+                lines.append(f'{name}_count{{{labels}}} {stats["count"]}')
+        return '\n'.join(lines) + '\n'
+
+
+# Shared with the backend, which serves it at /metrics
+metrics_registry = MetricsRegistry()
\ No newline at end of file